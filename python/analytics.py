@@ -0,0 +1,222 @@
+# analytics.py
+"""Аналитика стоимостей по выгрузке тикетов на NumPy.
+
+Строки стоимости каждого тикета (parse_price_lines) складываются в колонки:
+номер тикета, код названия, сумма в копейках и количество из комментария
+(единица и число, см. tariffs.parse_quantity). Названия хранятся
+один раз в словаре кодов. Колонки копятся в array и становятся массивами
+NumPy без промежуточных объектов на каждую строку. Группировка,
+перцентили и выбросы считаются векторно по отсортированным колонкам.
+
+NumPy — необязательная зависимость: окно и CLI генерации без неё работают.
+
+Отчёт:
+    python analytics.py tickets.jsonl
+    python analytics.py dump.txt --split-orders --labels "Подача,Повышенный спрос"
+"""
+import argparse
+import sys
+from array import array
+
+from money import to_kopecks
+from tariffs import QUANTITY_UNITS, parse_quantity
+from utils import parse_price_lines
+
+PERCENTILES = (50, 90, 99)
+# Выброс — сумма за пределами [Q1 - k·IQR, Q3 + k·IQR] своего названия
+OUTLIER_IQR_K = 1.5
+
+
+def load_numpy():
+    """numpy для колоночных расчётов (аналитика, сверка тарифов, маршруты)."""
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("Для колоночных расчётов нужен пакет numpy: pip install numpy") from None
+    return numpy
+
+
+class PriceTable:
+    """Колонки строк стоимости: ticket, label (код), kopecks, quantity_unit (индекс
+    в QUANTITY_UNITS), quantity (NaN, если количества нет); labels — названия по кодам."""
+
+    def __init__(self, ticket, label, kopecks, labels: list, ticket_count: int, quantity_unit=None, quantity=None):
+        self.ticket = ticket
+        self.label = label
+        self.kopecks = kopecks
+        self.labels = labels
+        self.ticket_count = ticket_count
+        self.quantity_unit = quantity_unit
+        self.quantity = quantity
+
+    def __len__(self):
+        return len(self.kopecks)
+
+    @classmethod
+    def from_texts(cls, price_texts):
+        """Собирает таблицу из потока блоков стоимости (по одному на тикет)."""
+        np = load_numpy()
+        codes = {}
+        tickets = array("i")
+        labels = array("i")
+        kopecks = array("q")
+        units = array("b")
+        quantities = array("d")
+        unit_codes = {unit: code for code, unit in enumerate(QUANTITY_UNITS)}
+        count = 0
+        for count, text in enumerate(price_texts, 1):
+            for name, (amount, comment) in parse_price_lines(text).items():
+                code = codes.get(name)
+                if code is None:
+                    code = codes[name] = len(codes)
+                unit, value = parse_quantity(comment)
+                tickets.append(count - 1)
+                labels.append(code)
+                kopecks.append(to_kopecks(amount))
+                units.append(unit_codes[unit])
+                quantities.append(value if value is not None else float("nan"))
+        return cls(
+            np.frombuffer(tickets, dtype=f"i{tickets.itemsize}"),
+            np.frombuffer(labels, dtype=f"i{labels.itemsize}"),
+            np.frombuffer(kopecks, dtype="i8"),
+            list(codes),
+            count,
+            np.frombuffer(units, dtype="i1"),
+            np.frombuffer(quantities, dtype="f8"),
+        )
+
+    def codes_for(self, names) -> list:
+        """Коды названий; неизвестные названия пропускаются."""
+        index = {name: code for code, name in enumerate(self.labels)}
+        return [index[name] for name in names if name in index]
+
+
+def _sorted_groups(np, label, values, group_count: int):
+    """Значения, отсортированные по (код, значение), и начало и размер каждой группы."""
+    order = np.lexsort((values, label))
+    counts = np.bincount(label, minlength=group_count)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return values[order], order, starts, counts
+
+
+def _quantiles(np, sorted_values, starts, counts, qs):
+    """Квантили каждой группы (ближайший ранг); для пустых групп — NaN. Форма (групп, len(qs))."""
+    qs = np.asarray(qs, dtype=float) / 100
+    offsets = np.rint(qs[None, :] * np.maximum(counts - 1, 0)[:, None]).astype(np.int64)
+    index = np.minimum(starts[:, None] + offsets, max(len(sorted_values) - 1, 0))
+    result = sorted_values[index].astype(float) if len(sorted_values) else np.zeros(index.shape)
+    result[counts == 0] = np.nan
+    return result
+
+
+def group_stats(table: PriceTable, percentiles=PERCENTILES) -> dict:
+    """Статистика по названиям: число строк, доля тикетов, сумма, среднее и перцентили (в копейках)."""
+    np = load_numpy()
+    groups = len(table.labels)
+    sorted_values, _, starts, counts = _sorted_groups(np, table.label, table.kopecks, groups)
+    sums = np.bincount(table.label, weights=table.kopecks, minlength=groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    return {
+        "labels": table.labels,
+        "count": counts,
+        "ticket_share": counts / max(table.ticket_count, 1),
+        "sum": sums,
+        "mean": means,
+        "percentiles": _quantiles(np, sorted_values, starts, counts, percentiles),
+        "percentile_levels": tuple(percentiles),
+    }
+
+
+def outlier_mask(table: PriceTable, k: float = OUTLIER_IQR_K):
+    """Булева маска строк, чья сумма выбивается из межквартильного размаха своего названия."""
+    np = load_numpy()
+    groups = len(table.labels)
+    sorted_values, _, starts, counts = _sorted_groups(np, table.label, table.kopecks, groups)
+    q1, q3 = _quantiles(np, sorted_values, starts, counts, (25, 75)).T
+    spread = k * (q3 - q1)
+    low = (q1 - spread)[table.label]
+    high = (q3 + spread)[table.label]
+    return (table.kopecks < low) | (table.kopecks > high)
+
+
+def _rubles(kopecks) -> str:
+    return "—" if kopecks != kopecks else f"{kopecks / 100:,.2f}".replace(",", " ")
+
+
+def format_report(table: PriceTable, labels=None, top_outliers: int = 5) -> str:
+    np = load_numpy()
+    stats = group_stats(table)
+    mask = outlier_mask(table)
+    outliers_per_label = np.bincount(table.label[mask], minlength=len(table.labels))
+
+    codes = table.codes_for(labels) if labels else list(np.argsort(-stats["count"], kind="stable"))
+    levels = stats["percentile_levels"]
+    header = (f"{'название':<40} {'строк':>8} {'тикетов':>8} {'сумма ₽':>14} {'среднее':>10} "
+              + " ".join(f"{'p' + str(p):>10}" for p in levels) + f" {'выбросов':>9}")
+    rows = [f"Тикетов: {table.ticket_count}, строк стоимости: {len(table)}", header]
+    for code in codes:
+        rows.append(
+            f"{table.labels[code][:40]:<40} {stats['count'][code]:>8} {stats['ticket_share'][code]:>8.1%} "
+            f"{_rubles(stats['sum'][code]):>14} {_rubles(stats['mean'][code]):>10} "
+            + " ".join(f"{_rubles(v):>10}" for v in stats["percentiles"][code])
+            + f" {outliers_per_label[code]:>9}"
+        )
+
+    if top_outliers:
+        selected = np.isin(table.label, codes) & mask
+        rows_idx = np.flatnonzero(selected)
+        rows_idx = rows_idx[np.argsort(-table.kopecks[rows_idx], kind="stable")][:top_outliers]
+        if len(rows_idx):
+            rows.append("")
+            rows.append("Самые крупные выбросы (тикет, название, сумма ₽):")
+            for i in rows_idx:
+                rows.append(f"  #{table.ticket[i] + 1:<8} {table.labels[table.label[i]]:<40} "
+                            f"{_rubles(table.kopecks[i])}")
+    return "\n".join(rows)
+
+
+def price_texts(stream, fmt: str, split: bool):
+    from batch_cli import read_csv, read_jsonl
+    from ingest import BadRecord
+    from order_split import split_orders
+
+    if split:
+        records = split_orders(stream)
+    elif fmt == "csv":
+        records = read_csv(stream)
+    else:
+        records = read_jsonl(stream)
+    for record in records:
+        if isinstance(record, BadRecord):
+            continue
+        text = record.get("price_text")
+        if text:
+            yield text
+
+
+def main(argv=None):
+    from batch_cli import detect_format
+
+    parser = argparse.ArgumentParser(description="Отчёт по стоимостям из выгрузки тикетов")
+    parser.add_argument("input", help="файл JSONL/CSV с тикетами, текстовая выгрузка или '-' для stdin")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="формат входа (по умолчанию по расширению)")
+    parser.add_argument("--split-orders", action="store_true", help="вход — текст с несколькими заказами")
+    parser.add_argument("--labels", help="названия полей через запятую (по умолчанию все)")
+    parser.add_argument("--top-outliers", type=int, default=5, help="сколько крупных выбросов показать")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or detect_format(args.input)
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    try:
+        table = PriceTable.from_texts(price_texts(source, fmt, args.split_orders))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    labels = [name.strip() for name in args.labels.split(",")] if args.labels else None
+    print(format_report(table, labels, args.top_outliers))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
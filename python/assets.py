@@ -0,0 +1,249 @@
+# assets.py
+"""Пакет ресурсов: файлы папки gifs одним файлом с индексом.
+
+В сборке onefile каждый файл из gifs распаковывается и открывается
+отдельно. Пакет assets.pack — один файл: заголовок, индекс записей и
+данные. Индекс читается при первом обращении, сам файл отображается в
+память, и байты записи читаются только тогда, когда её показывают.
+
+Формат (все числа little-endian):
+    заголовок  — MAGIC, версия (u16), флаги (u16), число записей (u32), размер индекса (u32);
+    индекс     — для каждой записи: смещение (u64), размер (u64), CRC32 (u32),
+                 длина имени (u16) и имя в UTF-8 («gifs/ага.gif»);
+    данные     — записи подряд, каждая выровнена по ALIGNMENT байт.
+
+Сборка пакета (перед сборкой EXE; в spec добавить assets.pack вместо папки gifs):
+    python assets.py build gifs -o assets.pack
+    python assets.py list assets.pack
+
+Без пакета ресурсы читаются из отдельных файлов, как раньше (resource_path).
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+
+from utils import resource_path
+
+MAGIC = b"YHAP"
+VERSION = 1
+ALIGNMENT = 16
+PACK_NAME = "assets.pack"
+
+_HEADER = struct.Struct("<4sHHII")
+_ENTRY = struct.Struct("<QQIH")
+
+
+class AssetError(Exception):
+    pass
+
+
+class AssetPack:
+    """Записи пакета по именам; файл открывается и отображается при первом обращении."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self._map = None
+        self._index = None
+
+    def _load(self):
+        with self._lock:
+            if self._index is not None:
+                return
+            file = open(self.path, "rb")
+            try:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                file.close()
+                raise AssetError(f"Пустой пакет ресурсов: {self.path}") from None
+            try:
+                self._index = _read_index(data, self.path)
+            except AssetError:
+                data.close()
+                file.close()
+                raise
+            self._file = file
+            self._map = data
+
+    def names(self) -> list:
+        self._load()
+        return list(self._index)
+
+    def __contains__(self, name: str) -> bool:
+        self._load()
+        return name in self._index
+
+    def __len__(self):
+        self._load()
+        return len(self._index)
+
+    def read(self, name: str) -> memoryview:
+        """Байты записи без копирования — срез отображения файла."""
+        self._load()
+        try:
+            offset, size, _ = self._index[name]
+        except KeyError:
+            raise KeyError(f"Нет ресурса в пакете: {name}") from None
+        return memoryview(self._map)[offset:offset + size]
+
+    def verify(self) -> list:
+        """Имена записей, у которых не сходится CRC32."""
+        self._load()
+        return [name for name, (_, _, crc) in self._index.items() if zlib.crc32(self.read(name)) != crc]
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._file.close()
+            self._file = self._map = self._index = None
+
+
+def _read_index(data, path: str) -> dict:
+    """Индекс пакета; любой выход за границы файла или индекса — AssetError."""
+    if len(data) < _HEADER.size:
+        raise AssetError(f"Файл {path} — не пакет ресурсов")
+    magic, version, _, count, index_size = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise AssetError(f"Файл {path} — не пакет ресурсов")
+    if version != VERSION:
+        raise AssetError(f"Версия пакета {version} не поддерживается (нужна {VERSION})")
+    index = {}
+    pos = _HEADER.size
+    end = pos + index_size
+    if end > len(data):
+        raise AssetError(f"Пакет {path} обрезан: индекс выходит за конец файла")
+    for _ in range(count):
+        if pos + _ENTRY.size > end:
+            raise AssetError(f"Повреждён индекс пакета {path}")
+        offset, size, crc, name_size = _ENTRY.unpack_from(data, pos)
+        pos += _ENTRY.size
+        if pos + name_size > end or offset < end or offset + size > len(data):
+            raise AssetError(f"Повреждён индекс пакета {path}")
+        try:
+            name = bytes(data[pos:pos + name_size]).decode("utf-8")
+        except UnicodeDecodeError:
+            raise AssetError(f"Повреждён индекс пакета {path}: имя записи не UTF-8") from None
+        pos += name_size
+        index[name] = (offset, size, crc)
+    return index
+
+
+def build_pack(sources, output: str, root: str = ".") -> int:
+    """Собирает пакет из файлов и папок sources; имена — пути относительно root через «/»."""
+    files = []
+    for source in sources:
+        if os.path.isdir(source):
+            for folder, _, names in os.walk(source):
+                files.extend(os.path.join(folder, name) for name in names)
+        else:
+            files.append(source)
+    entries = sorted((os.path.relpath(path, root).replace(os.sep, "/"), path) for path in files)
+
+    index = bytearray()
+    layout = []
+    data_start = _HEADER.size + sum(_ENTRY.size + len(name.encode("utf-8")) for name, _ in entries)
+    offset = _align(data_start)
+    for name, path in entries:
+        size = os.path.getsize(path)
+        layout.append((name, path, offset, size))
+        offset = _align(offset + size)
+
+    with open(output + ".tmp", "wb") as out:
+        blobs = []
+        for name, path, offset, size in layout:
+            with open(path, "rb") as f:
+                blob = f.read()
+            if len(blob) != size:
+                raise AssetError(f"Файл {path} изменился во время сборки")
+            encoded = name.encode("utf-8")
+            index += _ENTRY.pack(offset, size, zlib.crc32(blob), len(encoded)) + encoded
+            blobs.append((offset, blob))
+        out.write(_HEADER.pack(MAGIC, VERSION, 0, len(layout), len(index)))
+        out.write(index)
+        for offset, blob in blobs:
+            out.write(b"\0" * (offset - out.tell()))
+            out.write(blob)
+    os.replace(output + ".tmp", output)
+    return len(layout)
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+_pack = None
+
+
+def get_pack():
+    """Пакет рядом с программой (resource_path), или None, если его нет."""
+    global _pack
+    if _pack is None:
+        path = os.environ.get("YH_ASSET_PACK") or resource_path(PACK_NAME)
+        _pack = AssetPack(path) if os.path.isfile(path) else False
+    return _pack or None
+
+
+def read_asset(name: str):
+    """Байты ресурса «gifs/…»: из пакета, если он есть, иначе из отдельного файла."""
+    pack = get_pack()
+    if pack is not None and name in pack:
+        return pack.read(name)
+    with open(resource_path(name), "rb") as f:
+        return f.read()
+
+
+def image_reader(name: str):
+    """QImageReader для ресурса; данные пакета отдаются Qt через QBuffer без временных файлов.
+
+    QByteArray.fromRawData не копирует байты, а ссылается на отображение
+    пакета, поэтому ридер держит срез (а с ним и отображение) живым.
+    """
+    from PyQt5 import QtCore, QtGui
+
+    pack = get_pack()
+    if pack is None or name not in pack:
+        return QtGui.QImageReader(resource_path(name))
+    view = pack.read(name)
+    buffer = QtCore.QBuffer()
+    buffer.setData(QtCore.QByteArray.fromRawData(view))
+    buffer.open(QtCore.QIODevice.ReadOnly)
+    reader = QtGui.QImageReader(buffer, os.path.splitext(name)[1].lstrip(".").encode("ascii"))
+    reader.buffer = buffer  # QImageReader не владеет устройством
+    reader.source = (pack, view)
+    return reader
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакет ресурсов: сборка и просмотр")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="собрать пакет из файлов и папок")
+    build.add_argument("sources", nargs="+", help="файлы и папки (например, gifs)")
+    build.add_argument("-o", "--output", default=PACK_NAME)
+    build.add_argument("--root", default=".", help="относительно какой папки строить имена")
+    listing = commands.add_parser("list", help="показать записи пакета и проверить CRC")
+    listing.add_argument("pack")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build_pack(args.sources, args.output, args.root)
+        print(f"{args.output}: {count} ресурсов, {os.path.getsize(args.output)} байт")
+        return 0
+
+    pack = AssetPack(args.pack)
+    for name in pack.names():
+        print(f"{len(pack.read(name)):>10}  {name}")
+    damaged = pack.verify()
+    for name in damaged:
+        print(f"CRC не сходится: {name}", file=sys.stderr)
+    pack.close()
+    return 1 if damaged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
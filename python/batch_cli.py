@@ -0,0 +1,251 @@
+# batch_cli.py
+"""Пакетная генерация ответов из выгрузки тикетов без PyQt.
+
+Каждая запись (строка JSONL или строка CSV) содержит название шаблона в поле
+``template`` и те же поля, что и окно: order_number, price_text, calc_text,
+done, total, payment1, payment2. Необязательное поле ``id`` переносится в ответ.
+
+С флагом --split-orders вход — текстовая выгрузка, где заказы идут подряд
+и каждый начинается со строки «Заказ № …» (см. order_split).
+
+Файлы JSONL и текстовые выгрузки читаются через mmap (см. ingest): процессы
+пула получают байтовые диапазоны файла и читают их сами.
+
+Пример:
+    python batch_cli.py tickets.jsonl -o answers.jsonl --workers 4
+    python batch_cli.py dump.txt --split-orders --template "Шаблон 1 (РВ)" -o answers.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from engine import generate, templates_of_kind
+from ingest import FORMAT_JSONL, FORMAT_ORDERS, RANGE_BYTES, BadRecord, byte_ranges, iter_records, parse_jsonl_line
+from order_split import split_orders
+from template_registry import get_registry, KIND_REGULAR
+
+OUTPUT_FIELDS = ["id", "template", "response", "error"]
+
+
+def read_jsonl(stream):
+    """Записи JSONL; строка, которая не разбирается в объект, отдаётся как BadRecord."""
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if line:
+            yield parse_jsonl_line(line, number)
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+class ExportError(Exception):
+    pass
+
+
+def read_export(stream, fmt: str, skipped: list = None):
+    """Записи выгрузки JSONL или CSV; разделитель CSV («,», «;», табуляция) определяется по заголовку.
+
+    Строки JSONL, которые не разбираются в объект, не отдаются, а попадают
+    в skipped как (номер строки, причина); без skipped — ExportError.
+    """
+    if fmt == "jsonl":
+        for record in read_jsonl(stream):
+            if isinstance(record, BadRecord):
+                if skipped is None:
+                    raise ExportError(f"строка {record.line}: {record.error}")
+                skipped.append(tuple(record))
+                continue
+            yield record
+        return
+    head = stream.readline()
+    # Разделитель — тот, которого в заголовке больше всего: названия колонок вроде
+    # «Расстояние, км» сбивают csv.Sniffer, когда выгрузка разделена «;»
+    delimiter = max(",;\t", key=head.count)
+    yield from csv.DictReader(_prepend(head, stream), delimiter=delimiter)
+
+
+def _prepend(first: str, stream):
+    yield first
+    yield from stream
+
+
+def find_column(record: dict, names, required=True):
+    """Ключ записи, совпадающий (без учёта регистра и пробелов по краям) с одним из names."""
+    keys = {str(key).strip().casefold(): key for key in record}
+    for name in names:
+        if name in keys:
+            return keys[name]
+    if required:
+        raise ExportError(f"В выгрузке нет колонки: {' / '.join(names)}")
+    return None
+
+
+def detect_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def chunked(iterable, size: int):
+    """Разбивает поток записей на списки по size штук, не читая вперёд."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def process_record(record: dict, default_template: str = None) -> dict:
+    """Ответ на одну запись; ошибка записи попадает в поле error, а не прерывает выгрузку."""
+    if isinstance(record, BadRecord):
+        return {"id": f"#{record.line}", "template": default_template, "response": "",
+                "error": f"строка {record.line}: {record.error}"}
+    if not isinstance(record, dict):
+        return {"id": "", "template": default_template, "response": "",
+                "error": f"запись не объект JSON, а {type(record).__name__}"}
+    template_name = record.get("template") or default_template
+    result = {"id": record.get("id", ""), "template": template_name, "response": "", "error": ""}
+    try:
+        if template_name not in get_registry():
+            raise ValueError(f"Неизвестный шаблон: {template_name}")
+        result["response"] = generate(template_name, record)
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def process_chunk(chunk, default_template=None):
+    return [process_record(record, default_template) for record in chunk]
+
+
+def run_pipeline(records, default_template=None, workers=1, chunk_size=256):
+    """Прогоняет поток записей через движок и отдаёт результаты в исходном порядке.
+
+    При workers > 1 чанки обрабатываются пулом процессов, но в работе
+    одновременно не больше workers * 2 чанков, поэтому память не растёт
+    вместе с размером входного файла.
+    """
+    chunks = chunked(records, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from process_chunk(chunk, default_template)
+        return
+
+    max_pending = workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(process_chunk, chunk, default_template))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def process_range(path: str, fmt: str, start: int, end: int, default_template=None):
+    return process_chunk(iter_records(path, fmt, start, end), default_template)
+
+
+def run_mapped(path: str, fmt: str, default_template=None, workers=1, range_bytes=RANGE_BYTES):
+    """Как run_pipeline, но для файла на диске: записи читаются через mmap (см. ingest).
+
+    Процессам пула передаются только границы диапазонов, каждый читает
+    свой кусок файла сам, а родитель не разбирает записи вовсе.
+    """
+    if workers <= 1:
+        for record in iter_records(path, fmt):
+            yield process_record(record, default_template)
+        return
+
+    max_pending = workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for start, end in byte_ranges(path, fmt, range_bytes):
+            pending.append(pool.submit(process_range, path, fmt, start, end, default_template))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def write_results(results, stream, fmt: str):
+    """Пишет результаты по мере готовности и возвращает их количество."""
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=OUTPUT_FIELDS)
+        writer.writeheader()
+        for result in results:
+            writer.writerow(result)
+            count += 1
+    else:
+        for result in results:
+            stream.write(json.dumps(result, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная генерация ответов клиентам")
+    parser.add_argument("input", help="файл JSONL/CSV с тикетами или '-' для stdin")
+    parser.add_argument("-o", "--output", default="-", help="файл результата или '-' для stdout")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="формат входа (по умолчанию по расширению)")
+    parser.add_argument("--output-format", choices=["jsonl", "csv"], help="формат результата (по умолчанию по расширению)")
+    parser.add_argument("--template", choices=get_registry().names(), help="шаблон для записей без поля template")
+    parser.add_argument("--workers", type=int, default=1, help="число процессов (по умолчанию 1)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="записей в одном задании пула")
+    parser.add_argument("--split-orders", action="store_true",
+                        help="вход — текст с несколькими заказами, разбить по строкам «Заказ № …»")
+    parser.add_argument("--range-mb", type=float, default=RANGE_BYTES / 2 ** 20,
+                        help="МБ входного файла в одном задании пула (для JSONL и --split-orders)")
+    args = parser.parse_args(argv)
+
+    in_format = args.format or detect_format(args.input)
+    out_format = args.output_format or detect_format(args.output)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+
+    template = args.template
+    if args.split_orders:
+        template = template or templates_of_kind(KIND_REGULAR)[0]
+    # Файл на диске читается через mmap; stdin и CSV — потоком строк
+    mapped_format = None
+    if args.input != "-":
+        mapped_format = FORMAT_ORDERS if args.split_orders else (FORMAT_JSONL if in_format == "jsonl" else None)
+
+    source = None
+    if mapped_format is None:
+        source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        if mapped_format is not None:
+            range_bytes = max(int(args.range_mb * 2 ** 20), 1)
+            results = run_mapped(args.input, mapped_format, template, workers, range_bytes)
+        else:
+            if args.split_orders:
+                records = split_orders(source)
+            elif in_format == "csv":
+                records = read_csv(source)
+            else:
+                records = read_jsonl(source)
+            results = run_pipeline(records, template, workers, args.chunk_size)
+        started = time.perf_counter()
+        count = write_results(results, target, out_format)
+        elapsed = time.perf_counter() - started
+    finally:
+        if source is not None and source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"Обработано тикетов: {count} за {elapsed:.2f} с ({rate:.0f} тикетов/с)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+# batch_export.py
+"""Ответы «Отмена батча» по выгрузке мультизаказов, без ручного ввода.
+
+Выгрузка — CSV или JSONL, строка на вручение. Колонки ищутся по названиям
+без учёта регистра (см. BATCH_COLUMNS, STATUS_COLUMNS, DISTANCE_COLUMNS,
+DURATION_COLUMNS): номер мультизаказа, статус вручения, расстояние (км) и
+время плеча. Время — минуты числом, «ЧЧ:ММ[:СС]» или «1 ч 5 мин 10 сек».
+
+За один проход по выгрузке для каждого мультизаказа считаются:
+    total_count — все вручения;
+    done_count  — вручения со статусом из DONE_STATUSES;
+    distance, time — суммы по выполненным вручениям: отменённые в расчёт
+                     стоимости не входят, как и сказано в ответе.
+Расстояние копится в сотых долях километра, время — в секундах, так что
+порядок строк не влияет на результат.
+
+Пример:
+    python batch_export.py deliveries.csv -o answers.jsonl
+"""
+import argparse
+import re
+import sys
+import time
+
+from batch_cli import ExportError, detect_format, find_column, read_export, write_results
+from engine import format_duration, render_batch_cancel_values, templates_of_kind
+from template_registry import get_registry, KIND_BATCH_CANCEL
+
+BATCH_COLUMNS = ("batch", "batch_id", "мультизаказ", "батч", "номер мультизаказа")
+STATUS_COLUMNS = ("status", "статус")
+DISTANCE_COLUMNS = ("distance", "distance_km", "расстояние", "расстояние, км")
+DURATION_COLUMNS = ("duration", "time", "время", "время, мин")
+
+DONE_STATUSES = frozenset({"delivered", "done", "completed", "вручено", "доставлено", "выполнено"})
+
+_CLOCK_RE = re.compile(r"(\d+):(\d{1,2})(?::(\d{1,2}))?$")
+_UNITS_RE = re.compile(r"(\d+)\s*(ч|мин|сек)")
+_UNIT_SECONDS = {"ч": 3600, "мин": 60, "сек": 1}
+
+
+def parse_distance(text: str) -> int:
+    """«12.05», «12,05 км.» → сотые доли километра."""
+    digits = text.replace("км", "").replace(",", ".").strip(" .")
+    whole, _, fraction = digits.partition(".")
+    if not (whole + fraction).isdigit():
+        raise ValueError(f"Не удалось разобрать расстояние: {text!r}")
+    return int(whole or "0") * 100 + int(fraction[:2].ljust(2, "0"))
+
+
+def parse_duration(text: str) -> int:
+    """«35», «0:35:10», «1 ч 5 мин 10 сек» → секунды."""
+    text = text.strip()
+    if text.isdigit():
+        return int(text) * 60
+    m = _CLOCK_RE.match(text)
+    if m:
+        return int(m.group(1)) * 3600 + int(m.group(2)) * 60 + int(m.group(3) or 0)
+    units = _UNITS_RE.findall(text)
+    if not units:
+        raise ValueError(f"Не удалось разобрать время: {text!r}")
+    return sum(int(value) * _UNIT_SECONDS[unit] for value, unit in units)
+
+
+def format_distance(centi_km: int) -> str:
+    return f"{centi_km // 100}.{centi_km % 100:02d} км"
+
+
+def aggregate_batches(records, skipped: list = None) -> dict:
+    """Один проход по вручениям: {мультизаказ: [выполнено, всего, сотые км, секунды]}.
+
+    Словарь хранит мультизаказы в порядке первого появления. Вручение с
+    неразборчивыми расстоянием или временем считается, но его плечо в
+    сумму не входит, а строка попадает в skipped.
+    """
+    batches = {}
+    columns = None
+    for line, record in enumerate(records, 1):
+        if columns is None:
+            columns = (
+                find_column(record, BATCH_COLUMNS),
+                find_column(record, STATUS_COLUMNS),
+                find_column(record, DISTANCE_COLUMNS),
+                find_column(record, DURATION_COLUMNS),
+            )
+        batch_key, status_key, distance_key, duration_key = columns
+        batch = str(record.get(batch_key) or "").strip()
+        if not batch:
+            continue
+        totals = batches.get(batch)
+        if totals is None:
+            totals = batches[batch] = [0, 0, 0, 0]
+        totals[1] += 1
+        if str(record.get(status_key) or "").strip().casefold() not in DONE_STATUSES:
+            continue
+        totals[0] += 1
+        try:
+            distance = parse_distance(str(record.get(distance_key) or ""))
+            duration = parse_duration(str(record.get(duration_key) or ""))
+        except ValueError as e:
+            if skipped is not None:
+                skipped.append((line, str(e)))
+            continue
+        totals[2] += distance
+        totals[3] += duration
+    return batches
+
+
+def render_batches(batches: dict, template_name: str = None):
+    """Готовые ответы в формате результатов batch_cli: id, template, response, error."""
+    template_name = template_name or templates_of_kind(KIND_BATCH_CANCEL)[0]
+    template = get_registry().get(template_name)
+    for batch, (done, total, distance, duration) in batches.items():
+        result = {"id": batch, "template": template_name, "response": "", "error": ""}
+        try:
+            result["response"] = render_batch_cancel_values(
+                template, format_distance(distance), format_duration(duration), done, total
+            )
+        except Exception as e:
+            result["error"] = str(e)
+        yield result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ответы «Отмена батча» по выгрузке мультизаказов")
+    parser.add_argument("input", help="выгрузка CSV/JSONL или '-' для stdin")
+    parser.add_argument("-o", "--output", default="-", help="файл результата или '-' для stdout")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="формат выгрузки (по умолчанию по расширению)")
+    parser.add_argument("--output-format", choices=["jsonl", "csv"], help="формат результата (по умолчанию по расширению)")
+    parser.add_argument("--template", choices=templates_of_kind(KIND_BATCH_CANCEL), help="шаблон ответа")
+    parser.add_argument("--only-cancelled", action="store_true", help="только мультизаказы с отменёнными вручениями")
+    args = parser.parse_args(argv)
+
+    in_format = args.format or detect_format(args.input)
+    out_format = args.output_format or detect_format(args.output)
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8-sig", newline="")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    skipped = []
+    try:
+        started = time.perf_counter()
+        batches = aggregate_batches(read_export(source, in_format, skipped), skipped)
+        if args.only_cancelled:
+            batches = {batch: totals for batch, totals in batches.items() if totals[0] < totals[1]}
+        count = write_results(render_batches(batches, args.template), target, out_format)
+        elapsed = time.perf_counter() - started
+    except ExportError as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    print(f"Мультизаказов: {count} за {elapsed:.2f} с", file=sys.stderr)
+    for line, error in skipped[:10]:
+        print(f"  запись {line} пропущена: {error}", file=sys.stderr)
+    if len(skipped) > 10:
+        print(f"  ... и ещё {len(skipped) - 10} записей", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
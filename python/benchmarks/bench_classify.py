@@ -0,0 +1,81 @@
+# bench_classify.py
+"""Замер classifier.classify на вставках разного размера.
+
+Классификатор просматривает текст целиком, поэтому время растёт с размером
+вставки. Случаи с суффиксом _tail кладут решающий признак в самый конец
+длинного текста: заголовок расчёта после тысяч строк стоимости, строку с
+суммой после блоков оплаты частями.
+
+Запуск из папки python:  python benchmarks/bench_classify.py
+Код выхода 1, если:
+    хоть один случай определён не тем шаблоном;
+    одиночная вставка (1 копия блока) не укладывается в 1 мс;
+    время на символ при 100 000 копий больше, чем в SCALE_LIMIT раз,
+    превышает время на символ при 1000 копий (рост хуже линейного).
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classifier import classify  # noqa: E402
+from template_registry import KIND_REGULAR, KIND_BATCH_CANCEL, KIND_SPLIT_PAYMENT  # noqa: E402
+
+BUDGET_MS = 1.0
+SCALE_LIMIT = 3.0
+REPEAT = 200
+SIZES = (1, 1000, 100000)
+
+PRICE_BLOCK = "Подача\n100 ₽ (за 5 мин.)\nВремя в пути\n200 ₽ (за 15 мин.)\nОжидание 50 ₽\nКузов\n30 ₽\n"
+BATCH_BLOCK = "Расчётное расстояние\n14.99 км.\nРасчётное время\n43 мин. 4 сек.\n"
+PAYMENT_BLOCK = "26.09.2025, 21:19:41\n148 ₽\n\n26.09.2025, 21:34:33\n209 ₽\n"
+UNKNOWN_BLOCK = "Клиент спрашивает про заказ\n"
+
+# название: (повторяемый блок, хвост после повторов, ожидаемый шаблон)
+CASES = {
+    "regular": (PRICE_BLOCK, "", KIND_REGULAR),
+    "batch_cancel": (BATCH_BLOCK + PRICE_BLOCK, "", KIND_BATCH_CANCEL),
+    "split_payment": (PAYMENT_BLOCK, "", KIND_SPLIT_PAYMENT),
+    "unknown": (UNKNOWN_BLOCK, "", None),
+    "batch_tail": (PRICE_BLOCK, BATCH_BLOCK, KIND_BATCH_CANCEL),
+    "regular_tail": (PAYMENT_BLOCK, PRICE_BLOCK, KIND_REGULAR),
+    "split_tail": (UNKNOWN_BLOCK, PAYMENT_BLOCK, KIND_SPLIT_PAYMENT),
+}
+
+
+def median_ms(text: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        classify(text)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    failed = False
+    for name, (block, tail, expected) in CASES.items():
+        per_char = {}
+        for copies in SIZES:
+            text = block * copies + tail
+            kind = classify(text).kind
+            # Большие вставки дорогие: хватает нескольких повторов
+            ms = median_ms(text, REPEAT if copies < SIZES[-1] else 5)
+            per_char[copies] = ms / len(text)
+            status = "ok"
+            if kind != expected:
+                status = f"ШАБЛОН {kind}, ждали {expected}"
+            elif copies == 1 and ms >= BUDGET_MS:
+                status = "МЕДЛЕННО"
+            elif copies == SIZES[-1] and per_char[copies] > per_char[SIZES[1]] * SCALE_LIMIT:
+                status = "РОСТ ХУЖЕ ЛИНЕЙНОГО"
+            failed |= status != "ok"
+            print(f"{name:<14} {len(text):>10} симв.  {ms * 1000:10.1f} мкс  "
+                  f"{per_char[copies] * 1e6:7.1f} нс/симв.  {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# bench_routes.py
+"""Замер routes.route_summary на синтетических мультизаказах.
+
+Запуск из папки python:  python benchmarks/bench_routes.py [--legs 100000]
+Точки разбросаны вокруг Москвы, в мультизаказе от 2 до 12 вручений, каждое
+пятое отменено. Для сравнения меряется тот же расчёт циклом Python по плечам.
+Код выхода 1, если векторный расчёт расходится с циклом или быстрее него
+меньше чем в MIN_SPEEDUP раз. Абсолютное время зависит от машины и только
+печатается; отношение к циклу Python в том же процессе от неё почти не зависит.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import load_numpy  # noqa: E402
+from corpus import DEFAULT_SEED  # noqa: E402
+from routes import EARTH_RADIUS_KM, RouteTable, route_summary  # noqa: E402
+
+MIN_SPEEDUP = 10.0
+REPEAT = 20
+
+
+def make_routes(legs: int, seed: int = DEFAULT_SEED) -> RouteTable:
+    np = load_numpy()
+    rng = random.Random(seed)
+    batch, lat, lon, cancelled = [], [], [], []
+    code = 0
+    while len(batch) - code < legs:
+        base_lat, base_lon = 55.75 + rng.uniform(-0.2, 0.2), 37.62 + rng.uniform(-0.3, 0.3)
+        for stop in range(rng.randint(3, 13)):
+            batch.append(code)
+            lat.append(base_lat + rng.uniform(-0.05, 0.05))
+            lon.append(base_lon + rng.uniform(-0.08, 0.08))
+            cancelled.append(stop > 0 and rng.random() < 0.2)
+        code += 1
+    return RouteTable.from_arrays(np.array(batch, dtype=np.int32), lat, lon, cancelled,
+                                  [f"B{i}" for i in range(code)])
+
+
+def python_summary(table: RouteTable) -> list:
+    """Тот же расчёт расстояний без numpy, для сравнения скорости и результата."""
+    batch, lat, lon, cancelled = (column.tolist() for column in (table.batch, table.lat, table.lon, table.cancelled))
+    full = [0.0] * len(table.batches)
+    completed = [0.0] * len(table.batches)
+    last_kept = None
+    for i in range(len(batch)):
+        if i and batch[i] == batch[i - 1]:
+            full[batch[i]] += _haversine(lat[i - 1], lon[i - 1], lat[i], lon[i])
+        else:
+            last_kept = None
+        if cancelled[i]:
+            continue
+        if last_kept is not None:
+            completed[batch[i]] += _haversine(lat[last_kept], lon[last_kept], lat[i], lon[i])
+        last_kept = i
+    return full, completed
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def median_ms(func, *args) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замер векторного расчёта маршрутов")
+    parser.add_argument("--legs", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    np = load_numpy()
+    table = make_routes(args.legs)
+    summary = route_summary(table, road_factor=1.0)
+    full, completed = python_summary(table)
+    if not (np.allclose(summary["full_km"], full) and np.allclose(summary["completed_km"], completed)):
+        print("Векторный расчёт расходится с циклом Python")
+        return 1
+
+    vector_ms = median_ms(route_summary, table)
+    python_ms = median_ms(python_summary, table)
+    speedup = python_ms / vector_ms
+    status = "ok" if speedup >= MIN_SPEEDUP else "МЕДЛЕННО"
+    print(f"мультизаказов {len(table.batches)}, плеч {summary['legs']}, точек {len(table)}")
+    print(f"numpy   {vector_ms:8.2f} мс  ({summary['legs'] / vector_ms * 1000:,.0f} плеч/с)")
+    print(f"python  {python_ms:8.2f} мс  (в {speedup:.0f} раз медленнее, порог {MIN_SPEEDUP:.0f})  {status}")
+    return 0 if speedup >= MIN_SPEEDUP else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# corpus.py
+"""Генератор синтетических тикетов, похожих на вставки из админки.
+
+Корпус детерминирован: одно и то же зерно даёт те же тикеты. Блоки
+стоимости по очереди покрывают все поля ORDERED_FIELDS, EXTRA_FIELDS и
+ADDITIONAL_SERVICES_MAP в обеих раскладках — «название / сумма» в двух
+строках и «название сумма» в одной.
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import ORDERED_FIELDS, EXTRA_FIELDS, ADDITIONAL_SERVICES_MAP  # noqa: E402
+from engine import templates_of_kind  # noqa: E402
+from template_registry import KIND_REGULAR, KIND_BATCH_CANCEL, KIND_SPLIT_PAYMENT  # noqa: E402
+
+DEFAULT_SEED = 20250926
+
+PRICE_LABELS = [key for key, _ in ORDERED_FIELDS] + EXTRA_FIELDS + list(ADDITIONAL_SERVICES_MAP)
+
+COMMENTS = [
+    "", "", "за 5 мин.", "за 12 мин.", "за 1 ч. 5 мин.", "за 14.99 км.", "за 3 км.",
+    "x1.4", "за 2 шт.", "за 30 сек.",
+]
+
+# Доли типов шаблонов в корпусе
+KIND_WEIGHTS = [(KIND_REGULAR, 70), (KIND_BATCH_CANCEL, 15), (KIND_SPLIT_PAYMENT, 15)]
+
+
+def _amount(rng) -> str:
+    if rng.random() < 0.2:
+        return f"{rng.randint(0, 999)}.{rng.randint(0, 99):02d} ₽"
+    return f"{rng.randint(0, 2500)} ₽"
+
+
+def price_block(rng, index: int) -> str:
+    # Поле index по кругу гарантирует, что корпус покрывает все названия
+    labels = {PRICE_LABELS[index % len(PRICE_LABELS)]}
+    labels.update(rng.sample(PRICE_LABELS, rng.randint(2, 8)))
+    lines = []
+    for label in rng.sample(sorted(labels), len(labels)):
+        comment = rng.choice(COMMENTS)
+        amount = _amount(rng) + (f" ({comment})" if comment else "")
+        if rng.random() < 0.7:
+            lines.append(label)
+            lines.append(amount)
+        else:
+            lines.append(f"{label} {amount}")
+    return "\n".join(lines)
+
+
+def duration_text(rng) -> str:
+    hours = rng.choice([0, 0, 0, 1, 2])
+    minutes = rng.randint(0, 59)
+    seconds = rng.randint(0, 59)
+    return (f"{hours} ч. " if hours else "") + f"{minutes} мин. {seconds} сек."
+
+
+def batch_block(rng) -> str:
+    distance = f"{rng.randint(1, 80)}.{rng.randint(0, 99):02d} км."
+    duration = duration_text(rng)
+    if rng.random() < 0.5:
+        return f"Расчётное расстояние\n{distance}\nРасчётное время\n{duration}"
+    return f"Расчетное расстояние: {distance}\nРасчетное время - {duration}"
+
+
+def payment_block(rng) -> str:
+    return (f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.2025, "
+            f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}\n"
+            f"{rng.randint(1, 3000)} ₽")
+
+
+def make_tickets(count: int, seed: int = DEFAULT_SEED, kind: str = None) -> list:
+    """count тикетов в формате batch_cli: template и поля окна.
+
+    Без kind типы смешаны в долях KIND_WEIGHTS, с kind — все тикеты этого типа.
+    """
+    rng = random.Random(seed)
+    names = {name: templates_of_kind(name) for name, _ in KIND_WEIGHTS}
+    kinds = [name for name, _ in KIND_WEIGHTS]
+    weights = [weight for _, weight in KIND_WEIGHTS]
+
+    tickets = []
+    for index in range(count):
+        ticket_kind = kind or rng.choices(kinds, weights)[0]
+        ticket = {"id": str(index), "template": rng.choice(names[ticket_kind]), "kind": ticket_kind}
+        if ticket_kind == KIND_BATCH_CANCEL:
+            total = rng.randint(2, 12)
+            ticket.update(calc_text=batch_block(rng), done=str(rng.randint(0, total)), total=str(total))
+        elif ticket_kind == KIND_SPLIT_PAYMENT:
+            ticket.update(payment1=payment_block(rng), payment2=payment_block(rng))
+        else:
+            ticket.update(order_number=str(rng.randint(10 ** 8, 10 ** 9)), price_text=price_block(rng, index))
+        tickets.append(ticket)
+    return tickets
@@ -0,0 +1,433 @@
+# fuzz.py
+"""Дифференциальная проверка быстрых разборщиков против эталона.
+
+Эталон — reference.py, код разбора в том виде, в каком он был до
+оптимизаций. Каждая быстрая реализация (кандидат) обязана на любом входе
+давать тот же результат, что и эталон: то же значение (у словарей — те же
+пары в том же порядке) или исключение того же типа.
+
+Входы берутся из трёх источников:
+    корпус    — синтетические тикеты corpus.make_tickets, как в run.py;
+    файлы     — тикеты или результаты batch_cli (JSONL) из --corpus:
+                price_text и calc_text, какие есть;
+    генератор — случайные неудобные входы с зерном: комментарии без скобок
+                и без закрывающей скобки, сокращения единиц с точкой и без,
+                склеенные с соседними словами, суммы с запятой, пробелами
+                между разрядами и без «₽», разные разрывы строк (\\r\\n, \\r,
+                \\x0c, U+2028), неразрывные и «широкие» пробелы, табуляция;
+                блоки «Отмены батча» с заголовком без значения или с одним
+                разделителем после него («Расчетное время - »).
+
+Итог обычного шаблона сверяется целым ответом (regular_total): эталон —
+ответ с заглушкой вместо итога, итог reference.sum_ruble_digits по готовому
+тексту, как было в окне; кандидат — render_regular_records с итогом в
+копейках. Намеренные расхождения перечислены в KNOWN_DIFFERENCES и
+считаются отдельно: float-сумма эталона теряет младшие разряды длинных сумм
+(«12345678901234567890 ₽»), а копейки дают точную сумму.
+
+Расхождение сокращается (строки, затем куски символов), пока оно
+воспроизводится, и печатается с результатами обеих сторон. Для каждого
+кандидата печатается и соотношение скорости с эталоном на тех же входах.
+
+Запуск из папки python:
+    python benchmarks/fuzz.py
+    python benchmarks/fuzz.py --cases 50000 --seed 7 --only parse_price_lines
+    python benchmarks/fuzz.py --candidate parse_price_lines=my_parser:parse --corpus results.jsonl
+
+Код выхода 1, если есть хотя бы одно расхождение.
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import re
+import sys
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reference  # noqa: E402
+from corpus import DEFAULT_SEED, PRICE_LABELS, make_tickets  # noqa: E402
+from engine import build_body, parse_time_to_minutes, render_regular_records, templates_of_kind  # noqa: E402
+from incremental import IncrementalPriceParser  # noqa: E402
+from lexer import iter_price_pairs, route_values  # noqa: E402
+from template_registry import get_registry, KIND_REGULAR  # noqa: E402
+from utils import normalize_comment, parse_price_lines, parse_price_records  # noqa: E402
+
+DEFAULT_CASES = 5000
+DEFAULT_TICKETS = 2000
+# Сколько сокращённых примеров расхождений печатать на кандидата
+DEFAULT_SHOW = 3
+# Ограничение числа проверок при сокращении одного примера
+SHRINK_STEPS = 2000
+TIMING_REPEAT = 3
+
+UNITS = ["ч", "мин", "км", "кг", "м", "млн", "млрд", "трлн", "сек", "шт", "мм", "Мин", "КМ", "чч"]
+SPACES = [" ", " ", " ", "  ", "\t", "\xa0", "\u2009", "\u202f", "\u3000", ""]
+BREAKS = ["\n", "\n", "\n", "\r\n", "\r", "\x0b", "\x0c", "\x1c", "\x85", "\u2028", "\u2029", "\n\n", "\n \n"]
+WORDS = ["за", "x1.4", "т.е.", "ок", "Расчётное время", "Подача:", "1 ч. 5", "(", ")", "₽", "—", "примкм.", "3.мин."]
+
+
+def _space(rng) -> str:
+    return rng.choice(SPACES)
+
+
+def _number(rng) -> str:
+    kind = rng.randrange(9)
+    if kind == 0:
+        return f"{rng.randint(0, 999)}.{rng.randint(0, 99)}"
+    if kind == 1:
+        return f"{rng.randint(0, 999)},{rng.randint(0, 99):02d}"
+    if kind == 2:
+        return rng.choice([" ", "\xa0", "\u2009"]).join((str(rng.randint(1, 99)), f"{rng.randint(0, 999):03d}"))
+    if kind == 3:
+        return f"{rng.randint(0, 99)}."
+    if kind == 4:
+        return rng.choice(["0", "007", "1.2.3", ".5", "+5", "-5", "\u0663", "12345678901234567890", "99.999", "0.495"])
+    return str(rng.randint(0, 2500))
+
+
+def _unit(rng) -> str:
+    unit = rng.choice(UNITS)
+    return unit + rng.choice([".", ".", "", "..", ".)", "ов"])
+
+
+def comment_text(rng) -> str:
+    """Комментарий к сумме: «за 1 ч. 5 мин.» и его порченые варианты."""
+    parts = []
+    for _ in range(rng.randint(0, 4)):
+        choice = rng.randrange(4)
+        if choice == 0:
+            parts.append(f"{_number(rng)}{_space(rng)}{_unit(rng)}")
+        elif choice == 1:
+            parts.append(_unit(rng))
+        else:
+            parts.append(rng.choice(WORDS))
+    return _space(rng).join(parts) + rng.choice(["", "", " ", "\t", "\xa0"])
+
+
+def amount_text(rng) -> str:
+    digits = _number(rng) if rng.random() < 0.95 else ""
+    sign = rng.choice(["₽", "₽", "₽", "₽", "", "₽₽", "руб", "₽."])
+    amount = rng.choice(["", "", " ", "  ", "\xa0", "\t"]) + digits + rng.choice(["", " ", " ", "\xa0", "\t"]) + sign
+    choice = rng.randrange(6)
+    if choice == 0:
+        return amount
+    if choice == 1:
+        return f"{amount}{_space(rng)}({comment_text(rng)}"  # без закрывающей скобки
+    if choice == 2:
+        return f"{amount}{_space(rng)}{comment_text(rng)}"  # комментарий без скобок
+    if choice == 3:
+        return f"{amount}{_space(rng)}(({comment_text(rng)}) {comment_text(rng)})"
+    return f"{amount}{_space(rng)}({comment_text(rng)})"
+
+
+def label_text(rng) -> str:
+    choice = rng.randrange(8)
+    if choice < 4:
+        return rng.choice(PRICE_LABELS)
+    if choice == 4:
+        return f"{rng.choice(PRICE_LABELS)}:"
+    if choice == 5:
+        return f"{rng.choice(PRICE_LABELS)} {amount_text(rng)}"  # название уже с суммой
+    if choice == 6:
+        return rng.choice(["Расчётное время", "Расчетное расстояние: 5 км.", "26.09.2025, 21:19:41", "(", "₽"])
+    return comment_text(rng)
+
+
+def price_text(rng) -> str:
+    """Блок стоимости в обеих раскладках, с мусорными и пустыми строками."""
+    lines = []
+    for _ in range(rng.randint(0, 10)):
+        choice = rng.randrange(10)
+        if choice < 4:
+            lines += [label_text(rng), amount_text(rng)]
+        elif choice < 7:
+            lines.append(f"{label_text(rng)}{rng.choice(SPACES[:-1])}{amount_text(rng)}")
+        elif choice == 7:
+            lines.append(amount_text(rng))
+        elif choice == 8:
+            lines.append(label_text(rng))
+        else:
+            lines.append(rng.choice(["", " ", "\t", "\xa0"]))
+    text = ""
+    for line in lines:
+        text += rng.choice(["", "", " ", "\t", "\xa0"]) + line + rng.choice(["", "", " ", "\t"]) + rng.choice(BREAKS)
+    return text if rng.random() < 0.5 else text.rstrip("\n")
+
+
+def duration_input(rng) -> str:
+    """Значение «Расчётного времени» и его порченые варианты."""
+    parts = []
+    for _ in range(rng.randint(0, 4)):
+        choice = rng.randrange(5)
+        if choice < 3:
+            parts.append(f"{_number(rng)}{_space(rng)}{rng.choice(['ч', 'мин', 'сек', 'часа', 'минут', 'Мин'])}"
+                         f"{rng.choice(['.', '', '', '..'])}")
+        else:
+            parts.append(rng.choice(WORDS))
+    return rng.choice(["", "", " ", "- ", ": "]) + _space(rng).join(parts) + rng.choice(["", " ", "\t"])
+
+
+def calc_text(rng) -> str:
+    """Блок «Отмена батча»: заголовки с разделителями в той же или следующей строке и без значений."""
+    lines = []
+    for _ in range(rng.randint(0, 6)):
+        choice = rng.randrange(6)
+        if choice < 2:
+            header = rng.choice(["Расчётное расстояние", "Расчетное расстояние", "расчетное РАССТОЯНИЕ"])
+            value = rng.choice([f"{_number(rng)}{_space(rng)}{rng.choice(['км', 'м', 'км.', 'метров', 'КМ'])}",
+                                "", "—", comment_text(rng)])
+        elif choice < 4:
+            header = rng.choice(["Расчётное время", "Расчетное время", "РАСЧЁТНОЕ время"])
+            value = rng.choice([duration_input(rng), "", "", "—"])
+        else:
+            lines.append(rng.choice([label_text(rng), "", " ", "\t"]))
+            continue
+        separator = rng.choice(["", ":", "-", " - ", ": ", " :", "–", "—", ":-", "\n:", "\n- ", "\n", "\n\n"])
+        gap = rng.choice(["", " ", "  ", "\t"])
+        lines.append(f"{header}{separator}{gap}{value}" + rng.choice(["", " ", "\t"]))
+    return "".join(line + rng.choice(BREAKS) for line in lines)
+
+
+def _route_values(text: str) -> tuple:
+    # Не найденное время engine подставляет как «», эталон — тоже
+    distance, duration = route_values(text)
+    return distance, duration or ""
+
+
+def _price_records_pairs(text: str) -> dict:
+    return {field: (line.amount, line.comment) for field, line in parse_price_records(text).items()}
+
+
+def _incremental_pairs(text: str) -> dict:
+    # Окно передаёт парсеру строки документа Qt, разрывы в нём всегда «\n»
+    parser = IncrementalPriceParser("\n".join(text.splitlines()))
+    return {field: (line.amount, line.comment) for field, line in parser.records().items()}
+
+
+_REGULAR_TEMPLATE = get_registry().get(templates_of_kind(KIND_REGULAR)[0])
+_RUBLES_RE = re.compile(r"\u2014 .*?: (\d[\d\s\.]*)\s*₽")
+
+
+def _regular_draft(text: str) -> str:
+    # Как generate_result до оптимизаций: ответ с заглушкой вместо итога
+    body_lines, _ = build_body(parse_price_records(text))
+    return _REGULAR_TEMPLATE.render({"order_number": "1", "body": "\n".join(body_lines), "total": "TEMP_TOTAL"})
+
+
+def reference_regular(text: str) -> str:
+    """Ответ обычного шаблона с итогом reference.sum_ruble_digits по готовому тексту."""
+    draft = _regular_draft(text)
+    return draft.replace("TEMP_TOTAL", reference.sum_ruble_digits(draft))
+
+
+def _regular(text: str) -> str:
+    return render_regular_records(_REGULAR_TEMPLATE, "1", parse_price_records(text))
+
+
+def _exact_total(value, want, got) -> bool:
+    """Итог в копейках совпадает с точной десятичной суммой, а float-сумма эталона — нет.
+
+    Так расходятся, например, 20-значные суммы: float теряет младшие разряды.
+    """
+    draft = _regular_draft(value)
+    amounts = (Decimal(d.replace(" ", "").replace(",", ".")) for d in _RUBLES_RE.findall(draft))
+    exact = sum(amounts, Decimal(0)).quantize(Decimal("1"), rounding=ROUND_HALF_UP)
+    return got == ("ok", draft.replace("TEMP_TOTAL", f"{exact} ₽"))
+
+
+# Название -> (эталон, генератор входов, {кандидат: функция})
+TARGETS = {
+    "parse_price_lines": (reference.parse_price_lines, price_text, {
+        "utils.parse_price_lines": parse_price_lines,
+        "utils.parse_price_records": _price_records_pairs,
+        "incremental.IncrementalPriceParser": _incremental_pairs,
+    }),
+    "normalize_comment": (reference.normalize_comment, comment_text, {
+        "utils.normalize_comment": normalize_comment,
+    }),
+    "parse_time_to_minutes": (reference.parse_time_to_minutes, duration_input, {
+        "engine.parse_time_to_minutes": parse_time_to_minutes,
+    }),
+    "route_values": (reference.route_values, calc_text, {
+        "lexer.route_values": _route_values,
+    }),
+    "regular_total": (reference_regular, price_text, {
+        "engine.render_regular_records": _regular,
+    }),
+}
+
+# Намеренные расхождения с эталоном: название -> проверка (вход, эталон, кандидат);
+# такие входы считаются отдельно и не дают кода выхода 1
+KNOWN_DIFFERENCES = {
+    "regular_total": _exact_total,
+}
+
+
+def corpus_inputs(tickets) -> dict:
+    """Входы каждой проверяемой функции из тикетов или результатов batch_cli."""
+    inputs = {name: [] for name in TARGETS}
+    for ticket in tickets:
+        price = ticket.get("price_text")
+        if price:
+            inputs["parse_price_lines"].append(price)
+            inputs["regular_total"].append(price)
+            inputs["normalize_comment"].extend(comment for _, _, comment in iter_price_pairs(price))
+        calc = ticket.get("calc_text")
+        if calc:
+            inputs["parse_time_to_minutes"].extend(line.split("-")[-1] for line in calc.splitlines())
+            inputs["route_values"].append(calc)
+    return inputs
+
+
+def read_corpus(path: str) -> list:
+    with open(path, encoding="utf-8-sig") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_candidate(spec: str):
+    """«модуль:функция» → функция; модуль ищется от папки python."""
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"Кандидат задаётся как модуль:функция, получено {spec!r}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def outcome(func, value):
+    """Результат вызова в сравнимом виде; словари — списком пар, чтобы учесть порядок."""
+    try:
+        result = func(value)
+    except Exception as e:
+        return ("raise", type(e).__name__)
+    if isinstance(result, dict):
+        return ("ok", list(result.items()))
+    return ("ok", result)
+
+
+def shrink(value: str, fails) -> str:
+    """Сокращает вход, пока fails(вход) истинно: сначала целые строки, потом куски символов."""
+    steps = 0
+    lines = value.splitlines(keepends=True)
+    i = 0
+    while i < len(lines) and steps < SHRINK_STEPS:
+        steps += 1
+        candidate = lines[:i] + lines[i + 1:]
+        if fails("".join(candidate)):
+            lines = candidate
+        else:
+            i += 1
+    value = "".join(lines)
+    chunk = max(1, len(value) // 2)
+    while chunk and steps < SHRINK_STEPS:
+        i = 0
+        while i < len(value) and steps < SHRINK_STEPS:
+            steps += 1
+            candidate = value[:i] + value[i + chunk:]
+            if fails(candidate):
+                value = candidate
+            else:
+                i += chunk
+        chunk //= 2
+    return value
+
+
+def timing(func, inputs: list) -> float:
+    """Лучшее из TIMING_REPEAT время прогона всех входов, секунды."""
+    best = None
+    for _ in range(TIMING_REPEAT):
+        started = time.perf_counter()
+        for value in inputs:
+            try:
+                func(value)
+            except Exception:
+                pass
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _unexpected(oracle, func, known, value) -> bool:
+    want, got = outcome(oracle, value), outcome(func, value)
+    return want != got and not (known is not None and known(value, want, got))
+
+
+def check(name: str, inputs: list, candidates: dict, show: int) -> int:
+    """Сверяет кандидатов с эталоном, печатает расхождения и скорость; возвращает число расхождений."""
+    oracle = TARGETS[name][0]
+    known = KNOWN_DIFFERENCES.get(name)
+    expected = [outcome(oracle, value) for value in inputs]
+    reference_time = timing(oracle, inputs)
+    print(f"{name}: {len(inputs)} входов, эталон {reference_time * 1000:.1f} мс")
+    total = 0
+    for label, func in candidates.items():
+        failures = []
+        allowed = 0
+        for value, want in zip(inputs, expected):
+            got = outcome(func, value)
+            if got == want:
+                continue
+            if known is not None and known(value, want, got):
+                allowed += 1
+            else:
+                failures.append(value)
+        elapsed = timing(func, inputs)
+        ratio = reference_time / elapsed if elapsed else float("inf")
+        print(f"  {label:<38} расхождений {len(failures):>6}   {elapsed * 1000:8.1f} мс   ×{ratio:.2f}"
+              + (f"   намеренных {allowed}" if allowed else ""))
+        seen = set()
+        for value in failures:
+            if len(seen) >= show:
+                break
+            small = shrink(value, lambda v: _unexpected(oracle, func, known, v))
+            if small in seen:
+                continue
+            seen.add(small)
+            print(f"    вход:     {small!r}")
+            print(f"    эталон:   {outcome(oracle, small)!r}")
+            print(f"    кандидат: {outcome(func, small)!r}")
+        total += len(failures)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сверка быстрых разборщиков с эталонными реализациями")
+    parser.add_argument("--cases", type=int, default=DEFAULT_CASES, help="сгенерированных входов на функцию")
+    parser.add_argument("--tickets", type=int, default=DEFAULT_TICKETS, help="тикетов синтетического корпуса")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--corpus", action="append", default=[], help="JSONL с тикетами или результатами batch_cli")
+    parser.add_argument("--only", choices=list(TARGETS), action="append", help="проверять только эти функции")
+    parser.add_argument("--candidate", action="append", default=[], metavar="ФУНКЦИЯ=МОДУЛЬ:ИМЯ",
+                        help="дополнительный кандидат, например parse_price_lines=fast_parse:parse")
+    parser.add_argument("--show", type=int, default=DEFAULT_SHOW, help="сколько примеров расхождений печатать")
+    args = parser.parse_args(argv)
+
+    candidates = {name: dict(funcs) for name, (_, _, funcs) in TARGETS.items()}
+    for spec in args.candidate:
+        name, _, target = spec.partition("=")
+        if name not in TARGETS:
+            parser.error(f"неизвестная функция {name!r}: {', '.join(TARGETS)}")
+        try:
+            candidates[name][target] = load_candidate(target)
+        except (ImportError, AttributeError, ValueError) as e:
+            parser.error(f"кандидат {target!r}: {e}")
+
+    tickets = make_tickets(args.tickets, args.seed)
+    for path in args.corpus:
+        tickets += read_corpus(path)
+    inputs = corpus_inputs(tickets)
+
+    rng = random.Random(args.seed)
+    mismatches = 0
+    for name in args.only or TARGETS:
+        generator = TARGETS[name][1]
+        values = inputs[name] + [generator(rng) for _ in range(args.cases)]
+        mismatches += check(name, values, candidates[name], args.show)
+    print(f"Расхождений всего: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
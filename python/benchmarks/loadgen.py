@@ -0,0 +1,121 @@
+# loadgen.py
+"""Нагрузочный клиент для http_service: запросы в секунду и хвост задержек.
+
+Сначала запустите сервис:  python work.py --serve
+Затем из папки python:     python benchmarks/loadgen.py --connections 16 --pipeline 8 --duration 10
+
+Каждое соединение постоянное и держит в полёте до --pipeline запросов
+(конвейер HTTP/1.1). Тела запросов — тикеты синтетического корпуса всех
+типов шаблонов. Задержка считается от отправки запроса до получения ответа.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import make_tickets  # noqa: E402
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def build_requests(host: str, path: str, count: int, batch: int) -> list:
+    tickets = make_tickets(count)
+    bodies = []
+    if batch > 1:
+        for start in range(0, len(tickets), batch):
+            bodies.append({"records": tickets[start:start + batch]})
+    else:
+        bodies = tickets
+    requests = []
+    for body in bodies:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        head = (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n\r\n").encode("ascii")
+        requests.append(head + data)
+    return requests
+
+
+async def read_response(reader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def connection_worker(host, port, requests, offset, pipeline, deadline, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    in_flight = asyncio.Queue(pipeline)
+    index = offset
+
+    async def receive():
+        while True:
+            sent_at = await in_flight.get()
+            if sent_at is None:
+                return
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - sent_at)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    receiver = asyncio.ensure_future(receive())
+    while time.perf_counter() < deadline:
+        await in_flight.put(time.perf_counter())
+        writer.write(requests[index % len(requests)])
+        index += 1
+        await writer.drain()
+    await in_flight.put(None)
+    await receiver
+    writer.close()
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))]
+
+
+async def run(args):
+    path = "/batch" if args.batch > 1 else "/generate"
+    requests = build_requests(args.host, path, args.tickets, args.batch)
+    latencies = []
+    statuses = {}
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(
+        connection_worker(args.host, args.port, requests, i * 97, args.pipeline, deadline, latencies, statuses)
+        for i in range(args.connections)
+    ))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    rate = len(latencies) / elapsed
+    print(f"{path}: {len(latencies)} запросов за {elapsed:.1f} с — {rate:.0f} запросов/с"
+          + (f" ({rate * args.batch:.0f} тикетов/с)" if args.batch > 1 else ""))
+    print("задержка, мс: " + ", ".join(f"p{p:g} {percentile(latencies, p) * 1000:.2f}" for p in PERCENTILES)
+          + f", max {latencies[-1] * 1000:.2f}")
+    print("статусы: " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+    return 0 if set(statuses) <= {200, 422} else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузка на локальный сервис ответов")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--connections", type=int, default=8, help="постоянных соединений")
+    parser.add_argument("--pipeline", type=int, default=4, help="запросов в полёте на соединение")
+    parser.add_argument("--duration", type=float, default=10.0, help="длительность, с")
+    parser.add_argument("--tickets", type=int, default=1000, help="разных тикетов в наборе запросов")
+    parser.add_argument("--batch", type=int, default=1, help="тикетов в запросе; больше 1 — /batch")
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# reference.py
+"""Эталонные реализации разборщиков — код в том виде, в каком он был до оптимизаций.
+
+Не меняйте этот файл: fuzz.py сверяет с ним быстрые реализации из utils,
+lexer, incremental и engine. Если поведение меняется намеренно, правьте
+здесь вместе с описанием причины в сообщении коммита.
+"""
+import re
+from decimal import Decimal, ROUND_HALF_UP
+
+
+def normalize_comment(comment: str) -> str:
+    return re.sub(r'\b(ч|мин|км|кг|м|млн|млрд|трлн)\.', r'\1', comment).strip()
+
+
+def parse_price_lines(text: str) -> dict:
+    lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+    result = {}
+    i = 0
+    while i < len(lines):
+        key = lines[i]
+        if i + 1 < len(lines):
+            val_line = lines[i + 1]
+            m = re.match(r"(\d+\.?\d*\s*₽)(?:\s*\((.+)\))?", val_line)
+            if m:
+                val = m.group(1).strip()
+                comment = m.group(2).strip() if m.group(2) else ""
+                result[key] = (val, normalize_comment(comment))
+                i += 2
+                continue
+        m = re.match(r"(.+?)\s+(\d+\.?\d*\s*₽)(?:\s*\((.+)\))?", key)
+        if m:
+            field = m.group(1).strip()
+            val = m.group(2).strip()
+            comment = m.group(3).strip() if m.lastindex >= 3 and m.group(3) else ""
+            result[field] = (val, normalize_comment(comment))
+        i += 1
+    return result
+
+
+def sum_ruble_digits(result_text: str) -> str:
+    matches = re.findall(r"\u2014 .*?: (\d[\d\s\.]*)\s*₽", result_text)
+    total = sum(float(d.replace(" ", "").replace(",", ".")) for d in matches)
+    rounded = Decimal(total).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+    return f"{rounded} ₽"
+
+
+def parse_time_to_minutes(text):
+    h = re.search(r"(\d+)\s*ч", text)
+    m = re.search(r"(\d+)\s*мин", text)
+    if h and m:
+        result = f"{h.group(1)} ч {m.group(1)} мин"
+    elif m:
+        result = f"{m.group(1)} мин"
+    elif h:
+        result = f"{h.group(1)} ч"
+    else:
+        result = text
+    return normalize_comment(result)
+
+
+def route_values(calc_text):
+    """Расстояние и время из блока «Отмена батча», как их искал generate_result."""
+    dist_match = re.search(r"Расч[её]тное расстояние\s*[:\-]?\s*[\r\n]*\s*([\d.,]+)\s*(км|м)\b",
+                           calc_text, re.IGNORECASE)
+    distance = f"{dist_match.group(1)} {dist_match.group(2)}" if dist_match else None
+
+    time_match = re.search(r"Расч[её]тное время\s*[:\-]?\s*[\r\n]*\s*(.+)", calc_text, re.IGNORECASE)
+    time_raw = time_match.group(1).strip() if time_match else ""
+    return distance, time_raw
@@ -0,0 +1,249 @@
+# run.py
+"""Набор замеров горячих путей разбора и генерации ответов.
+
+Для каждой функции и каждого размера корпуса (по умолчанию 1, 1000 и
+100000 тикетов) считаются перцентили времени одного вызова и память:
+пик и остаток после прогона под tracemalloc. Результаты сравниваются с
+базой из репозитория (baseline.json); при ухудшении сверх допуска код
+выхода 1.
+
+Запуск из папки python:
+    python benchmarks/run.py
+    python benchmarks/run.py --sizes 1,1000 --update-baseline
+
+Абсолютное время зависит от машины, поэтому в базе хранится не оно, а
+отношение к калибровочному циклу — короткому разбору строк на чистом Python
+с регулярным выражением. Цикл меряется в том же процессе вперемешку с
+вызовами замеряемой функции (раз в CALIBRATE_EVERY вызовов), так что
+отношение следует и за частотой процессора, которая меняется по ходу
+прогона. База, записанная на одной машине, годится для сравнения на другой;
+память хранится как есть. --update-baseline записывает медиану BASELINE_RUNS
+прогонов.
+
+На корпусах меньше GATED_TAIL_SIZE тикетов вход повторяется сотни раз, и
+хвост распределения там — это шум планировщика и сборщика мусора, а не
+код: для них сравниваются только медиана и память.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import make_tickets, DEFAULT_SEED  # noqa: E402
+from engine import generate, parse_time_to_minutes  # noqa: E402
+from lexer import iter_price_pairs  # noqa: E402
+from money import total_kopecks  # noqa: E402
+from template_registry import KIND_REGULAR, KIND_BATCH_CANCEL, KIND_SPLIT_PAYMENT  # noqa: E402
+from utils import parse_price_lines, parse_price_records, normalize_comment  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SIZES = (1, 1000, 100000)
+# На маленьком корпусе вызовы повторяются, чтобы перцентили были осмысленными
+MIN_CALLS = 200
+# Память меряется на первых ALLOC_SAMPLE входах: tracemalloc сильно замедляет вызовы
+ALLOC_SAMPLE = 1000
+PERCENTILES = (50, 95, 99)
+# С какого размера корпуса ухудшение p95 считается регрессией
+GATED_TAIL_SIZE = 1000
+# Калибровочный цикл прогоняется CALIBRATION_ROUNDS раз перед замером и ещё
+# раз на каждые CALIBRATE_EVERY вызовов; единица времени — медиана всех прогонов
+CALIBRATION_ROUNDS = 21
+CALIBRATE_EVERY = 100
+# Сколько прогонов усредняет --update-baseline: одиночный прогон бывает удачным
+BASELINE_RUNS = 3
+_CALIBRATION_TEXT = "Подача\n100 ₽ (за 5 мин.)\nВремя в пути\n200 ₽ (за 15 мин.)\n" * 50
+_CALIBRATION_RE = re.compile(r"(\d+)\s*₽(?:\s*\((.+)\))?")
+
+
+def _comments(tickets):
+    return [comment for t in tickets for _, _, comment in iter_price_pairs(t["price_text"])]
+
+
+def _durations(tickets):
+    return [t["calc_text"].rsplit("\n", 1)[-1].split("-")[-1] for t in tickets]
+
+
+def _price_lines(tickets):
+    return [list(parse_price_records(t["price_text"]).values()) for t in tickets]
+
+
+# Название -> (тип тикетов, подготовка входов из тикетов, замеряемая функция)
+CASES = {
+    "parse_price_lines": (KIND_REGULAR, lambda ts: [t["price_text"] for t in ts], parse_price_lines),
+    "normalize_comment": (KIND_REGULAR, _comments, normalize_comment),
+    "total_kopecks": (KIND_REGULAR, _price_lines, total_kopecks),
+    "parse_time_to_minutes": (KIND_BATCH_CANCEL, _durations, parse_time_to_minutes),
+    "render_regular": (KIND_REGULAR, list, lambda t: generate(t["template"], t)),
+    "render_batch_cancel": (KIND_BATCH_CANCEL, list, lambda t: generate(t["template"], t)),
+    "render_split_payment": (KIND_SPLIT_PAYMENT, list, lambda t: generate(t["template"], t)),
+}
+
+
+def _calibration_work() -> int:
+    total = 0
+    for line in _CALIBRATION_TEXT.splitlines():
+        m = _CALIBRATION_RE.search(line)
+        if m:
+            total += int(m.group(1)) + len((m.group(2) or "").strip())
+        else:
+            total += len(line.lower())
+    return total
+
+
+def _calibration_ns() -> int:
+    started = time.perf_counter_ns()
+    _calibration_work()
+    return time.perf_counter_ns() - started
+
+
+def normalize(results: dict) -> dict:
+    """Результаты в формате базы: время в долях калибровочного цикла."""
+    return {key: {"p50_x": round(r["p50_us"] / r["unit_us"], 5),
+                  "p95_x": round(r["p95_us"] / r["unit_us"], 5),
+                  "peak_kb": r["peak_kb"]}
+            for key, r in results.items()}
+
+
+def median_baseline(runs: list) -> dict:
+    """Поэлементная медиана нескольких нормализованных прогонов."""
+    merged = {}
+    for key in runs[0]:
+        merged[key] = {metric: sorted(r[key][metric] for r in runs)[len(runs) // 2]
+                       for metric in runs[0][key]}
+    return merged
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(func, inputs: list) -> dict:
+    calls = inputs * (MIN_CALLS // len(inputs) + 1) if len(inputs) < MIN_CALLS else inputs
+    func(calls[0])  # прогрев кэшей регулярных выражений и шаблонов
+    _calibration_work()
+    units = [_calibration_ns() for _ in range(CALIBRATION_ROUNDS)]
+    timings = []
+    clock = time.perf_counter_ns
+    for i, value in enumerate(calls, 1):
+        started = clock()
+        func(value)
+        timings.append(clock() - started)
+        if i % CALIBRATE_EVERY == 0:
+            units.append(_calibration_ns())
+    timings.sort()
+    units.sort()
+    result = {f"p{p}_us": round(percentile(timings, p) / 1000, 2) for p in PERCENTILES}
+    # Единица времени базы: медиана калибровочного цикла, см. описание модуля
+    result["unit_us"] = round(units[len(units) // 2] / 1000, 1)
+    result["calls_per_s"] = round(len(timings) / (sum(timings) / 1e9)) if sum(timings) else 0
+
+    sample = inputs[:ALLOC_SAMPLE]
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for value in sample:
+        func(value)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result["peak_kb"] = round((peak - before) / 1024, 1)
+    result["retained_kb"] = round((after - before) / 1024, 1)
+    return result
+
+
+def run(sizes, seed: int = DEFAULT_SEED) -> dict:
+    results = {}
+    for size in sizes:
+        corpora = {}
+        for name, (kind, prepare, func) in CASES.items():
+            if kind not in corpora:
+                corpora[kind] = make_tickets(size, seed, kind)
+            inputs = prepare(corpora[kind])
+            if not inputs:
+                continue
+            results[f"{name}/{size}"] = measure(func, inputs)
+    return results
+
+
+def compare(normalized: dict, baseline: dict, time_tolerance: float, alloc_tolerance: float) -> list:
+    """Список ухудшений относительно базы; замеры без базы пропускаются.
+
+    normalized — результаты после normalize(), в тех же единицах, что и база.
+    """
+    regressions = []
+    for key, current in normalized.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        # Хвост распределения шумнее медианы, поэтому допуск для p95 вдвое шире,
+        # а на маленьких корпусах p95 не сравнивается вовсе. Запас slack
+        # гасит шум на самых быстрых вызовах: цикл длится сотни микросекунд,
+        # так что 0.003 — порядка микросекунды
+        gated_tail = int(key.rsplit("/", 1)[1]) >= GATED_TAIL_SIZE
+        for metric, tolerance, slack in (("p50_x", time_tolerance, 0.003),
+                                         ("p95_x", time_tolerance * 2, 0.006),
+                                         ("peak_kb", alloc_tolerance, 4.0)):
+            if metric == "p95_x" and not gated_tail:
+                continue
+            limit = base[metric] * (1 + tolerance) + slack
+            if current[metric] > limit:
+                regressions.append(f"{key}: {metric} {current[metric]} > {limit:.5f} (база {base[metric]})")
+    return regressions
+
+
+def print_table(results: dict):
+    print(f"{'замер':<30} {'p50 мкс':>9} {'p95 мкс':>9} {'p99 мкс':>9} {'вызовов/с':>11} {'пик КБ':>9} {'остаток КБ':>11} {'цикл мкс':>9}")
+    for key, r in results.items():
+        print(f"{key:<30} {r['p50_us']:>9} {r['p95_us']:>9} {r['p99_us']:>9} "
+              f"{r['calls_per_s']:>11} {r['peak_kb']:>9} {r['retained_kb']:>11} {r['unit_us']:>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры разбора и генерации ответов")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="размеры корпуса через запятую")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="файл базы")
+    parser.add_argument("--update-baseline", action="store_true", help="записать результаты как новую базу")
+    parser.add_argument("--time-tolerance", type=float, default=0.5, help="допустимый рост медианы времени, доля")
+    parser.add_argument("--alloc-tolerance", type=float, default=0.2, help="допустимый рост памяти, доля")
+    parser.add_argument("--json", help="сохранить результаты в файл")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    results = run(sizes, args.seed)
+    print_table(results)
+    normalized = normalize(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        runs = [normalized]
+        for _ in range(BASELINE_RUNS - 1):
+            runs.append(normalize(run(sizes, args.seed)))
+        baseline.update(median_baseline(runs))
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"База записана: {args.baseline}")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(normalized, baseline, args.time_tolerance, args.alloc_tolerance)
+    for line in regressions:
+        print("УХУДШЕНИЕ", line, file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+# classifier.py
+"""Определение шаблона по вставленному тексту.
+
+Все признаки ищутся одним заранее скомпилированным выражением с
+альтернативами, за один проход по тексту:
+
+    route    — «Расчётное расстояние» / «Расчётное время»: мультизаказ
+    datetime — строка «26.09.2025, 21:19:41»: пополнение при оплате частями
+    amount   — строка-сумма «148 ₽ (за 5 мин.)»
+    priced   — название и сумма в одной строке
+    order    — номер заказа: «Заказ № 123456» или 32 шестнадцатеричных символа
+
+Текст просматривается целиком: заголовок мультизаказа может стоять и в конце
+длинной вставки. Проход обрывается на первом решающем признаке — заголовке
+расчёта; если уже найдены строка с суммой и номер заказа, остаток текста
+проверяется только на заголовок расчёта, отдельным коротким выражением.
+"""
+import re
+from collections import namedtuple
+
+from order_split import ORDER_HEADER
+from template_registry import KIND_REGULAR, KIND_BATCH_CANCEL, KIND_SPLIT_PAYMENT
+
+# kind — тип шаблона или None, если текст не похож ни на один;
+# fields — поля окна в формате engine.generate
+Classification = namedtuple("Classification", "kind fields")
+
+_SP = r"[^\S\n]"
+_AMOUNT = rf"\d+\.?\d*{_SP}*₽"
+
+_ROUTE = rf"расч[её]тное{_SP}+(?:расстояние|время)"
+
+_MARKER_RE = re.compile(
+    rf"^{_SP}*(?:"
+    rf"(?P<route>.*?{_ROUTE})"
+    rf"|(?P<datetime>\d{{1,2}}\.\d{{2}}\.\d{{4}},{_SP}*\d{{1,2}}:\d{{2}}:\d{{2}}){_SP}*$"
+    rf"|(?P<amount>{_AMOUNT}.*)"
+    rf"|(?P<priced>.+?{_SP}{_AMOUNT}.*)"
+    rf"|(?:{ORDER_HEADER}){_SP}*$"
+    rf")",
+    re.IGNORECASE | re.MULTILINE,
+)
+# Заголовок расчёта в любом месте строки — то же, что альтернатива route выше
+_ROUTE_RE = re.compile(_ROUTE, re.IGNORECASE)
+
+
+def classify(text: str) -> Classification:
+    """Определяет тип шаблона и раскладывает текст по полям окна."""
+    payments = []
+    pending_datetime = None
+    priced = 0
+    order_number = ""
+
+    for m in _MARKER_RE.finditer(text):
+        kind = m.lastgroup
+        if kind == "route":
+            # Заголовки расчёта однозначно указывают на мультизаказ
+            return Classification(KIND_BATCH_CANCEL, {"calc_text": text})
+        if priced and order_number:
+            # Оплатой частями текст уже не станет, а номер заказа берётся первый:
+            # дальше важен только заголовок расчёта
+            if _ROUTE_RE.search(text, m.start()):
+                return Classification(KIND_BATCH_CANCEL, {"calc_text": text})
+            break
+        if kind == "datetime":
+            pending_datetime = m.group("datetime")
+            continue
+        if kind == "amount":
+            if pending_datetime is not None:
+                payments.append(f"{pending_datetime}\n{m.group('amount').strip()}")
+            else:
+                priced += 1
+        elif kind == "priced":
+            priced += 1
+        elif not order_number:
+            order_number = m.group(kind)
+        pending_datetime = None
+
+    if len(payments) >= 2 and priced == 0:
+        return Classification(KIND_SPLIT_PAYMENT, {"payment1": payments[0], "payment2": payments[1]})
+    if priced:
+        fields = {"price_text": text}
+        if order_number:
+            fields["order_number"] = order_number
+        return Classification(KIND_REGULAR, fields)
+    return Classification(None, {})
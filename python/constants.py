@@ -1,40 +1,55 @@
 # constants.py
 
-TEMPLATES = {
-    "Шаблон 1 (РВ)": """Всё проверила и не обнаружила никаких нарушений при расчёте заказа {order_number}. Стоимость заказа рассчитана верно в соответствии с тарифом.
-
-Вот более подробная информация о том, из чего складывается итоговая стоимость заказа:
-
-{body}
-
-Итого: {total}.""",
-
-    "Шаблон 2 (Подробно)": """Стоимость заказа складывается из нескольких условий:
-
-— Подача
-— Расстояние
-— Время в пути
-— Платное ожидание
-— Дополнительные опции
-
-Также в приложении есть зоны повышенного спроса, где действует коэффициент, 
-который увеличивает стоимость заказа.
-
-Как происходит расчёт на примере вашего заказа № {order_number}:
-
-{body}
-
-Итого: {total}.""",
-
-    "Шаблон 3 (Отмена батча)": """Проверила мультизаказ и вижу, что в расчёте стоимости учтены:
-— {distance};
-— {time}.
-
-Вы сделали {done_count} {done_word} из {total_count}, выполненные заказы уже оплачены.
-
-{cancel_text}""",
-
-    "Шаблон 4 (Оплата частями)": """Иногда деньги за доставку списываются с карты пользователя частями — так произошло и в этом заказе. Стоимость заказа отобразилась на балансе водителя двумя суммами: {amount1} и {amount2}.
-
-Эти суммы отразились в ведомости водителя {datetime1} и {datetime2}. Деньги должны поступить на расчётный счёт парка в течение 3-5 дней. Отслеживать поступление можно в детализации платежей."""
-}
\ No newline at end of file
+# Тексты шаблонов лежат в папке templates (см. template_registry.py)
+
+# Порядок и отображаемые названия полей обычных шаблонов
+ORDERED_FIELDS = [
+    ("Подача", "Подача"),
+    ("Время в пути", "Время в пути"),
+    ("Километры в пути", "Километры в пути"),
+    ("Повышенный спрос", "Повышающий коэффициент"),
+    ("Ожидание у отправителя", "Ожидание у отправителя"),
+    ("Ожидание у получателя", "Ожидание у получателя"),
+    ("Доплаты", "Бонус за заказ"),
+    ("Цена отмен клиентами", "Цена отмен клиентами"),
+    ("Надбавка за заказ через колл-центр", "Надбавка за заказ через колл-центр")
+]
+
+EXTRA_FIELDS = [
+    "Получение",
+    "Дистанция возврата",
+    "Цена платной подачи",
+    "Время возврата",
+    "Услуги 1 грузчика (кузов S)",
+    "Услуги 1 грузчика (кузов L)",
+    "Услуги 2 грузчиков (кузов XL)",
+    "Услуги 1 грузчика (кузов M)",
+    "Дополнительные кг",
+    "Перевес более 20 кг",
+    "Перевес до 10 кг",
+    "Перевес 10–20 кг",
+    "Девять коробок",
+    "Успешный возврат посылки",
+    "Компенсация парковки (30 минут)",
+    "Цена отмен клиентами", "Успешное вручение посылки",
+    "Время аренды"
+]
+
+ADDITIONAL_SERVICES_MAP = {
+    "От двери до двери": "От двери до двери",
+    "Кузов": "Размер кузова",
+    "Грузчики": "Грузчики",
+    "Термокороб": "Термокороб",
+    "Тяжёлая посылка": "Тяжёлая посылка",
+}
+
+MONTHS_RU = {1: "января", 2: "февраля", 3: "марта", 4: "апреля",
+             5: "мая", 6: "июня", 7: "июля", 8: "августа",
+             9: "сентября", 10: "октября", 11: "ноября", 12: "декабря"}
+
+# «Оплата частями»: «… отобразилась двумя / тремя … суммами»
+PARTS_INSTRUMENTAL = {2: "двумя", 3: "тремя", 4: "четырьмя", 5: "пятью", 6: "шестью",
+                      7: "семью", 8: "восемью", 9: "девятью", 10: "десятью"}
+
+# Бюджет холодного старта (до первого показа окна), мс; см. startup.py
+STARTUP_BUDGET_MS = 1500
@@ -0,0 +1,257 @@
+# engine.py
+"""Формирование ответов без PyQt: общая логика для окна, CLI и пакетной обработки."""
+import re
+from operator import itemgetter
+
+from constants import MONTHS_RU, PARTS_INSTRUMENTAL
+from field_index import resolve_label
+from lexer import iter_tokens, route_values
+from money import format_total, total_kopecks
+from template_registry import get_registry, KIND_BATCH_CANCEL, KIND_SPLIT_PAYMENT
+from tracing import span
+from utils import parse_price_records, format_line, normalize_comment
+
+
+def template_names() -> list:
+    return get_registry().names()
+
+
+def template_kind(template_name: str) -> str:
+    """Тип шаблона из реестра."""
+    return get_registry().get(template_name).kind
+
+
+def templates_of_kind(kind: str) -> list:
+    """Названия шаблонов указанного типа в порядке реестра."""
+    registry = get_registry()
+    return [name for name in registry.names() if registry.get(name).kind == kind]
+
+
+_HOURS_RE = re.compile(r"(\d+)\s*ч")
+_MINUTES_RE = re.compile(r"(\d+)\s*мин")
+
+
+def parse_time_to_minutes(text: str) -> str:
+    h = _HOURS_RE.search(text)
+    m = _MINUTES_RE.search(text)
+    if h and m:
+        result = f"{h.group(1)} ч {m.group(1)} мин"
+    elif m:
+        result = f"{m.group(1)} мин"
+    elif h:
+        result = f"{h.group(1)} ч"
+    else:
+        result = text
+    return normalize_comment(result)
+
+
+def plural_word(n: int) -> str:
+    if 11 <= n % 100 <= 19:
+        return "вручений"
+    if n % 10 == 1:
+        return "вручение"
+    if n % 10 in (2, 3, 4):
+        return "вручения"
+    return "вручений"
+
+
+def _to_int(value) -> int:
+    try:
+        return int(value)
+    except Exception:
+        return 0
+
+
+def format_duration(seconds: int) -> str:
+    """Секунды → «1 ч 5 мин», «35 мин», «2 ч» (секунды отбрасываются, как в parse_time_to_minutes)."""
+    hours, minutes = divmod(seconds // 60, 60)
+    if hours and minutes:
+        return f"{hours} ч {minutes} мин"
+    if hours:
+        return f"{hours} ч"
+    return f"{minutes} мин"
+
+
+def render_batch_cancel(template, calc_text: str, done: str, total: str) -> str:
+    """Шаблон «Отмена батча»: расстояние, время и количество вручений."""
+    with span("parse"):
+        distance, time_raw = route_values(calc_text)
+        distance = distance or "—"
+        time_raw = time_raw or ""
+        time_parsed = parse_time_to_minutes(time_raw)
+        time_parsed = normalize_comment(time_parsed)
+
+    done_int = _to_int(str(done).strip())
+    total_int = _to_int(str(total).strip())
+    return render_batch_cancel_values(template, distance, time_parsed, done_int, total_int)
+
+
+def render_batch_cancel_values(template, distance: str, time_text: str, done: int, total: int) -> str:
+    """То же по готовым значениям (например, посчитанным по выгрузке, см. batch_export)."""
+    diff = total - done
+    if diff == 1:
+        cancel_text = "Одно из вручений было отменено, поэтому оно не вошло в расчёт, и стоимость доставки изменилась."
+    elif diff > 1:
+        cancel_text = "Несколько вручений были отменены, поэтому они не были учтены при расчёте, и стоимость доставки изменилась."
+    else:
+        cancel_text = "Все вручения были выполнены успешно!"
+
+    with span("render"):
+        return template.render({
+            "distance": distance,
+            "time": time_text,
+            "done_count": done,
+            "done_word": plural_word(done),
+            "total_count": total,
+            "cancel_text": cancel_text,
+        })
+
+
+PAYMENT_DATETIME_FORMAT = "%d.%m.%Y, %H:%M:%S"
+_DAYS_IN_MONTH = (0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def parse_payment_datetime(text: str) -> tuple:
+    """«26.09.2025, 21:19:41» → (2025, 9, 26, 21, 19, 41).
+
+    Строки ровно такого вида разбираются срезами, без strptime; всё
+    остальное (без ведущих нулей, лишние пробелы, ошибки) уходит в strptime
+    с тем же форматом, поэтому принимаются и отвергаются те же строки.
+    """
+    if (len(text) == 20 and text[2] == "." and text[5] == "." and text[10:12] == ", "
+            and text[14] == ":" and text[17] == ":"):
+        digits = text[:2] + text[3:5] + text[6:10] + text[12:14] + text[15:17] + text[18:]
+        if digits.isascii() and digits.isdigit():
+            day, month, year = int(text[:2]), int(text[3:5]), int(text[6:10])
+            hour, minute, second = int(text[12:14]), int(text[15:17]), int(text[18:])
+            leap = year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+            if (year and 1 <= month <= 12 and 1 <= day <= _DAYS_IN_MONTH[month]
+                    and (month != 2 or day < 29 or leap) and hour < 24 and minute < 60 and second < 60):
+                return year, month, day, hour, minute, second
+    from datetime import datetime  # нужен только для нестандартных строк, не грузим при старте
+    dt = datetime.strptime(text, PAYMENT_DATETIME_FORMAT)
+    return dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second
+
+
+def format_payment_datetime(parts: tuple) -> str:
+    """(2025, 9, 26, 21, 19, 41) → «26 сентября в 21:19»."""
+    _, month, day, hour, minute, _ = parts
+    return f"{day} {MONTHS_RU[month]} в {hour:02d}:{minute:02d}"
+
+
+def parse_payment_block(text: str):
+    """Разбирает блок «дата, время / сумма» шаблона «Оплата частями»."""
+    lines = [token.text for token in iter_tokens(text)]
+    if len(lines) < 2:
+        raise ValueError("Нужно две строки: дата/сумма")
+    formatted_date = format_payment_datetime(parse_payment_datetime(lines[0]))
+    amount = lines[1]
+    return formatted_date, amount
+
+
+def join_ru(items: list) -> str:
+    """«a», «a и b», «a, b и c»."""
+    if len(items) <= 1:
+        return "".join(items)
+    return ", ".join(items[:-1]) + " и " + items[-1]
+
+
+def render_split_parts(template, parts: list) -> str:
+    """«Оплата частями» по уже разобранным частям [(дата, сумма), ...] в порядке зачисления."""
+    if len(parts) < 2:
+        raise ValueError("Нужно хотя бы две части оплаты")
+    datetimes = [datetime_text for datetime_text, _ in parts]
+    amounts = [amount for _, amount in parts]
+    with span("render"):
+        return template.render({
+            "amount1": amounts[0],
+            "amount2": amounts[1],
+            "datetime1": datetimes[0],
+            "datetime2": datetimes[1],
+            "parts_word": PARTS_INSTRUMENTAL.get(len(parts), str(len(parts))),
+            "amounts": join_ru(amounts),
+            "datetimes": join_ru(datetimes),
+        })
+
+
+def render_split_payment(template, payment1: str, payment2: str, *more: str) -> str:
+    """Шаблон «Оплата частями»: суммы и даты их зачисления (две части или больше)."""
+    with span("parse"):
+        parts = [parse_payment_block(block) for block in (payment1, payment2) + more]
+    return render_split_parts(template, parts)
+
+
+def payment_blocks(fields: dict) -> list:
+    """payment1, payment2 и следующие непустые payment3, payment4, ... из полей ввода."""
+    blocks = [fields.get("payment1", ""), fields.get("payment2", "")]
+    while fields.get(f"payment{len(blocks) + 1}"):
+        blocks.append(fields[f"payment{len(blocks) + 1}"])
+    return blocks
+
+
+def build_body(records: dict):
+    """Раскладывает разобранные строки стоимости по полям ответа.
+
+    Возвращает строки расшифровки и их сумму (см. money.total_kopecks).
+    """
+    slotted = []
+    services = []
+    counted = []
+    for key, line in records.items():
+        rule = resolve_label(key)
+        if rule.slot is not None:
+            slotted.append((rule.slot, format_line(rule.display, line.amount, line.comment)))
+            counted.append(line)
+        if rule.service is not None:
+            services.append(format_line(rule.service, line.amount, line.comment))
+            counted.append(line)
+
+    # sort устойчив: внутри одной группы сохраняется порядок вставки
+    slotted.sort(key=itemgetter(0))
+    return [text for _, text in slotted] + services, total_kopecks(counted)
+
+
+def render_regular(template, order_number: str, price_text: str) -> str:
+    """Обычные шаблоны: расшифровка стоимости и итоговая сумма."""
+    with span("parse"):
+        records = parse_price_records(price_text)
+    return render_regular_records(template, order_number, records)
+
+
+def render_regular_records(template, order_number: str, records: dict) -> str:
+    """То же по уже разобранным строкам стоимости (например, из кэша предпросмотра)."""
+    with span("map"):
+        body_lines, total = build_body(records)
+    with span("total"):
+        total_text = format_total(total)
+    with span("render"):
+        return template.render({
+            "order_number": order_number.strip(),
+            "body": "\n".join(body_lines),
+            "total": total_text,
+        })
+
+
+def generate(template_name: str, fields: dict) -> str:
+    """Формирует ответ по названию шаблона и словарю входных полей.
+
+    Поля совпадают с полями окна: order_number, price_text (обычные шаблоны),
+    calc_text, done, total («Отмена батча»), payment1, payment2 и, если частей
+    больше двух, payment3, payment4, ... («Оплата частями»).
+    """
+    template = get_registry().get(template_name)
+
+    if template.kind == KIND_BATCH_CANCEL:
+        return render_batch_cancel(
+            template,
+            fields.get("calc_text", ""),
+            fields.get("done", ""),
+            fields.get("total", "")
+        )
+    if template.kind == KIND_SPLIT_PAYMENT:
+        return render_split_payment(template, *payment_blocks(fields))
+    return render_regular(
+        template,
+        fields.get("order_number", ""),
+        fields.get("price_text", "")
+    )
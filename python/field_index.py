@@ -0,0 +1,138 @@
+# field_index.py
+"""Предвычисленный индекс правил сопоставления полей обычных шаблонов.
+
+Правила из constants (ORDERED_FIELDS, EXTRA_FIELDS, ADDITIONAL_SERVICES_MAP)
+собираются один раз при импорте:
+
+    ORDERED_FIELDS          — префиксное дерево по началу названия;
+    EXTRA_FIELDS            — словарь точных совпадений;
+    ADDITIONAL_SERVICES_MAP — автомат Ахо — Корасик по подстрокам в нижнем регистре.
+
+resolve_label за один проход по названию возвращает место строки в ответе
+и названия, под которыми она выводится.
+"""
+from collections import namedtuple, deque
+from functools import lru_cache
+
+from constants import ORDERED_FIELDS, EXTRA_FIELDS, ADDITIONAL_SERVICES_MAP
+
+# slot — порядковый номер группы в ответе (None — поле не выводится),
+# display — отображаемое название, service — название дополнительной услуги или None
+FieldRule = namedtuple("FieldRule", "slot display service")
+
+_END = None  # ключ узла дерева, под которым хранится значение
+
+
+class PrefixTrie:
+    """Префиксное дерево: находит значение с наименьшим приоритетом среди префиксов текста."""
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, word: str, value):
+        node = self.root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        if _END not in node or value < node[_END]:
+            node[_END] = value
+
+    def best_prefix(self, text: str):
+        best = None
+        node = self.root
+        for ch in text:
+            node = node.get(ch)
+            if node is None:
+                break
+            value = node.get(_END)
+            if value is not None and (best is None or value < best):
+                best = value
+        return best
+
+
+class SubstringMatcher:
+    """Автомат Ахо — Корасик: находит значение с наименьшим приоритетом среди подстрок текста."""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [None]
+        for word, value in patterns:
+            state = 0
+            for ch in word:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                state = nxt
+            if self.output[state] is None or value < self.output[state]:
+                self.output[state] = value
+        self._build_links()
+
+    def _build_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                inherited = self.output[self.fail[nxt]]
+                if inherited is not None and (self.output[nxt] is None or inherited < self.output[nxt]):
+                    self.output[nxt] = inherited
+
+    def best_match(self, text: str):
+        best = None
+        state = 0
+        goto, fail, output = self.goto, self.fail, self.output
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            value = output[state]
+            if value is not None and (best is None or value < best):
+                best = value
+        return best
+
+
+# --- сборка индекса при импорте ---
+_ORDERED_TRIE = PrefixTrie()
+for _slot, (_key, _display) in enumerate(ORDERED_FIELDS):
+    _ORDERED_TRIE.add(_key, _slot)
+
+_EXTRA_SLOTS = {}
+for _index, _key in enumerate(EXTRA_FIELDS):
+    _EXTRA_SLOTS.setdefault(_key, len(ORDERED_FIELDS) + _index)
+
+_SERVICE_NAMES = list(ADDITIONAL_SERVICES_MAP.items())
+# «Кузов» проверяется отдельно и с учётом регистра
+_SERVICE_MATCHER = SubstringMatcher(
+    (key.lower(), index) for index, (key, _) in enumerate(_SERVICE_NAMES) if key.lower() != "кузов"
+)
+
+
+def _extra_display(key: str) -> str:
+    return "Клиентские отмены" if key == "Цена отмен клиентами" else key
+
+
+@lru_cache(maxsize=4096)
+def resolve_label(label: str) -> FieldRule:
+    """Правило вывода для разобранного названия поля."""
+    slot = _ORDERED_TRIE.best_prefix(label)
+    if slot is not None:
+        display = ORDERED_FIELDS[slot][1]
+    else:
+        slot = _EXTRA_SLOTS.get(label)
+        display = _extra_display(label) if slot is not None else None
+
+    if "Кузов" in label:
+        service = 'Дополнительные услуги «Размер кузова»'
+    else:
+        index = _SERVICE_MATCHER.best_match(label.lower())
+        service = f'Дополнительные услуги «{_SERVICE_NAMES[index][1]}»' if index is not None else None
+
+    return FieldRule(slot, display, service)
@@ -0,0 +1,166 @@
+# gif_cache.py
+"""Кэш кадров GIF для анимации после копирования результата.
+
+GIF берутся из пакета ресурсов (см. assets) или из отдельных файлов и
+декодируются в фоне только те, что будут показаны. Исходные кадры и кадры,
+подогнанные под размер поля результата, хранятся в одном LRU с общим
+ограничением по памяти, а показ идёт через один переиспользуемый
+FramePlayer вместо нового QMovie на каждое копирование.
+"""
+import threading
+from collections import OrderedDict
+
+from PyQt5 import QtCore, QtGui
+
+from assets import image_reader
+
+DEFAULT_FRAME_DELAY_MS = 100
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def decode_frames(name: str) -> list:
+    """Декодирует все кадры анимации «gifs/…»: [(QImage, задержка в мс), ...]."""
+    reader = image_reader(name)
+    frames = []
+    while reader.canRead():
+        image = reader.read()
+        if image.isNull():
+            break
+        delay = reader.nextImageDelay()
+        frames.append((image, delay if delay > 0 else DEFAULT_FRAME_DELAY_MS))
+    return frames
+
+
+def _frames_bytes(frames: list) -> int:
+    return sum(image.sizeInBytes() for image, _ in frames)
+
+
+class AnimationCache(QtCore.QObject):
+    """Декодированные кадры GIF и их копии, масштабированные под размер виджета.
+
+    Исходные и масштабированные кадры лежат в одном LRU и вместе укладываются
+    в max_bytes. QImage можно создавать и масштабировать вне GUI-потока,
+    поэтому и декодирование, и подготовка кадров под новый размер идут в
+    фоне; GUI-поток только спрашивает готовые кадры (cached) и узнаёт о новых
+    по сигналу frames_ready.
+    """
+
+    # (путь, размер) — кадры под этот размер готовы; сигнал приходит в GUI-поток
+    frames_ready = QtCore.pyqtSignal(str, QtCore.QSize)
+
+    def __init__(self, paths: list, max_bytes: int = DEFAULT_MAX_BYTES, parent=None):
+        super().__init__(parent)
+        self.paths = list(paths)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # (путь, None) -> исходные кадры, (путь, (ширина, высота)) -> масштабированные
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def preload(self, paths=None):
+        """Запускает фоновое декодирование GIF (по умолчанию всех)."""
+        paths = list(self.paths if paths is None else paths)
+        threading.Thread(target=self._decode_all, args=(paths,), name="gif-preload", daemon=True).start()
+
+    def prepare(self, size: QtCore.QSize, paths=None):
+        """Готовит в фоне кадры GIF (по умолчанию всех) под новый размер поля."""
+        paths = list(self.paths if paths is None else paths)
+        threading.Thread(target=self._scale_all, args=(paths, QtCore.QSize(size)),
+                         name="gif-scale", daemon=True).start()
+
+    def _decode_all(self, paths):
+        for path in paths:
+            self.frames(path)
+
+    def _scale_all(self, paths, size):
+        for path in paths:
+            self.scaled(path, size)
+            self.frames_ready.emit(path, size)
+
+    def cached(self, path: str, size: QtCore.QSize):
+        """Готовые кадры под size или None; ничего не декодирует, годится для GUI-потока."""
+        return self._get((path, (size.width(), size.height())))
+
+    def frames(self, path: str) -> list:
+        """Исходные кадры; если их нет в кэше, GIF декодируется в вызывающем потоке."""
+        key = (path, None)
+        frames = self._get(key)
+        if frames is None:
+            frames = self._put(key, decode_frames(path))
+        return frames
+
+    def scaled(self, path: str, size: QtCore.QSize) -> list:
+        """Кадры, растянутые под size, из кэша или построенные в вызывающем потоке."""
+        key = (path, (size.width(), size.height()))
+        frames = self._get(key)
+        if frames is None:
+            frames = self._put(key, [
+                (image.scaled(size, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation), delay)
+                for image, delay in self.frames(path)
+            ])
+        return frames
+
+    def _get(self, key):
+        with self._lock:
+            frames = self._entries.get(key)
+            if frames is not None:
+                self._entries.move_to_end(key)
+            return frames
+
+    def _put(self, key, frames: list) -> list:
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                return existing
+            self._entries[key] = frames
+            self._bytes += _frames_bytes(frames)
+            self._evict()
+        return frames
+
+    def _evict(self):
+        # Последний добавленный набор остаётся, даже если один превышает лимит
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, frames = self._entries.popitem(last=False)
+            self._bytes -= _frames_bytes(frames)
+
+
+class FramePlayer(QtCore.QObject):
+    """Проигрывает заранее подготовленные кадры в QLabel и скрывает его по таймеру."""
+
+    def __init__(self, label, parent=None):
+        super().__init__(parent)
+        self.label = label
+        self.frames = []
+        self.index = 0
+        self._frame_timer = QtCore.QTimer(self)
+        self._frame_timer.setSingleShot(True)
+        self._frame_timer.timeout.connect(self._next_frame)
+        self._hide_timer = QtCore.QTimer(self)
+        self._hide_timer.setSingleShot(True)
+        self._hide_timer.timeout.connect(self.stop)
+
+    def play(self, frames: list, duration_ms: int):
+        self._frame_timer.stop()
+        self.frames = frames
+        self.index = 0
+        if not frames:
+            return
+        self.label.show()
+        self._show_frame()
+        self._hide_timer.start(duration_ms)
+
+    def stop(self):
+        self._frame_timer.stop()
+        self._hide_timer.stop()
+        self.label.hide()
+        self.label.clear()
+
+    def _show_frame(self):
+        image, delay = self.frames[self.index]
+        self.label.setPixmap(QtGui.QPixmap.fromImage(image))
+        if len(self.frames) > 1:
+            self._frame_timer.start(delay)
+
+    def _next_frame(self):
+        self.index = (self.index + 1) % len(self.frames)
+        self._show_frame()
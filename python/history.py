@@ -0,0 +1,389 @@
+# history.py
+"""История сформированных ответов в локальной базе SQLite.
+
+Каждый ответ сохраняется вместе с входными полями, номером заказа и
+хешем нормализованного входа. Одинаковый вход (с точностью до пробелов и
+пустых строк) отдаётся из LRU в памяти или из базы без повторной
+генерации, а по номеру заказа можно вернуть поля закрытого тикета.
+
+Вся работа с диском, кроме чтения по запросу пользователя, идёт в
+отдельном потоке записи: создание и миграция схемы, заполнение названий
+полей старых записей и построение индекса поиска — при старте потока, затем
+запись ответов из очереди. Окно не ждёт этой подготовки: до её конца
+lookup смотрит только в LRU, а поиск и восстановление по номеру заказа
+ничего не находят (ready ещё False). После подготовки в LRU подгружаются
+последние ответы из базы. Сам lookup никогда не читает базу — в потоке окна
+остаётся только проверка LRU.
+
+База работает в режиме WAL, поэтому чтение из окна не ждёт записи. Ошибка
+SQLite при подготовке или записи (база заблокирована, нет места) печатается
+в stderr; пачка ответов при этом откатывается, а поток продолжает работу.
+
+Поиск по истории — полнотекстовый индекс FTS5 по тексту ответа, номеру
+заказа и названиям полей стоимости. Индекс обновляется триггерами при
+каждой вставке; «ё» в нём и в запросах заменяется на «е».
+"""
+import atexit
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import re
+import sys
+import time
+from collections import OrderedDict, namedtuple
+
+from lexer import iter_price_pairs
+from template_registry import get_registry, KIND_REGULAR, KIND_BATCH_CANCEL, KIND_SPLIT_PAYMENT
+
+# Поля, от которых зависит ответ шаблона каждого типа
+INPUT_FIELDS = {
+    KIND_REGULAR: ("order_number", "price_text"),
+    KIND_BATCH_CANCEL: ("calc_text", "done", "total"),
+    KIND_SPLIT_PAYMENT: ("payment1", "payment2"),
+}
+
+SCHEMA_VERSION = 2
+CACHE_SIZE = 256
+PAGE_SIZE = 50
+
+# Скрипт перехода на каждую версию схемы
+_MIGRATIONS = {
+    1: """
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    template TEXT NOT NULL,
+    order_number TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    response TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_order ON responses (order_number, created);
+CREATE INDEX IF NOT EXISTS responses_hash ON responses (input_hash, created);
+""",
+    2: """
+ALTER TABLE responses ADD COLUMN labels TEXT NOT NULL DEFAULT '';
+""",
+}
+
+
+def _fold_sql(column: str) -> str:
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+# Индекс хранит только термы, текст берётся из responses (content=)
+_FTS_SCHEMA = f"""
+CREATE VIRTUAL TABLE responses_fts USING fts5(
+    response, order_number, labels,
+    content='responses', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER responses_fts_insert AFTER INSERT ON responses BEGIN
+    INSERT INTO responses_fts (rowid, response, order_number, labels)
+    VALUES (new.id, {_fold_sql("new.response")}, new.order_number, {_fold_sql("new.labels")});
+END;
+CREATE TRIGGER responses_fts_delete AFTER DELETE ON responses BEGIN
+    INSERT INTO responses_fts (responses_fts, rowid, response, order_number, labels)
+    VALUES ('delete', old.id, {_fold_sql("old.response")}, old.order_number, {_fold_sql("old.labels")});
+END;
+INSERT INTO responses_fts (rowid, response, order_number, labels)
+    SELECT id, {_fold_sql("response")}, order_number, {_fold_sql("labels")} FROM responses;
+"""
+
+_TERM_RE = re.compile(r"\w+")
+
+# Найденная запись истории; snippet — фрагмент ответа с найденными словами в [скобках]
+HistoryEntry = namedtuple("HistoryEntry", "id created template order_number snippet")
+
+
+def default_path() -> str:
+    env_path = os.environ.get("YH_HISTORY_DB")
+    if env_path:
+        return env_path
+    base = os.environ.get("APPDATA") or os.path.expanduser(os.path.join("~", ".local", "share"))
+    return os.path.join(base, "yandex-helper", "history.sqlite3")
+
+
+def _normalize(value) -> str:
+    lines = (line.strip() for line in str(value or "").splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def input_fields(template_name: str, fields: dict) -> dict:
+    """Нормализованные поля, от которых зависит ответ этого шаблона."""
+    kind = get_registry().get(template_name).kind
+    return {name: _normalize(fields.get(name, "")) for name in INPUT_FIELDS[kind]}
+
+
+def input_hash(template_name: str, normalized: dict) -> str:
+    # Текст шаблона входит в ключ: после правки файла старые ответы не подходят
+    segments = get_registry().get(template_name).segments
+    payload = json.dumps([template_name, segments, normalized], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def field_labels(fields: dict) -> str:
+    """Названия строк стоимости для поиска по истории."""
+    price_text = fields.get("price_text")
+    if not price_text:
+        return ""
+    return "\n".join(dict.fromkeys(label for label, _, _ in iter_price_pairs(price_text)))
+
+
+def _backfill_labels(connection):
+    """Названия полей для записей, сохранённых до появления колонки labels."""
+    rows = connection.execute("SELECT id, fields FROM responses").fetchall()
+    connection.executemany(
+        "UPDATE responses SET labels = ? WHERE id = ?",
+        [(field_labels(json.loads(fields)), entry_id) for entry_id, fields in rows]
+    )
+
+
+def fts_query(text: str) -> str:
+    """Запрос FTS5: каждое слово — префикс, все слова обязательны."""
+    text = text.replace("ё", "е").replace("Ё", "Е")
+    return " ".join(f'"{term}"*' for term in _TERM_RE.findall(text))
+
+
+def connect(path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(path, check_same_thread=check_same_thread)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class HistoryStore:
+    """База истории, LRU перед ней и поток записи."""
+
+    def __init__(self, path: str = None, cache_size: int = CACHE_SIZE):
+        self.path = path or default_path()
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # хеш входа -> ответ
+        # LRU заполняется и из потока записи (после подготовки базы)
+        self._cache_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self.write_errors = 0  # пачек, которые не удалось записать
+        self.fts_available = False
+        # Соединение для чтения из окна; создаётся потоком записи после миграции
+        self._reader = None
+        self._ready = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def ready(self) -> bool:
+        """Схема готова и база доступна для чтения."""
+        return self._ready.is_set() and self._reader is not None
+
+    @property
+    def preparing(self) -> bool:
+        """База ещё готовится в потоке записи."""
+        return not self._ready.is_set()
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        """Дожидается конца подготовки базы; True, если база доступна."""
+        self._ready.wait(timeout)
+        return self.ready
+
+    def _prepare(self):
+        """Миграция схемы, индекс поиска и подгрузка LRU; идёт в потоке записи."""
+        connection = None
+        try:
+            connection = connect(self.path, check_same_thread=False)
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            for target in range(version + 1, SCHEMA_VERSION + 1):
+                connection.executescript(_MIGRATIONS[target])
+                if target == 2 and version >= 1:
+                    _backfill_labels(connection)
+                connection.execute(f"PRAGMA user_version={target}")
+            connection.commit()
+            self.fts_available = self._ensure_fts(connection)
+            self._warm_cache(connection)
+            self._reader = connection
+        except (OSError, sqlite3.Error) as e:
+            if connection is not None:
+                connection.close()
+            if sys.stderr is not None:
+                print(f"История: база недоступна: {e}", file=sys.stderr)
+        finally:
+            self._ready.set()
+
+    def _warm_cache(self, connection):
+        """Кладёт в LRU последние ответы из базы, не вытесняя сохранённые в этом сеансе."""
+        rows = connection.execute(
+            "SELECT input_hash, response FROM responses ORDER BY id DESC LIMIT ?", (self.cache_size,)
+        ).fetchall()
+        with self._cache_lock:
+            for key, response in rows:
+                if key not in self._cache:
+                    self._cache[key] = response
+                    self._cache.move_to_end(key, last=False)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _ensure_fts(connection) -> bool:
+        """Создаёт и заполняет индекс поиска; False, если SQLite собран без FTS5."""
+        exists = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'responses_fts'"
+        ).fetchone()
+        if exists:
+            return True
+        try:
+            connection.executescript("BEGIN;" + _FTS_SCHEMA + "COMMIT;")
+        except sqlite3.OperationalError:
+            connection.rollback()
+            return False
+        return True
+
+    def _remember(self, key: str, response: str):
+        with self._cache_lock:
+            self._cache[key] = response
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def lookup(self, template_name: str, fields: dict):
+        """Готовый ответ для такого же входа из LRU или None; база не читается."""
+        key = input_hash(template_name, input_fields(template_name, fields))
+        with self._cache_lock:
+            response = self._cache.get(key)
+            if response is not None:
+                self._cache.move_to_end(key)
+        return response
+
+    def save(self, template_name: str, fields: dict, response: str):
+        """Ставит ответ в очередь на запись и сразу кладёт его в LRU."""
+        normalized = input_fields(template_name, fields)
+        key = input_hash(template_name, normalized)
+        self._remember(key, response)
+        self._queue.put((time.time(), template_name, normalized.get("order_number", ""), key,
+                         normalized, response))
+
+    def latest_for_order(self, order_number: str):
+        """Последняя запись по номеру заказа: (шаблон, поля, ответ) или None."""
+        if not self.ready:
+            return None
+        row = self._reader.execute(
+            "SELECT template, fields, response FROM responses WHERE order_number = ? "
+            "ORDER BY created DESC LIMIT 1", (order_number.strip(),)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def search(self, text: str, limit: int = PAGE_SIZE, before_id: int = None) -> list:
+        """Страница результатов поиска, от новых ответов к старым.
+
+        Следующая страница — записи старше before_id (id последней показанной),
+        поэтому листание не замедляется с глубиной. Пустой запрос отдаёт
+        последние ответы. Пока база не готова, результатов нет.
+        """
+        if not self.ready:
+            return []
+        before_id = before_id if before_id is not None else -1
+        query = fts_query(text)
+        if not query:
+            rows = self._reader.execute(
+                "SELECT id, created, template, order_number, substr(response, 1, 160) FROM responses "
+                "WHERE ? < 0 OR id < ? ORDER BY id DESC LIMIT ?", (before_id, before_id, limit)
+            )
+        elif self.fts_available:
+            # Порядок по rowid индекс FTS5 отдаёт без сортировки всех совпадений
+            rows = self._reader.execute(
+                "SELECT r.id, r.created, r.template, r.order_number, "
+                "snippet(responses_fts, 0, '[', ']', '…', 16) "
+                "FROM responses_fts JOIN responses r ON r.id = responses_fts.rowid "
+                "WHERE responses_fts MATCH ? AND (? < 0 OR responses_fts.rowid < ?) "
+                "ORDER BY responses_fts.rowid DESC LIMIT ?",
+                (query, before_id, before_id, limit)
+            )
+        else:
+            # Без FTS5 — медленный поиск подстроки по всем ответам
+            pattern = f"%{text.strip()}%"
+            rows = self._reader.execute(
+                "SELECT id, created, template, order_number, substr(response, 1, 160) FROM responses "
+                "WHERE (response LIKE ? OR order_number LIKE ? OR labels LIKE ?) AND (? < 0 OR id < ?) "
+                "ORDER BY id DESC LIMIT ?", (pattern, pattern, pattern, before_id, before_id, limit)
+            )
+        return [HistoryEntry(*row) for row in rows]
+
+    def get(self, entry_id: int):
+        """Полная запись: (шаблон, поля, ответ) или None."""
+        if not self.ready:
+            return None
+        row = self._reader.execute(
+            "SELECT template, fields, response FROM responses WHERE id = ?", (entry_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def _write_loop(self):
+        if not self._ready.is_set():
+            self._prepare()
+        connection = None
+        while True:
+            item = self._queue.get()
+            batch = []
+            # Всё, что накопилось в очереди, пишется одной транзакцией
+            while item is not None:
+                batch.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                # Названия полей разбираются здесь, а не в потоке окна
+                rows = [(created, template, order_number, key, json.dumps(fields, ensure_ascii=False),
+                         response, field_labels(fields))
+                        for created, template, order_number, key, fields, response in batch]
+                try:
+                    if connection is None:
+                        connection = connect(self.path)
+                    # Транзакция откатывается при ошибке; пачка теряется, поток продолжает работу
+                    with connection:
+                        connection.executemany(
+                            "INSERT INTO responses (created, template, order_number, input_hash, fields, "
+                            "response, labels) VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+                        )
+                except sqlite3.Error as e:
+                    self.write_errors += 1
+                    if sys.stderr is not None:
+                        print(f"История: не удалось записать {len(rows)} ответов: {e}", file=sys.stderr)
+            if item is None:
+                if connection is not None:
+                    connection.close()
+                return
+
+    def flush(self):
+        """Дожидается записи всего, что уже стоит в очереди."""
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        if self._reader is not None:
+            self._reader.close()
+
+
+_history = None
+
+
+def get_history() -> HistoryStore:
+    """Общая история приложения; записи дописываются при выходе."""
+    global _history
+    if _history is None:
+        _history = HistoryStore()
+        atexit.register(_history.close)
+    return _history
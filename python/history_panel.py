@@ -0,0 +1,122 @@
+# history_panel.py
+"""Окно поиска по истории ответов.
+
+Поиск идёт по мере набора (после паузы), результаты подгружаются
+страницами при прокрутке списка до конца.
+"""
+import time
+
+from PyQt5 import QtWidgets, QtCore
+
+from history import PAGE_SIZE
+
+SEARCH_DELAY_MS = 200
+# Пауза перед повтором поиска, пока база истории готовится
+HISTORY_RETRY_MS = 300
+ENTRY_ID_ROLE = QtCore.Qt.UserRole
+
+
+class HistoryDialog(QtWidgets.QDialog):
+    def __init__(self, history, main_tab, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.main_tab = main_tab
+        self.query = ""
+        self.last_id = None
+        self.exhausted = True
+        self.setWindowTitle("🕘 История ответов")
+        self.resize(760, 560)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        self.search_input = QtWidgets.QLineEdit()
+        self.search_input.setPlaceholderText("Номер заказа, слова из ответа или названия полей...")
+        layout.addWidget(self.search_input)
+        self.status_label = QtWidgets.QLabel()
+        layout.addWidget(self.status_label)
+
+        splitter = QtWidgets.QSplitter(QtCore.Qt.Vertical)
+        self.results_list = QtWidgets.QListWidget()
+        self.results_list.setWordWrap(True)
+        self.results_list.currentItemChanged.connect(self.show_entry)
+        self.results_list.verticalScrollBar().valueChanged.connect(self.on_scroll)
+        splitter.addWidget(self.results_list)
+        self.response_view = QtWidgets.QPlainTextEdit()
+        self.response_view.setReadOnly(True)
+        splitter.addWidget(self.response_view)
+        layout.addWidget(splitter)
+
+        buttons = QtWidgets.QHBoxLayout()
+        self.copy_btn = QtWidgets.QPushButton("📋 Скопировать ответ")
+        self.copy_btn.clicked.connect(self.copy_entry)
+        buttons.addWidget(self.copy_btn)
+        self.restore_btn = QtWidgets.QPushButton("↩ Вернуть в форму")
+        self.restore_btn.clicked.connect(self.restore_entry)
+        buttons.addWidget(self.restore_btn)
+        layout.addLayout(buttons)
+
+        self.search_timer = QtCore.QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+
+        self.run_search()
+
+    def run_search(self):
+        if self.history.preparing:
+            # База ещё мигрирует в фоне: окно не ждёт, поиск повторится сам
+            self.status_label.setText("История готовится…")
+            QtCore.QTimer.singleShot(HISTORY_RETRY_MS, self.run_search)
+            return
+        self.query = self.search_input.text()
+        self.last_id = None
+        self.exhausted = False
+        self.results_list.clear()
+        self.response_view.clear()
+        started = time.perf_counter()
+        count = self.load_page()
+        elapsed = (time.perf_counter() - started) * 1000
+        more = "" if self.exhausted else "+"
+        self.status_label.setText(f"Найдено: {count}{more} за {elapsed:.0f} мс")
+
+    def load_page(self) -> int:
+        """Добавляет в список следующую страницу результатов."""
+        entries = self.history.search(self.query, PAGE_SIZE, self.last_id)
+        self.exhausted = len(entries) < PAGE_SIZE
+        for entry in entries:
+            created = time.strftime("%d.%m.%Y %H:%M", time.localtime(entry.created))
+            snippet = " ".join(entry.snippet.split())
+            item = QtWidgets.QListWidgetItem(
+                f"{created} · {entry.order_number or '—'} · {entry.template}\n{snippet}"
+            )
+            item.setData(ENTRY_ID_ROLE, entry.id)
+            self.results_list.addItem(item)
+        if entries:
+            self.last_id = entries[-1].id
+        return self.results_list.count()
+
+    def on_scroll(self, value):
+        scroll_bar = self.results_list.verticalScrollBar()
+        if not self.exhausted and value >= scroll_bar.maximum() - 2:
+            count = self.load_page()
+            more = "" if self.exhausted else "+"
+            self.status_label.setText(f"Найдено: {count}{more}")
+
+    def current_entry(self):
+        item = self.results_list.currentItem()
+        return self.history.get(item.data(ENTRY_ID_ROLE)) if item is not None else None
+
+    def show_entry(self, current, previous=None):
+        entry = self.history.get(current.data(ENTRY_ID_ROLE)) if current is not None else None
+        self.response_view.setPlainText(entry[2] if entry is not None else "")
+
+    def copy_entry(self):
+        entry = self.current_entry()
+        if entry is not None:
+            QtWidgets.QApplication.clipboard().setText(entry[2])
+
+    def restore_entry(self):
+        entry = self.current_entry()
+        if entry is not None:
+            self.main_tab.load_history_entry(*entry)
+            self.close()
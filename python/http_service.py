@@ -0,0 +1,273 @@
+# http_service.py
+"""Локальный HTTP-сервис генерации ответов на asyncio, без сторонних пакетов.
+
+Запуск:  python work.py --serve [--host 127.0.0.1] [--port 8765] [--workers N]
+
+    GET  /health      — {"status": "ok"}
+    GET  /templates   — названия шаблонов, их типы и поля
+    POST /generate    — {"template": ..., поля окна} -> {"response": ...}
+    POST /batch       — {"template": по умолчанию, "records": [...]} -> {"results": [...]}
+
+Поля те же, что у batch_cli и окна: order_number, price_text, calc_text,
+done, total, payment1, payment2. Соединения по умолчанию постоянные
+(HTTP/1.1 keep-alive), запросы можно слать конвейером, не дожидаясь
+ответов: они разбираются сразу, выполняются параллельно и возвращаются в
+порядке поступления. Генерация идёт в пуле процессов; одновременно в
+работе не больше workers * 4 заданий, остальные ждут своей очереди.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+from batch_cli import chunked, process_chunk, process_record
+from template_registry import get_registry
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+# Сколько запросов одного соединения может выполняться, пока первый не отправлен
+MAX_PIPELINE = 32
+BATCH_CHUNK = 64
+IDLE_TIMEOUT = 60
+
+
+class HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _json_body(body: bytes):
+    try:
+        return json.loads(body.decode("utf-8")) if body else {}
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"Некорректный JSON: {e}")
+
+
+def encode_response(status: HTTPStatus, payload, keep_alive: bool) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("ascii") + body
+
+
+async def read_request(reader):
+    """(метод, путь, заголовки, тело) следующего запроса или None, если клиент закрыл соединение."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Запрос оборван")
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Слишком большие заголовки")
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, path, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Некорректная строка запроса")
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    headers[":version"] = version
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HttpError(HTTPStatus.NOT_IMPLEMENTED, "Chunked-тело не поддерживается, нужен Content-Length")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Некорректный Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Слишком большое тело запроса")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path.split("?", 1)[0], headers, body
+
+
+def wants_keep_alive(headers: dict) -> bool:
+    connection = headers.get("connection", "").lower()
+    if headers.get(":version") == "HTTP/1.0":
+        return connection == "keep-alive"
+    return connection != "close"
+
+
+class GenerationService:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+        self.slots = asyncio.Semaphore(max(workers, 1) * 4)
+
+    async def run(self, func, *args):
+        """Выполняет func в пуле (или сразу, если пула нет), не больше заданного числа одновременно."""
+        if self.pool is None:
+            return func(*args)
+        async with self.slots:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, func, *args)
+
+    def templates(self) -> list:
+        registry = get_registry()
+        return [
+            {"name": name, "kind": registry.get(name).kind, "fields": sorted(registry.get(name).fields)}
+            for name in registry.names()
+        ]
+
+    async def handle(self, method: str, path: str, body: bytes):
+        """(статус, тело ответа) для одного запроса."""
+        if path == "/health" and method == "GET":
+            return HTTPStatus.OK, {"status": "ok"}
+        if path == "/templates" and method == "GET":
+            return HTTPStatus.OK, {"templates": self.templates()}
+        if path == "/generate" and method == "POST":
+            record = _json_body(body)
+            if not isinstance(record, dict):
+                raise HttpError(HTTPStatus.BAD_REQUEST, "Ожидается JSON-объект")
+            result = await self.run(process_record, record)
+            status = HTTPStatus.UNPROCESSABLE_ENTITY if result["error"] else HTTPStatus.OK
+            return status, result
+        if path == "/batch" and method == "POST":
+            payload = _json_body(body)
+            records = payload.get("records") if isinstance(payload, dict) else None
+            if not isinstance(records, list):
+                raise HttpError(HTTPStatus.BAD_REQUEST, "Ожидается {\"records\": [...]}")
+            template = payload.get("template")
+            chunks = await asyncio.gather(*(
+                self.run(process_chunk, chunk, template) for chunk in chunked(records, BATCH_CHUNK)
+            ))
+            return HTTPStatus.OK, {"results": [result for chunk in chunks for result in chunk]}
+        if path in ("/health", "/templates", "/generate", "/batch"):
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, f"Метод {method} не поддерживается для {path}")
+        raise HttpError(HTTPStatus.NOT_FOUND, f"Нет такого адреса: {path}")
+
+    async def respond(self, method, path, body, keep_alive):
+        """(готовый ответ в байтах, оставить ли соединение открытым)."""
+        try:
+            status, payload = await self.handle(method, path, body)
+        except HttpError as e:
+            status, payload = e.status, {"error": e.message}
+        except Exception as e:
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+        return encode_response(status, payload, keep_alive), keep_alive
+
+    async def serve_connection(self, reader, writer):
+        """Читает запросы конвейером и пишет ответы в том же порядке.
+
+        Если отправка ответов оборвалась (клиент сбросил соединение), чтение
+        прекращается сразу: ожидание места в полной очереди и следующего
+        запроса идёт вместе с ожиданием отправителя, а невыполненные запросы
+        отменяются и освобождают места в пуле.
+        """
+        responses = asyncio.Queue(MAX_PIPELINE)
+
+        async def send_responses():
+            while True:
+                task = await responses.get()
+                if task is None:
+                    return
+                data, keep_alive = await task
+                writer.write(data)
+                await writer.drain()
+                if not keep_alive:
+                    return
+
+        sender = asyncio.ensure_future(send_responses())
+
+        async def until_sender_done(awaitable):
+            """Результат awaitable или None, если отправитель остановился раньше."""
+            waiter = asyncio.ensure_future(awaitable)
+            await asyncio.wait((waiter, sender), return_when=asyncio.FIRST_COMPLETED)
+            if not waiter.done():
+                waiter.cancel()
+                return None
+            return (waiter.result(),)
+
+        try:
+            while not sender.done():
+                try:
+                    read = await until_sender_done(asyncio.wait_for(read_request(reader), IDLE_TIMEOUT))
+                except HttpError as e:
+                    await until_sender_done(responses.put(
+                        _ready(encode_response(e.status, {"error": e.message}, False), False)))
+                    break
+                except (asyncio.TimeoutError, ConnectionError):
+                    break
+                if read is None or read[0] is None:
+                    break
+                method, path, headers, body = read[0]
+                keep_alive = wants_keep_alive(headers)
+                task = asyncio.ensure_future(self.respond(method, path, body, keep_alive))
+                if await until_sender_done(responses.put(task)) is None:
+                    task.cancel()
+                    break
+                if not keep_alive:
+                    break
+            if await until_sender_done(responses.put(None)) is not None:
+                await sender
+        except ConnectionError:
+            pass
+        finally:
+            sender.cancel()
+            while not responses.empty():
+                task = responses.get_nowait()
+                if task is not None:
+                    task.cancel()
+            writer.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def _ready(data: bytes, keep_alive: bool):
+    future = asyncio.get_running_loop().create_future()
+    future.set_result((data, keep_alive))
+    return future
+
+
+async def serve(host: str, port: int, workers: int):
+    service = GenerationService(workers)
+    server = await asyncio.start_server(service.serve_connection, host, port, limit=MAX_HEADER_BYTES)
+    if sys.stderr is not None:
+        mode = f"пул из {workers} процессов" if workers > 0 else "без пула"
+        print(f"Сервис ответов слушает http://{host}:{port} ({mode})", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP-сервис генерации ответов")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="процессов в пуле генерации; 0 — генерировать в цикле событий")
+    args = parser.parse_args(argv)
+    # Шаблоны читаются до первого запроса, чтобы ошибки в них были видны сразу
+    get_registry().refresh(force=True)
+    started = time.perf_counter()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+    if sys.stderr is not None:
+        print(f"Сервис остановлен, работал {time.perf_counter() - started:.0f} с", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+# incremental.py
+"""Инкрементальный разбор блока стоимости для живого предпросмотра.
+
+Лексер прогоняется только по изменённым строкам: для остальных хранится
+готовый результат. Склейка «название + сумма» и сбор PriceLine идут по
+кэшу, и пары, которые не менялись, берутся оттуда же. Модуль не зависит от
+Qt: окно сообщает, какие строки заменены, через replace_lines.
+"""
+from lexer import lex_line, pair_groups
+from money import PriceLine
+from utils import normalize_comment
+
+
+class IncrementalPriceParser:
+    """Кэш разбора текста по строкам."""
+
+    def __init__(self, text: str = ""):
+        self.lines = []  # кортеж групп лексера для каждой строки
+        self._records = {}  # (название, сумма, комментарий) -> PriceLine
+        self.set_text(text)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def set_text(self, text: str):
+        """Разбирает текст заново целиком."""
+        self.lines = [lex_line(line) for line in text.split("\n")]
+
+    def replace_lines(self, first: int, old_end: int, new_lines: list):
+        """Заменяет строки [first, old_end) новыми и разбирает только их."""
+        if not 0 <= first <= old_end <= len(self.lines):
+            raise IndexError(f"Строки {first}–{old_end} вне текста из {len(self.lines)} строк")
+        self.lines[first:old_end] = [lex_line(line) for line in new_lines]
+
+    def _groups(self):
+        for groups in self.lines:
+            yield from groups
+
+    def records(self) -> dict:
+        """Строки стоимости, как parse_price_records для всего текста."""
+        cache = self._records
+        fresh = {}
+        result = {}
+        for triple in pair_groups(self._groups()):
+            line = cache.get(triple)
+            if line is None:
+                field, val, comment = triple
+                line = PriceLine(field, val, normalize_comment(comment))
+            fresh[triple] = line
+            result[triple[0]] = line
+        # Кэш держит только пары текущего текста
+        self._records = fresh
+        return result
@@ -0,0 +1,109 @@
+# info_index.py
+"""Инвертированный индекс разделов справки для поиска во вкладке InfoTab.
+
+Текст раздела разбивается на слова один раз при добавлении. Слово запроса
+совпадает с любым словом раздела, которое с него начинается: «дост» находит
+«доставка» и «доставки». Если таких слов нет, ищутся слова, внутри которых
+оно стоит («ставк» → «доставка»). Раздел подходит, если в нём нашлись все
+слова запроса; если не подошёл ни один, запрос ищется в текстах разделов
+как подстрока, как до индекса. Модуль не зависит от Qt.
+"""
+import bisect
+import re
+from collections import defaultdict
+
+_WORD_RE = re.compile(r"\w+")
+
+# Веса для ранжирования: слово в заголовке важнее слова в тексте,
+# полное совпадение слова важнее совпадения по началу
+TITLE_WEIGHT = 3
+CONTENT_WEIGHT = 1
+EXACT_BONUS = 2
+PHRASE_BONUS = 5
+
+
+def tokenize(text: str) -> list:
+    return _WORD_RE.findall(text.lower())
+
+
+class InfoIndex:
+    """Индекс «слово → разделы» с поиском по началу слова."""
+
+    def __init__(self):
+        self._postings = defaultdict(dict)  # слово -> {номер раздела: вес}
+        self._words = []  # отсортированные слова для поиска по префиксу
+        self._texts = []  # заголовок и текст в нижнем регистре
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, title: str, content: str) -> int:
+        """Индексирует раздел и возвращает его номер."""
+        doc_id = len(self._texts)
+        title_lower = title.lower()
+        content_lower = content.lower()
+        self._texts.append(title_lower + "\n" + content_lower)
+        for words, weight in ((_WORD_RE.findall(title_lower), TITLE_WEIGHT),
+                              (_WORD_RE.findall(content_lower), CONTENT_WEIGHT)):
+            for word in words:
+                postings = self._postings[word]
+                postings[doc_id] = postings.get(doc_id, 0) + weight
+        self._dirty = True
+        return doc_id
+
+    def _sorted_words(self) -> list:
+        if self._dirty:
+            self._words = sorted(self._postings)
+            self._dirty = False
+        return self._words
+
+    def _prefix_words(self, prefix: str):
+        self._sorted_words()
+        start = bisect.bisect_left(self._words, prefix)
+        for word in self._words[start:]:
+            if not word.startswith(prefix):
+                break
+            yield word
+
+    def _infix_words(self, term: str) -> list:
+        """Слова, внутри которых стоит term; полный проход по словарю, только когда по началу ничего нет."""
+        return [word for word in self._sorted_words() if term in word]
+
+    def _substring_search(self, query: str) -> list:
+        return [doc_id for doc_id, text in enumerate(self._texts) if query in text]
+
+    def search(self, query: str) -> list:
+        """Номера подходящих разделов от лучших к худшим.
+
+        Пустой запрос подходит ко всем разделам в исходном порядке.
+        """
+        query = query.lower().strip()
+        terms = _WORD_RE.findall(query)
+        if not terms:
+            # Пустой запрос или одни знаки препинания — ищем подстроку, как раньше
+            return self._substring_search(query)
+
+        scores = None
+        for term in dict.fromkeys(terms):
+            term_scores = {}
+            words = list(self._prefix_words(term)) or self._infix_words(term)
+            for word in words:
+                bonus = EXACT_BONUS if word == term else 1
+                for doc_id, weight in self._postings[word].items():
+                    term_scores[doc_id] = term_scores.get(doc_id, 0) + weight * bonus
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc_id: score + term_scores[doc_id]
+                          for doc_id, score in scores.items() if doc_id in term_scores}
+            if not scores:
+                # Например, запрос через границу слов: «ка кур» в «доставка курьером»
+                return self._substring_search(query)
+
+        # Запрос целиком как подстрока — как в прежнем поиске — поднимает раздел выше
+        if len(terms) > 1:
+            for doc_id in scores:
+                if query in self._texts[doc_id]:
+                    scores[doc_id] += PHRASE_BONUS
+        return sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))
@@ -0,0 +1,185 @@
+# ingest.py
+"""Чтение больших выгрузок тикетов через mmap.
+
+Файл не читается целиком и не режется на строки. Границы записей ищутся
+прямо в байтах отображения. Декодируется только срез одной записи, и
+записи отдаются по одной, по мере чтения. Страницы, которые уже прочитаны,
+возвращаются системе, поэтому пиковое потребление памяти не зависит от
+размера файла.
+
+Форматы:
+    jsonl  — запись на строку, граница — b"\n";
+    orders — текстовая выгрузка заказов (как order_split.split_orders),
+             граница — начало строки-заголовка «Заказ № …».
+
+byte_ranges делит файл на диапазоны, выровненные по границам записей,
+чтобы каждый процесс пула сам читал свой кусок через iter_records.
+"""
+import json
+import mmap
+import os
+import re
+from collections import namedtuple
+
+from order_split import order_number
+
+FORMAT_JSONL = "jsonl"
+FORMAT_ORDERS = "orders"
+FORMATS = (FORMAT_JSONL, FORMAT_ORDERS)
+
+RANGE_BYTES = 8 * 1024 * 1024
+# Сколько прочитанных байт копится перед возвратом страниц системе
+RELEASE_BYTES = 32 * 1024 * 1024
+
+# Кандидат в заголовок заказа: строка со знаком № или из 32 шестнадцатеричных
+# символов. Окончательно строку проверяет order_number после декодирования.
+_HEADER_CANDIDATE_RE = re.compile(rb"^[^\n]*\xe2\x84\x96[^\n]*|^[ \t]*[0-9a-fA-F]{32}[ \t\r]*$", re.MULTILINE)
+
+# Строка JSONL, из которой не получилась запись: номер строки в файле и причина
+BadRecord = namedtuple("BadRecord", "line error")
+
+
+def parse_jsonl_line(line, number: int):
+    """Запись из строки JSONL или BadRecord, если строка не JSON-объект."""
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return BadRecord(number, f"некорректный JSON: {e}")
+    if not isinstance(record, dict):
+        return BadRecord(number, f"запись не объект JSON, а {type(record).__name__}")
+    return record
+
+
+class MappedFile:
+    """Файл, отображённый в память только для чтения. Пустой файл — пустые байты."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+        self.buf = b""
+
+    def __enter__(self):
+        self.file = open(self.path, "rb")
+        if os.fstat(self.file.fileno()).st_size:
+            self.buf = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(self.buf, "madvise"):
+                self.buf.madvise(mmap.MADV_SEQUENTIAL)
+        return self
+
+    def __exit__(self, *exc):
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+        self.file.close()
+
+    def __len__(self):
+        return len(self.buf)
+
+    def release(self, start: int, end: int):
+        """Отдаёт системе страницы отображения в [start, end), если платформа это умеет."""
+        if not isinstance(self.buf, mmap.mmap) or not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        start -= start % mmap.PAGESIZE
+        end -= end % mmap.PAGESIZE
+        if end > start:
+            self.buf.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+
+def _line_end(buf, pos: int, end: int) -> int:
+    """Позиция после перевода строки, которой заканчивается строка с pos (или end)."""
+    found = buf.find(b"\n", pos, end)
+    return end if found < 0 else found + 1
+
+
+def _headers(buf, start: int, end: int):
+    """Начала строк-заголовков заказов в [start, end)."""
+    for m in _HEADER_CANDIDATE_RE.finditer(buf, start, end):
+        if order_number(buf[m.start():m.end()].decode("utf-8", "replace")) is not None:
+            yield m.start()
+
+
+def _next_boundary(buf, pos: int, fmt: str) -> int:
+    """Первая граница записи не раньше pos."""
+    size = len(buf)
+    if pos <= 0:
+        return 0
+    if buf[pos - 1:pos] != b"\n":
+        pos = _line_end(buf, pos, size)
+    if fmt == FORMAT_JSONL:
+        return pos
+    return next(_headers(buf, pos, size), size)
+
+
+def byte_ranges(path: str, fmt: str, range_bytes: int = RANGE_BYTES):
+    """Отдаёт (start, end) — куски файла примерно по range_bytes, выровненные по записям."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки: {fmt}")
+    with MappedFile(path) as mapped:
+        size = len(mapped)
+        start = 0
+        while start < size:
+            end = _next_boundary(mapped.buf, start + range_bytes, fmt) if start + range_bytes < size else size
+            yield start, end
+            start = end
+
+
+def iter_records(path: str, fmt: str, start: int = 0, end: int = None):
+    """Записи из диапазона [start, end) файла; диапазон должен начинаться на границе записи."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки: {fmt}")
+    with MappedFile(path) as mapped:
+        end = len(mapped) if end is None else min(end, len(mapped))
+        reader = _jsonl_records if fmt == FORMAT_JSONL else _order_records
+        released = start
+        for pos, record in reader(mapped.buf, start, end):
+            yield record
+            if pos - released >= RELEASE_BYTES:
+                mapped.release(released, pos)
+                released = pos
+
+
+def _count_lines(buf, end: int) -> int:
+    """Число переводов строк в buf[:end], по кускам RANGE_BYTES: у mmap нет count."""
+    return sum(buf[pos:min(pos + RANGE_BYTES, end)].count(b"\n") for pos in range(0, end, RANGE_BYTES))
+
+
+def _jsonl_records(buf, start: int, end: int):
+    pos = start
+    # Номер первой строки диапазона считается только при первой битой записи
+    first_line = None
+    offset = 0
+    while pos < end:
+        next_pos = _line_end(buf, pos, end)
+        line = buf[pos:next_pos]
+        if line.strip():
+            try:
+                record = json.loads(line.decode("utf-8"))
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                if first_line is None:
+                    first_line = _count_lines(buf, start) + 1
+                record = parse_jsonl_line(line, first_line + offset)
+            yield next_pos, record
+        offset += 1
+        pos = next_pos
+
+
+def _order_records(buf, start: int, end: int):
+    headers = _headers(buf, start, end)
+    first = next(headers, end)
+    if start == 0 and buf[start:first].strip():
+        yield first, _order_record("", buf[start:first], 1)
+    pos = first
+    while pos < end:
+        body_start = _line_end(buf, pos, end)
+        number = order_number(buf[pos:body_start].decode("utf-8"))
+        pos = next(headers, end)
+        yield pos, _order_record(number, buf[body_start:pos], 0)
+
+
+def _order_record(number: str, block: bytes, index: int) -> dict:
+    """Запись в том же виде, что у split_orders."""
+    text = block.decode("utf-8")
+    if text and not text.endswith("\n"):
+        text += "\n"
+    return {"id": number or f"#{index}", "order_number": number, "price_text": text}
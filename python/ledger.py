@@ -0,0 +1,170 @@
+# ledger.py
+"""Поиск оплат частями в ведомости водителя и готовые ответы «Оплата частями».
+
+Ведомость — CSV (разделитель «,», «;» или табуляция определяется сам) или
+JSONL. Колонки ищутся по названиям без учёта регистра (см. ORDER_COLUMNS,
+DATETIME_COLUMNS, TIME_COLUMNS, AMOUNT_COLUMNS): номер заказа, дата и время
+(одной колонкой или двумя) и сумма. Строки без номера заказа и с
+неположительной суммой (комиссии, списания) пропускаются.
+
+Строки группируются по заказу хеш-таблицей за один проход. С --sorted
+ведомость считается уже отсортированной по заказу: группы собираются из
+соседних строк, и в памяти держится только текущий заказ. Части каждого
+заказа упорядочиваются по времени зачисления; заказ попадает в результат,
+если частей не меньше --min-parts.
+
+Пример:
+    python ledger.py ledger.csv -o answers.jsonl
+    python ledger.py ledger.csv --sorted --min-parts 3 -o answers.csv
+"""
+import argparse
+import sys
+import time
+from itertools import groupby
+from operator import itemgetter
+
+from batch_cli import ExportError, detect_format, find_column, read_export, write_results
+from engine import format_payment_datetime, parse_payment_datetime, render_split_parts, templates_of_kind
+from money import format_rubles, to_kopecks
+from template_registry import get_registry, KIND_SPLIT_PAYMENT
+
+ORDER_COLUMNS = ("order_number", "order", "номер заказа", "заказ", "id заказа")
+DATETIME_COLUMNS = ("datetime", "дата и время", "дата", "date")
+TIME_COLUMNS = ("time", "время")
+AMOUNT_COLUMNS = ("amount", "сумма", "сумма, ₽")
+
+
+class SplitPayment:
+    """Заказ, оплаченный частями: parts — [(время как кортеж, сумма в копейках), ...] по времени."""
+
+    __slots__ = ("order_number", "parts")
+
+    def __init__(self, order_number: str, parts: list):
+        self.order_number = order_number
+        self.parts = parts
+
+    def blocks(self) -> list:
+        """Части в виде, который принимает render_split_parts: [(дата, сумма), ...]."""
+        return [(format_payment_datetime(moment), format_rubles(kopecks)) for moment, kopecks in self.parts]
+
+
+def _amount_kopecks(text: str) -> int:
+    """«1 234,50 ₽», «-148», «148.5» → копейки со знаком."""
+    text = text.replace(" ", "").replace(" ", "").replace("₽", "").replace(",", ".")
+    if text.startswith("-"):
+        return -to_kopecks(text[1:])
+    return to_kopecks(text.lstrip("+"))
+
+
+def _normalize_datetime(text: str) -> str:
+    """«26.09.2025 21:19:41» → «26.09.2025, 21:19:41», формат бланка шаблона."""
+    if len(text) == 19 and text[10] == " ":
+        return f"{text[:10]}, {text[11:]}"
+    return text
+
+
+def ledger_rows(records, skipped: list = None):
+    """Отдаёт (заказ, время, копейки) из записей ведомости; негодные строки — в skipped."""
+    columns = None
+    for line, record in enumerate(records, 1):
+        if columns is None:
+            columns = (
+                find_column(record, ORDER_COLUMNS),
+                find_column(record, DATETIME_COLUMNS),
+                find_column(record, TIME_COLUMNS, required=False),
+                find_column(record, AMOUNT_COLUMNS),
+            )
+        order_key, datetime_key, time_key, amount_key = columns
+        order = str(record.get(order_key) or "").strip()
+        if not order:
+            continue
+        moment = str(record.get(datetime_key) or "").strip()
+        if time_key is not None:
+            moment = f"{moment}, {str(record.get(time_key) or '').strip()}"
+        try:
+            kopecks = _amount_kopecks(str(record.get(amount_key) or ""))
+            if kopecks <= 0:
+                continue
+            yield order, parse_payment_datetime(_normalize_datetime(moment)), kopecks
+        except ValueError as e:
+            if skipped is not None:
+                skipped.append((line, str(e)))
+
+
+def match_splits(rows, min_parts: int = 2, presorted: bool = False):
+    """Отдаёт SplitPayment для заказов, у которых в ведомости не меньше min_parts зачислений.
+
+    Без presorted — хеш-группировка (порядок заказов — по первому появлению),
+    с presorted — слияние соседних строк уже отсортированной ведомости.
+    """
+    if presorted:
+        groups = ((order, [row[1:] for row in group]) for order, group in groupby(rows, key=itemgetter(0)))
+    else:
+        by_order = {}
+        for order, moment, kopecks in rows:
+            parts = by_order.get(order)
+            if parts is None:
+                by_order[order] = [(moment, kopecks)]
+            else:
+                parts.append((moment, kopecks))
+        groups = by_order.items()
+    for order, parts in groups:
+        if len(parts) >= min_parts:
+            parts.sort(key=itemgetter(0))
+            yield SplitPayment(order, parts)
+
+
+def render_splits(matches, template_name: str = None):
+    """Готовые ответы в формате результатов batch_cli: id, template, response, error."""
+    template_name = template_name or templates_of_kind(KIND_SPLIT_PAYMENT)[0]
+    template = get_registry().get(template_name)
+    for match in matches:
+        result = {"id": match.order_number, "template": template_name, "response": "", "error": ""}
+        try:
+            result["response"] = render_split_parts(template, match.blocks())
+        except Exception as e:
+            result["error"] = str(e)
+        yield result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ответы «Оплата частями» по ведомости водителя")
+    parser.add_argument("input", help="ведомость CSV/JSONL или '-' для stdin")
+    parser.add_argument("-o", "--output", default="-", help="файл результата или '-' для stdout")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="формат ведомости (по умолчанию по расширению)")
+    parser.add_argument("--output-format", choices=["jsonl", "csv"], help="формат результата (по умолчанию по расширению)")
+    parser.add_argument("--template", choices=templates_of_kind(KIND_SPLIT_PAYMENT), help="шаблон ответа")
+    parser.add_argument("--min-parts", type=int, default=2, help="минимум частей оплаты (по умолчанию 2)")
+    parser.add_argument("--sorted", action="store_true", help="ведомость уже отсортирована по номеру заказа")
+    args = parser.parse_args(argv)
+
+    in_format = args.format or detect_format(args.input)
+    out_format = args.output_format or detect_format(args.output)
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8-sig", newline="")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    skipped = []
+    try:
+        started = time.perf_counter()
+        rows = ledger_rows(read_export(source, in_format, skipped), skipped)
+        matches = match_splits(rows, max(args.min_parts, 2), args.sorted)
+        count = write_results(render_splits(matches, args.template), target, out_format)
+        elapsed = time.perf_counter() - started
+    except ExportError as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    print(f"Заказов с оплатой частями: {count} за {elapsed:.2f} с", file=sys.stderr)
+    for line, error in skipped[:10]:
+        print(f"  запись {line} пропущена: {error}", file=sys.stderr)
+    if len(skipped) > 10:
+        print(f"  ... и ещё {len(skipped) - 10} записей", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
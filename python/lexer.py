@@ -0,0 +1,137 @@
+# lexer.py
+"""Однопроходный лексер блока стоимости, вставленного из админки.
+
+Весь текст проходится одним заранее скомпилированным выражением; каждое
+совпадение — одна непустая строка, уже классифицированная:
+
+    amount   — строка с суммой: «100 ₽ (за 5 мин.)»
+    priced   — название и сумма в одной строке: «Подача 100 ₽»
+    label    — всё остальное (название поля, дата и т. п.)
+
+Значения «Отмены батча» (расчётное расстояние и время) ищутся не по токенам,
+а двумя отдельными выражениями — см. route_values.
+"""
+import re
+from collections import namedtuple
+
+TOKEN_AMOUNT = "amount"
+TOKEN_PRICED = "priced"
+TOKEN_LABEL = "label"
+
+# text — строка без пробелов по краям, label — название поля,
+# value — сумма, comment — текст в скобках
+Token = namedtuple("Token", "kind text label value comment")
+
+# Пробел внутри строки: выражение работает по всему тексту сразу,
+# поэтому \s не должен захватывать перевод строки
+_SP = r"[^\S\n]"
+_AMOUNT = rf"\d+\.?\d*{_SP}*₽"
+
+# Номера групп в Match.groups(); группа строки захватывает её вместе с пробелами
+# в конце — их дешевле убрать rstrip() там, где текст строки действительно нужен
+_TEXT, _AMOUNT_VALUE, _AMOUNT_COMMENT, _LABEL, _PRICED_VALUE, _PRICED_COMMENT = range(6)
+
+_TOKEN_RE = re.compile(
+    rf"{_SP}*(?=\S)("
+    rf"(?:({_AMOUNT})(?:{_SP}*\((.+)\))?"
+    rf"|(?=[^₽\n]*₽)(.+?){_SP}+({_AMOUNT})(?:{_SP}*\((.+)\))?"
+    rf"|)[^\n]*)"
+)
+
+# Разрывы строк, которые понимает str.splitlines, а выражение выше — нет
+_LINE_BREAKS_RE = re.compile("[\r\x0b\x0c\x1c\x1d\x1e\x85  ]")
+
+# Разбор «название сумма (комментарий)» для строк, которые лексер отнёс к другим типам
+_PRICED_RE = re.compile(r"(.+?)\s+(\d+\.?\d*\s*₽)(?:\s*\((.+)\))?")
+# Поиск значений «Отмены батча» по всему блоку: значение может стоять через
+# несколько пустых строк, после разделителя в начале следующей строки или
+# вплотную к другому заголовку, а одиночный разделитель без значения даёт «»
+_ROUTE_DISTANCE_RE = re.compile(r"Расч[её]тное расстояние\s*[:\-]?\s*[\r\n]*\s*([\d.,]+)\s*(км|м)\b", re.IGNORECASE)
+_ROUTE_DURATION_RE = re.compile(r"Расч[её]тное время\s*[:\-]?\s*[\r\n]*\s*(.+)", re.IGNORECASE)
+
+
+def iter_groups(text: str):
+    """Отдаёт сырые группы совпадения для каждой непустой строки текста."""
+    if _LINE_BREAKS_RE.search(text):
+        text = "\n".join(text.splitlines())
+    return map(re.Match.groups, _TOKEN_RE.finditer(text))
+
+
+def lex_line(line: str) -> tuple:
+    """Группы совпадений одной строки: пустой кортеж для пустой строки.
+
+    Строка с необычными разрывами (\r, \x0c и т. п.) может дать несколько групп.
+    """
+    if _LINE_BREAKS_RE.search(line):
+        return tuple(iter_groups(line))
+    m = _TOKEN_RE.match(line)
+    return (m.groups(),) if m is not None else ()
+
+
+def _make_token(g) -> Token:
+    text = g[_TEXT].rstrip()
+    if g[_AMOUNT_VALUE] is not None:
+        return Token(TOKEN_AMOUNT, text, "", g[_AMOUNT_VALUE], (g[_AMOUNT_COMMENT] or "").strip())
+    if g[_PRICED_VALUE] is not None:
+        return Token(TOKEN_PRICED, text, g[_LABEL].strip(), g[_PRICED_VALUE], (g[_PRICED_COMMENT] or "").strip())
+    return Token(TOKEN_LABEL, text, text, "", "")
+
+
+def iter_tokens(text: str):
+    """Лениво отдаёт токены непустых строк текста."""
+    return map(_make_token, iter_groups(text))
+
+
+def _priced_groups(g):
+    """(название, сумма, комментарий) строки с названием и суммой или None."""
+    if g[_PRICED_VALUE] is not None:
+        return g[_LABEL].strip(), g[_PRICED_VALUE], g[_PRICED_COMMENT] or ""
+    if g[_AMOUNT_VALUE] is None:
+        return None
+    # Строка-сумма тоже может оказаться «названием с суммой»
+    m = _PRICED_RE.match(g[_TEXT])
+    if m is None:
+        return None
+    return m.group(1).strip(), m.group(2).strip(), m.group(3) or ""
+
+
+def iter_price_pairs(text: str):
+    """Отдаёт тройки (название, сумма, комментарий) блока стоимости.
+
+    Строка с названием объединяется со следующей строкой-суммой; иначе
+    строка разбирается как «название сумма (комментарий)». Комментарий
+    возвращается как есть, без нормализации.
+    """
+    return pair_groups(iter_groups(text))
+
+
+def pair_groups(groups):
+    """То же, что iter_price_pairs, но по уже готовым группам строк."""
+    pending = None
+    for g in groups:
+        if pending is not None:
+            if g[_AMOUNT_VALUE] is not None:
+                yield pending[_TEXT].rstrip(), g[_AMOUNT_VALUE], g[_AMOUNT_COMMENT] or ""
+                pending = None
+                continue
+            parts = _priced_groups(pending)
+            if parts:
+                yield parts
+        pending = g
+    if pending is not None:
+        parts = _priced_groups(pending)
+        if parts:
+            yield parts
+
+
+def route_values(text: str):
+    """Достаёт расчётное расстояние и время из блока мультизаказа.
+
+    Возвращает пару (расстояние, время); не найденное значение — None.
+    Два поиска по короткому блоку дешевле, чем токены всех его строк.
+    """
+    m = _ROUTE_DISTANCE_RE.search(text)
+    distance = f"{m.group(1)} {m.group(2)}" if m else None
+    m = _ROUTE_DURATION_RE.search(text)
+    duration = m.group(1).strip() if m else ""
+    return distance, duration or None
@@ -1,13 +1,21 @@
 import random
-import re
+
 from PyQt5 import QtWidgets, QtCore, QtGui
-from constants import TEMPLATES
-from utils import parse_price_lines, format_line, sum_ruble_digits, normalize_comment, resource_path
+from classifier import classify
+from engine import (generate, parse_time_to_minutes, render_regular_records, template_kind,
+                    template_names, templates_of_kind, KIND_BATCH_CANCEL, KIND_SPLIT_PAYMENT)
+from gif_cache import AnimationCache, FramePlayer
+from incremental import IncrementalPriceParser
+from template_registry import get_registry
+from tracing import span
+
+PREVIEW_DELAY_MS = 250
 
 
 class MainTab(QtWidgets.QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
+        self._history = None
         self.init_ui()
 
     def init_ui(self):
@@ -15,17 +23,23 @@ class MainTab(QtWidgets.QWidget):
 
         # --- выбор шаблона ---
         self.template_box = QtWidgets.QComboBox()
-        self.template_box.addItems(list(TEMPLATES.keys()))
+        self.template_box.addItems(template_names())
         self.template_box.currentTextChanged.connect(self.on_template_change)
         layout.addWidget(QtWidgets.QLabel("Выберите шаблон:"))
         layout.addWidget(self.template_box)
 
+        # --- вставка из буфера с определением шаблона ---
+        self.paste_btn = QtWidgets.QPushButton("📥 Вставить и определить шаблон")
+        self.paste_btn.clicked.connect(self.paste_and_detect)
+        layout.addWidget(self.paste_btn)
+
         # --- контейнер для обычных шаблонов ---
         self.common_container = QtWidgets.QWidget()
         common_layout = QtWidgets.QVBoxLayout(self.common_container)
         common_layout.addWidget(QtWidgets.QLabel("Номер заказа:"))
         self.order_input = QtWidgets.QLineEdit()
         self.order_input.setPlaceholderText("Введите номер заказа...")
+        self.order_input.editingFinished.connect(self.restore_from_history)
         common_layout.addWidget(self.order_input)
 
         common_layout.addWidget(QtWidgets.QLabel("Данные о стоимости:"))
@@ -35,6 +49,15 @@ class MainTab(QtWidgets.QWidget):
         )
         common_layout.addWidget(self.price_input)
 
+        self.multi_order_check = QtWidgets.QCheckBox("Несколько заказов в одной вставке (строки «Заказ № …»)")
+        self.multi_order_check.toggled.connect(self.schedule_preview)
+        common_layout.addWidget(self.multi_order_check)
+
+        # Разбор стоимости обновляется только по изменённым строкам документа
+        self.price_parser = IncrementalPriceParser()
+        self._price_line_count = 1
+        self.price_input.document().contentsChange.connect(self.on_price_change)
+
         # --- контейнер для мультизаказа ---
         self.multi_container = QtWidgets.QWidget()
         multi_layout = QtWidgets.QVBoxLayout(self.multi_container)
@@ -87,6 +110,13 @@ class MainTab(QtWidgets.QWidget):
         self.output.setReadOnly(True)
         layout.addWidget(self.output)
 
+        # --- расхождения с тарифом (см. tariffs.py) ---
+        self.tariff_label = QtWidgets.QLabel()
+        self.tariff_label.setWordWrap(True)
+        self.tariff_label.setStyleSheet("color: #d9534f;")
+        self.tariff_label.hide()
+        layout.addWidget(self.tariff_label)
+
         # --- Label для GIF поверх поля результата ---
         self.gif_label = QtWidgets.QLabel(self.output)
         self.gif_label.setAlignment(QtCore.Qt.AlignCenter)
@@ -98,233 +128,246 @@ class MainTab(QtWidgets.QWidget):
         self.copy_btn.clicked.connect(self.copy_result)
         layout.addWidget(self.copy_btn)
 
-        # --- список GIF ---
+        # --- список GIF (имена в пакете ресурсов, см. assets.py) ---
         self.gif_list = [
-            resource_path("gifs/ага.gif"),
-            resource_path("gifs/крыска.gif"),
-            resource_path("gifs/экономика.gif"),
-            resource_path("gifs/Ссыт.gif")
+            "gifs/ага.gif",
+            "gifs/крыска.gif",
+            "gifs/экономика.gif",
+            "gifs/Ссыт.gif"
         ]
+        # Заранее выбирается и декодируется только GIF, который покажут следующим
+        self.gif_cache = AnimationCache(self.gif_list, parent=self)
+        self.gif_cache.frames_ready.connect(self.on_gif_ready)
+        self.next_gif = random.choice(self.gif_list)
+        self.gif_cache.preload([self.next_gif])
+        self.gif_player = FramePlayer(self.gif_label, self)
+        # GIF, ждущая кадров под размер поля: (путь, размер) или None
+        self.gif_waiting = None
+
+        # Кадры под новый размер поля готовятся в фоне, когда размер перестал меняться
+        self.gif_resize_timer = QtCore.QTimer(self)
+        self.gif_resize_timer.setSingleShot(True)
+        self.gif_resize_timer.setInterval(300)
+        self.gif_resize_timer.timeout.connect(lambda: self.gif_cache.prepare(self.output.size(), [self.next_gif]))
+
+        # --- живой предпросмотр: ответ пересобирается после паузы в наборе ---
+        self.preview_timer = QtCore.QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY_MS)
+        self.preview_timer.timeout.connect(self.update_preview)
+        for widget in (self.order_input, self.multi_calc, self.multi_done, self.multi_total,
+                       self.payment1_input, self.payment2_input):
+            widget.textChanged.connect(self.schedule_preview)
 
         # стартовая видимость
         self.on_template_change(self.template_box.currentText())
 
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.gif_resize_timer.start()
+
+    def show_gif(self, path, size):
+        """Показывает GIF поверх поля результата.
+
+        Кадры GIF берутся только готовые: если под этот размер их ещё нет,
+        они готовятся в фоне, и GIF показывается по сигналу frames_ready.
+        """
+        frames = self.gif_cache.cached(path, size)
+        if frames is None:
+            self.gif_waiting = (path, QtCore.QSize(size))
+            self.gif_cache.prepare(size, [path])
+            return
+        self.gif_waiting = None
+        self.gif_label.setFixedSize(size)  # Лейбл занимает размер поля результата
+        self.gif_player.play(frames, 5000)
+
+    def on_gif_ready(self, path, size):
+        if self.gif_waiting == (path, size) and self.gif_cache.cached(path, size) is not None:
+            self.show_gif(path, size)
+
     def on_template_change(self, template_name):
-        if "Отмена батча" in template_name:
+        kind = template_kind(template_name)
+        if kind == KIND_BATCH_CANCEL:
             self.stack.setCurrentWidget(self.multi_container)
-        elif "Оплата частями" in template_name:
+        elif kind == KIND_SPLIT_PAYMENT:
             self.stack.setCurrentWidget(self.payment_container)
         else:
             self.stack.setCurrentWidget(self.common_container)
+        self.schedule_preview()
+
+    def paste_and_detect(self):
+        """Определяет шаблон по тексту из буфера и раскладывает его по полям"""
+        text = QtWidgets.QApplication.clipboard().text()
+        result = classify(text)
+        candidates = templates_of_kind(result.kind) if result.kind else []
+        if not candidates:
+            QtWidgets.QMessageBox.warning(self, "Не удалось определить шаблон",
+                                          "В буфере нет данных о стоимости, расчёте или пополнениях.")
+            return
+
+        # Если выбранный шаблон того же типа (например, «Подробно»), оставляем его
+        if template_kind(self.template_box.currentText()) != result.kind:
+            self.template_box.setCurrentText(candidates[0])
+
+        fields = result.fields
+        if result.kind == KIND_BATCH_CANCEL:
+            self.multi_calc.setPlainText(fields["calc_text"])
+        elif result.kind == KIND_SPLIT_PAYMENT:
+            self.payment1_input.setPlainText(fields["payment1"])
+            self.payment2_input.setPlainText(fields["payment2"])
+        else:
+            if "order_number" in fields:
+                self.order_input.setText(fields["order_number"])
+            self.price_input.setPlainText(fields["price_text"])
+
+    def on_price_change(self, position, removed, added):
+        """Переразбирает только строки, которых коснулось изменение"""
+        document = self.price_input.document()
+        line_count = document.blockCount()
+        first = document.findBlock(position).blockNumber()
+        last_block = document.findBlock(position + added)
+        last = last_block.blockNumber() if last_block.isValid() else line_count - 1
+        # Изменение строк [first, old_end) дало строки [first, last]
+        old_end = last + 1 - (line_count - self._price_line_count)
+        self._price_line_count = line_count
+
+        if first < 0 or not first <= old_end <= len(self.price_parser):
+            self.price_parser.set_text(self.price_input.toPlainText())
+        else:
+            self.price_parser.replace_lines(
+                first, old_end, [document.findBlockByNumber(i).text() for i in range(first, last + 1)]
+            )
+        self.schedule_preview()
 
-    def generate_result(self):
-        try:
-            template_name = self.template_box.currentText()
-            template_text = TEMPLATES[template_name]
-
-            if "Отмена батча" in template_name:
-                calc_text = self.multi_calc.toPlainText()
-                done = self.multi_done.text().strip()
-                total = self.multi_total.text().strip()
-
-                dist_match = re.search(r"Расч[её]тное расстояние\s*[:\-]?\s*[\r\n]*\s*([\d.,]+)\s*(км|м)\b",
-                                       calc_text, re.IGNORECASE)
-                distance = f"{dist_match.group(1)} {dist_match.group(2)}" if dist_match else "—"
-
-                time_match = re.search(r"Расч[её]тное время\s*[:\-]?\s*[\r\n]*\s*(.+)", calc_text, re.IGNORECASE)
-                time_raw = time_match.group(1).strip() if time_match else ""
-                time_parsed = self.parse_time_to_minutes(time_raw)
-                time_parsed = normalize_comment(time_parsed)
-
-                try:
-                    done_int = int(done)
-                except Exception:
-                    done_int = 0
-                try:
-                    total_int = int(total)
-                except Exception:
-                    total_int = 0
-
-                def plural_word(n):
-                    if 11 <= n % 100 <= 19:
-                        return "вручений"
-                    if n % 10 == 1:
-                        return "вручение"
-                    if n % 10 in (2, 3, 4):
-                        return "вручения"
-                    return "вручений"
-
-                done_word = plural_word(done_int)
-                diff = total_int - done_int
-                if diff == 1:
-                    cancel_text = "Одно из вручений было отменено, поэтому оно не вошло в расчёт, и стоимость доставки изменилась."
-                elif diff > 1:
-                    cancel_text = "Несколько вручений были отменены, поэтому они не были учтены при расчёте, и стоимость доставки изменилась."
-                else:
-                    cancel_text = "Все вручения были выполнены успешно!"
-
-                result = template_text.format(
-                    distance=distance,
-                    time=time_parsed,
-                    done_count=done_int,
-                    done_word=done_word,
-                    total_count=total_int,
-                    cancel_text=cancel_text
-                )
-                self.output.setPlainText(result)
-                return
-            elif "Оплата частями" in template_name:
-                # Новый 4-й шаблон
-                from datetime import datetime
-                MONTHS_RU = {1: "января", 2: "февраля", 3: "марта", 4: "апреля",
-                             5: "мая", 6: "июня", 7: "июля", 8: "августа",
-                             9: "сентября", 10: "октября", 11: "ноября", 12: "декабря"}
-
-                def parse_payment_block(text):
-                    lines = [l.strip() for l in text.strip().splitlines() if l.strip()]
-                    if len(lines) < 2:
-                        raise ValueError("Нужно две строки: дата/сумма")
-                    dt = datetime.strptime(lines[0], '%d.%m.%Y, %H:%M:%S')
-                    formatted_date = f"{dt.day} {MONTHS_RU[dt.month]} в {dt.hour:02d}:{dt.minute:02d}"
-                    amount = lines[1]
-                    return formatted_date, amount
-
-                datetime1, amount1 = parse_payment_block(self.payment1_input.toPlainText())
-                datetime2, amount2 = parse_payment_block(self.payment2_input.toPlainText())
-
-                result = template_text.format(
-                    amount1=amount1,
-                    amount2=amount2,
-                    datetime1=datetime1,
-                    datetime2=datetime2
-                )
+    def schedule_preview(self, *args):
+        self.preview_timer.start()
 
-                self.output.setPlainText(result)
-                return
+    def multi_order_mode(self):
+        return (self.multi_order_check.isChecked()
+                and self.stack.currentWidget() == self.common_container)
 
-            # --- обычные шаблоны ---
-            order_number = self.order_input.text().strip()
-            prices = parse_price_lines(self.price_input.toPlainText())
-            used_keys = set()
-            body_lines = []
-
-            ordered_fields = [
-                ("Подача", "Подача"),
-                ("Время в пути", "Время в пути"),
-                ("Километры в пути", "Километры в пути"),
-                ("Повышенный спрос", "Повышающий коэффициент"),
-                ("Ожидание у отправителя", "Ожидание у отправителя"),
-                ("Ожидание у получателя", "Ожидание у получателя"),
-                ("Доплаты", "Бонус за заказ"),
-                ("Цена отмен клиентами", "Цена отмен клиентами"),
-                ("Надбавка за заказ через колл-центр", "Надбавка за заказ через колл-центр")
-            ]
-
-            extra_fields = [
-                "Получение",
-                "Дистанция возврата",
-                "Цена платной подачи",
-                "Время возврата",
-                "Услуги 1 грузчика (кузов S)",
-                "Услуги 1 грузчика (кузов L)",
-                "Услуги 2 грузчиков (кузов XL)",
-                "Услуги 1 грузчика (кузов M)",
-                "Дополнительные кг",
-                "Перевес более 20 кг",
-                "Перевес до 10 кг",
-                "Перевес 10–20 кг",
-                "Девять коробок",
-                "Успешный возврат посылки",
-                "Компенсация парковки (30 минут)",
-                "Цена отмен клиентами", "Успешное вручение посылки",
-                "Время аренды"
-            ]
-
-            for key, display in ordered_fields:
-                for k in prices:
-                    if k.startswith(key) and k not in used_keys:
-                        val, comment = prices[k]
-                        body_lines.append(format_line(display, val, comment))
-                        used_keys.add(k)
-
-            for key in extra_fields:
-                for k in prices:
-                    if k == key and k not in used_keys:
-                        val, comment = prices[k]
-                        display_name = "Клиентские отмены" if key == "Цена отмен клиентами" else key
-                        body_lines.append(format_line(display_name, val, comment))
-                        used_keys.add(k)
-
-            additional_services_map = {
-                "От двери до двери": "От двери до двери",
-                "Кузов": "Размер кузова",
-                "Грузчики": "Грузчики",
-                "Термокороб": "Термокороб",
-                "Тяжёлая посылка": "Тяжёлая посылка",
-            }
-
-            for key, (val, comment) in prices.items():
-                if "Кузов" in key:
-                    name = 'Дополнительные услуги «Размер кузова»'
-                    body_lines.append(format_line(name, val, comment))
-                    used_keys.add(key)
-                    continue
-                for k in additional_services_map:
-                    if k.lower() != "кузов" and k.lower() in key.lower():
-                        name = f'Дополнительные услуги «{additional_services_map[k]}»'
-                        body_lines.append(format_line(name, val, comment))
-                        used_keys.add(key)
-                        break
-
-            body_text = "\n".join(body_lines)
-            temp_result = template_text.format(
-                order_number=order_number,
-                body=body_text,
-                total="TEMP_TOTAL"
-            )
-            calculated_total = sum_ruble_digits(temp_result)
-            result = temp_result.replace("TEMP_TOTAL", calculated_total)
-            self.output.setPlainText(result)
+    def update_preview(self):
+        """Предпросмотр ответа; пока данные неполные, прежний текст остаётся"""
+        if self.multi_order_mode():
+            self.output.setPlainText("Ответы по каждому заказу появятся после нажатия «Сформировать ответ».")
+            return
+        try:
+            self.output.setPlainText(self.render_current())
+        except Exception:
+            pass
+
+    def render_current(self):
+        template_name = self.template_box.currentText()
+        template = get_registry().get(template_name)
+        if template.kind not in (KIND_BATCH_CANCEL, KIND_SPLIT_PAYMENT):
+            with span("parse"):
+                records = self.price_parser.records()
+            return render_regular_records(template, self.order_input.text(), records)
+        return generate(template_name, self.collect_fields())
 
+    def generate_result(self):
+        self.preview_timer.stop()
+        if self.multi_order_mode():
+            from multi_order import MultiOrderDialog
+            MultiOrderDialog(self.price_input.toPlainText(), self.template_box.currentText(), self).exec_()
+            return
+        try:
+            with span("generate"):
+                template_name = self.template_box.currentText()
+                fields = self.collect_fields()
+                history = self.history()
+                result = history.lookup(template_name, fields)
+                if result is None:
+                    result = self.render_current()
+                    history.save(template_name, fields, result)
+                self.output.setPlainText(result)
+            self.check_tariff(template_name)
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Ошибка", f"Произошла ошибка при обработке данных:\n{str(e)}")
 
-    def parse_time_to_minutes(self, text):
-        h = re.search(r"(\d+)\s*ч", text)
-        m = re.search(r"(\d+)\s*мин", text)
-        if h and m:
-            result = f"{h.group(1)} ч {m.group(1)} мин"
-        elif m:
-            result = f"{m.group(1)} мин"
-        elif h:
-            result = f"{h.group(1)} ч"
+    def check_tariff(self, template_name):
+        """Сверяет расшифровку с тарифом и показывает расхождения под ответом"""
+        report = None
+        if template_kind(template_name) not in (KIND_BATCH_CANCEL, KIND_SPLIT_PAYMENT):
+            from tariffs import TariffError, verify_records
+            try:
+                with span("tariff"):
+                    report = verify_records(self.price_parser.records())
+            except (OSError, TariffError) as e:
+                self.tariff_label.setText(f"Тарифы не загружены: {e}")
+                self.tariff_label.show()
+                return
+        if report is None or report.ok:
+            self.tariff_label.hide()
         else:
-            result = text
-        return normalize_comment(result)
+            self.tariff_label.setText(report.describe())
+            self.tariff_label.show()
+
+    def history(self):
+        """История ответов; база готовится в фоне, без неё окно работает как раньше"""
+        if self._history is None:
+            from history import get_history
+            self._history = get_history()
+        return self._history
+
+    def restore_from_history(self):
+        """Возвращает поля и ответ ранее открытого заказа, если поле стоимости пустое"""
+        number = self.order_input.text().strip()
+        if not number or self.price_input.toPlainText().strip():
+            return
+        entry = self.history().latest_for_order(number)
+        if entry is not None:
+            self.load_history_entry(*entry)
+
+    def load_history_entry(self, template_name, fields, response):
+        """Заполняет форму полями записи истории и показывает её ответ"""
+        if template_name in template_names():
+            self.template_box.setCurrentText(template_name)
+        widgets = {
+            "order_number": self.order_input, "price_text": self.price_input,
+            "calc_text": self.multi_calc, "done": self.multi_done, "total": self.multi_total,
+            "payment1": self.payment1_input, "payment2": self.payment2_input,
+        }
+        for name, value in fields.items():
+            widget = widgets.get(name)
+            if isinstance(widget, QtWidgets.QLineEdit):
+                widget.setText(value)
+            elif widget is not None:
+                widget.setPlainText(value)
+        self.preview_timer.stop()
+        self.output.setPlainText(response)
+
+    def collect_fields(self):
+        """Собирает значения полей ввода для движка генерации"""
+        return {
+            "order_number": self.order_input.text(),
+            "price_text": self.price_input.toPlainText(),
+            "calc_text": self.multi_calc.toPlainText(),
+            "done": self.multi_done.text(),
+            "total": self.multi_total.text(),
+            "payment1": self.payment1_input.toPlainText(),
+            "payment2": self.payment2_input.toPlainText(),
+        }
+
+    def parse_time_to_minutes(self, text):
+        return parse_time_to_minutes(text)
 
     def copy_result(self):
         # Копируем текст результата в буфер обмена
-        clipboard = QtWidgets.QApplication.clipboard()
-        clipboard.setText(self.output.toPlainText())
+        with span("clipboard"):
+            clipboard = QtWidgets.QApplication.clipboard()
+            clipboard.setText(self.output.toPlainText())
         self.copy_btn.setText("✅ Скопировано!")
         QtCore.QTimer.singleShot(2000, lambda: self.copy_btn.setText("📋 Скопировать результат"))
 
         # Показываем случайную GIF на 5 секунд
-        random_gif = random.choice(self.gif_list)
-        movie = QtGui.QMovie(random_gif)
-
-        # Подгоняем размер под поле результата, сохраняя пропорции
-        output_size = self.output.size()
-        movie.setScaledSize(output_size)
-
-        self.gif_label.setMovie(movie)
-        self.gif_label.setFixedSize(output_size)  # Лейбл занимает размер поля результата
-        self.gif_label.setAlignment(QtCore.Qt.AlignCenter)
-        self.gif_label.show()
-        movie.start()
-
-        # Скрываем GIF через 5 секунд
-        QtCore.QTimer.singleShot(5000, lambda: self.gif_label.hide())
+        # Кадры подогнаны под размер поля результата и берутся из кэша
+        with span("gif"):
+            output_size = self.output.size()
+            self.show_gif(self.next_gif, output_size)
+        # Следующая GIF готовится в фоне, пока показывается эта
+        self.next_gif = random.choice(self.gif_list)
+        self.gif_cache.prepare(output_size, [self.next_gif])
 
         # --- Очистка полей в зависимости от текущего видимого контейнера ---
         current = self.stack.currentWidget()
@@ -340,7 +383,9 @@ class MainTab(QtWidgets.QWidget):
             self.payment1_input.clear()
             self.payment2_input.clear()
 
-        # Очищаем поле результата
+        # Очищаем поле результата; предпросмотр от очистки полей не нужен
+        self.preview_timer.stop()
         self.output.clear()
+        self.tariff_label.hide()
 
 
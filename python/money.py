@@ -0,0 +1,74 @@
+# money.py
+"""Суммы в копейках: итог считается по разобранным строкам, а не по готовому тексту."""
+from decimal import Decimal
+
+
+class PriceLine:
+    """Строка стоимости: название, сумма как в админке, сумма в копейках и комментарий."""
+
+    __slots__ = ("label", "amount", "kopecks", "comment")
+
+    def __init__(self, label: str, amount: str, comment: str = ""):
+        self.label = label
+        self.amount = amount
+        self.kopecks = to_kopecks(amount)
+        self.comment = comment
+
+    def __repr__(self):
+        return f"PriceLine({self.label!r}, {self.amount!r}, {self.comment!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, PriceLine):
+            return NotImplemented
+        return (self.label, self.amount, self.comment) == (other.label, other.amount, other.comment)
+
+
+def to_kopecks(amount: str) -> int:
+    """«148 ₽», «12.5 ₽», «99.999₽» → копейки; дробь округляется до копейки вверх от половины."""
+    digits = amount.replace("₽", "").strip()
+    rubles, _, fraction = digits.partition(".")
+    kopecks = int(rubles or "0") * 100
+    if fraction:
+        kopecks += int(fraction[:2].ljust(2, "0"))
+        if len(fraction) > 2 and int(fraction[2]) >= 5:
+            kopecks += 1
+    return kopecks
+
+
+def _fraction_digits(amount: str) -> int:
+    point = amount.find(".")
+    if point < 0:
+        return 0
+    return len(amount[point + 1:].replace("₽", "").strip())
+
+
+def total_kopecks(lines):
+    """Итог строк в копейках.
+
+    Обычно это сумма kopecks. Если в какой-то сумме больше двух знаков после
+    точки, итог считается по суммам без округления (Decimal) и округляется
+    один раз при выводе, как и раньше по тексту: «0.495 ₽» даёт 0 ₽, а не
+    1 ₽ через 50 копеек.
+    """
+    total = 0
+    fine = False
+    for line in lines:
+        total += line.kopecks
+        if "." in line.amount and _fraction_digits(line.amount) > 2:
+            fine = True
+    if not fine:
+        return total
+    return sum((Decimal(line.amount.replace("₽", "").strip()) * 100 for line in lines), Decimal(0))
+
+
+def format_total(kopecks) -> str:
+    """Итог в целых рублях с округлением вверх от половины: 12 350 коп. → «124 ₽»."""
+    return f"{int((kopecks + 50) // 100)} ₽"
+
+
+def format_rubles(kopecks: int) -> str:
+    """Сумма как в админке: 14 800 коп. → «148 ₽», 14 850 коп. → «148.50 ₽»."""
+    if kopecks < 0:
+        return "-" + format_rubles(-kopecks)
+    rubles, rest = divmod(kopecks, 100)
+    return f"{rubles} ₽" if not rest else f"{rubles}.{rest:02d} ₽"
@@ -0,0 +1,116 @@
+# multi_order.py
+"""Окно генерации ответов для вставки с несколькими заказами.
+
+Вставка разбивается на заказы потоком (order_split), ответы формируются в
+фоновом потоке через тот же конвейер, что и batch_cli, и появляются в
+списке по мере готовности. Большие вставки обрабатываются пулом процессов.
+"""
+import os
+import time
+from itertools import chain, islice
+
+from PyQt5 import QtWidgets, QtCore
+
+from batch_cli import run_pipeline
+from order_split import split_orders
+
+# Меньше заказов быстрее сформировать в одном процессе, чем запускать пул
+PARALLEL_MIN_ORDERS = 200
+CHUNK_SIZE = 64
+
+RESPONSE_ROLE = QtCore.Qt.UserRole
+
+
+class GenerationThread(QtCore.QThread):
+    """Формирует ответы по заказам вставки и отдаёт их по одному."""
+
+    result_ready = QtCore.pyqtSignal(dict)
+    stats_ready = QtCore.pyqtSignal(int, float)
+
+    def __init__(self, text, template_name, parent=None):
+        super().__init__(parent)
+        self.text = text
+        self.template_name = template_name
+
+    def run(self):
+        started = time.perf_counter()
+        records = split_orders(self.text.splitlines(keepends=True))
+        head = list(islice(records, PARALLEL_MIN_ORDERS))
+        workers = (os.cpu_count() or 1) if len(head) == PARALLEL_MIN_ORDERS else 1
+
+        count = 0
+        for result in run_pipeline(chain(head, records), self.template_name, workers, CHUNK_SIZE):
+            if self.isInterruptionRequested():
+                break
+            self.result_ready.emit(result)
+            count += 1
+        self.stats_ready.emit(count, time.perf_counter() - started)
+
+
+class MultiOrderDialog(QtWidgets.QDialog):
+    def __init__(self, text, template_name, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("📚 Ответы по заказам")
+        self.resize(700, 500)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        self.status_label = QtWidgets.QLabel("Формирование ответов...")
+        layout.addWidget(self.status_label)
+
+        splitter = QtWidgets.QSplitter(QtCore.Qt.Vertical)
+        self.results_list = QtWidgets.QListWidget()
+        self.results_list.currentItemChanged.connect(self.show_response)
+        self.results_list.itemDoubleClicked.connect(self.copy_item)
+        splitter.addWidget(self.results_list)
+        self.response_view = QtWidgets.QPlainTextEdit()
+        self.response_view.setReadOnly(True)
+        splitter.addWidget(self.response_view)
+        layout.addWidget(splitter)
+
+        self.copy_btn = QtWidgets.QPushButton("📋 Скопировать и перейти к следующему")
+        self.copy_btn.clicked.connect(self.copy_current)
+        layout.addWidget(self.copy_btn)
+
+        self.thread = GenerationThread(text, template_name, self)
+        self.thread.result_ready.connect(self.add_result)
+        self.thread.stats_ready.connect(self.show_stats)
+        self.thread.start()
+
+    def add_result(self, result):
+        if result["error"]:
+            item = QtWidgets.QListWidgetItem(f"⚠️ {result['id']}: {result['error']}")
+        else:
+            item = QtWidgets.QListWidgetItem(f"{result['id']}")
+        item.setData(RESPONSE_ROLE, result["response"])
+        self.results_list.addItem(item)
+        if self.results_list.currentItem() is None:
+            self.results_list.setCurrentItem(item)
+
+    def show_stats(self, count, elapsed):
+        rate = count / elapsed if elapsed > 0 else 0.0
+        self.status_label.setText(
+            f"Готово ответов: {count} за {elapsed * 1000:.0f} мс ({rate:.0f} ответов/с)"
+        )
+
+    def show_response(self, current, previous=None):
+        self.response_view.setPlainText(current.data(RESPONSE_ROLE) if current is not None else "")
+
+    def copy_item(self, item):
+        QtWidgets.QApplication.clipboard().setText(item.data(RESPONSE_ROLE))
+        if not item.text().startswith("✅ "):
+            item.setText("✅ " + item.text())
+
+    def copy_current(self):
+        item = self.results_list.currentItem()
+        if item is None:
+            return
+        self.copy_item(item)
+        row = self.results_list.row(item)
+        if row + 1 < self.results_list.count():
+            self.results_list.setCurrentRow(row + 1)
+
+    def done(self, result):
+        # Не оставляем поток работать после закрытия окна
+        self.thread.requestInterruption()
+        self.thread.wait()
+        super().done(result)
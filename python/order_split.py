@@ -0,0 +1,55 @@
+# order_split.py
+"""Разбиение вставки с несколькими заказами на отдельные заказы.
+
+Заказ начинается со строки с номером: «Заказ № 123456», «№ 123456» или
+32 шестнадцатеричных символа. Всё до следующей такой строки — блок
+стоимости этого заказа. Строки читаются потоком, поэтому на вход можно
+подать открытый файл любого размера.
+"""
+import re
+
+_SP = r"[^\S\n]"
+
+# Общий фрагмент с classifier: группы order и order_hex
+ORDER_HEADER = rf"(?:заказ\w*{_SP}*)?№{_SP}*(?P<order>\S+)|(?P<order_hex>[0-9a-f]{{32}})"
+
+_ORDER_LINE_RE = re.compile(rf"\s*(?:{ORDER_HEADER})\s*$", re.IGNORECASE)
+
+
+def order_number(line: str):
+    """Номер заказа, если строка — заголовок заказа, иначе None."""
+    m = _ORDER_LINE_RE.match(line)
+    if m is None:
+        return None
+    return m.group("order") or m.group("order_hex")
+
+
+def split_orders(lines):
+    """Отдаёт записи {id, order_number, price_text} для каждого заказа.
+
+    lines — строки с переводами строк или без (файл, text.splitlines(True)).
+    Текст до первого номера становится заказом без номера, если он не пустой.
+    """
+    number = ""
+    block = []
+    index = 0
+    for line in lines:
+        found = order_number(line)
+        if found is None:
+            block.append(line if line.endswith("\n") else line + "\n")
+            continue
+        if number or any(not part.isspace() for part in block):
+            index += 1
+            yield _record(index, number, block)
+        number = found
+        block = []
+    if number or any(not part.isspace() for part in block):
+        yield _record(index + 1, number, block)
+
+
+def _record(index: int, number: str, block: list) -> dict:
+    return {
+        "id": number or f"#{index}",
+        "order_number": number,
+        "price_text": "".join(block),
+    }
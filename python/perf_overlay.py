@@ -0,0 +1,47 @@
+# perf_overlay.py
+"""Полупрозрачная табличка с p50/p95 этапов поверх главного окна (Ctrl+Shift+P)."""
+from PyQt5 import QtWidgets, QtCore
+
+import tracing
+
+REFRESH_MS = 1000
+MARGIN = 10
+
+
+class PerfOverlay(QtWidgets.QLabel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self.setStyleSheet(
+            "background-color: rgba(0, 0, 0, 170); color: #e0e0e0; margin: 0; padding: 6px;"
+            "font-family: Consolas, 'Courier New', monospace; font-size: 11px; font-weight: normal;"
+            "border-radius: 4px;"
+        )
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+
+    def refresh(self):
+        rows = [f"{'этап':<10} {'n':>4} {'p50 мс':>8} {'p95 мс':>8}"]
+        for name, (count, p50, p95) in sorted(tracing.stats().items()):
+            rows.append(f"{name:<10} {count:>4} {p50:>8.2f} {p95:>8.2f}")
+        if len(rows) == 1:
+            rows.append("замеров пока нет")
+        self.setText("\n".join(rows))
+        self.adjustSize()
+        self.reposition()
+        self.raise_()
+
+    def reposition(self):
+        parent = self.parentWidget()
+        self.move(MARGIN, parent.height() - self.height() - MARGIN)
@@ -0,0 +1,213 @@
+# routes.py
+"""Оценка расстояния и времени маршрута мультизаказа по точкам (нужен numpy).
+
+Маршрут — точки в порядке объезда: первая точка (забор) и точки вручений.
+Плечи между соседними точками считаются по формуле гаверсинусов сразу для
+всех мультизаказов. Для каждого мультизаказа выдаются две оценки:
+
+    full      — весь маршрут, как он был построен;
+    completed — маршрут без отменённых точек: плечи между соседними
+                оставшимися точками, как если бы отменённых вручений не было.
+
+Расстояние по прямой умножается на ROAD_FACTOR (дороги длиннее прямой),
+время — расстояние при средней скорости AVERAGE_SPEED_KMH. Это оценка для
+сравнения с «Расчётным расстоянием» и «Расчётным временем» из админки, а не
+замена им.
+
+Выгрузка — CSV/JSONL, строка на точку: мультизаказ, широта, долгота и
+(необязательно) статус и порядковый номер точки. Без номера порядок точек —
+порядок строк.
+
+    python routes.py route_points.csv [-o summary.csv]
+"""
+import argparse
+import csv
+import sys
+import time
+
+from analytics import load_numpy
+from batch_cli import ExportError, detect_format, find_column, read_export
+from batch_export import BATCH_COLUMNS, STATUS_COLUMNS
+from engine import format_duration
+
+EARTH_RADIUS_KM = 6371.0088
+ROAD_FACTOR = 1.3
+AVERAGE_SPEED_KMH = 25.0
+
+LAT_COLUMNS = ("lat", "latitude", "широта")
+LON_COLUMNS = ("lon", "lng", "longitude", "долгота")
+SEQUENCE_COLUMNS = ("seq", "sequence", "point", "номер точки", "порядок")
+
+CANCELLED_STATUSES = frozenset({"cancelled", "canceled", "отменено", "отменён", "отменен", "отмена"})
+
+
+def haversine_km(np, lat1, lon1, lat2, lon2):
+    """Расстояния по дуге большого круга между парами точек (градусы → км), поэлементно."""
+    lat1, lon1, lat2, lon2 = (np.radians(a) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class RouteTable:
+    """Колонки точек маршрутов: batch (код), lat, lon, cancelled; batches — названия по кодам.
+
+    Точки одного мультизаказа идут подряд в порядке объезда.
+    """
+
+    def __init__(self, batch, lat, lon, cancelled, batches: list):
+        self.batch = batch
+        self.lat = lat
+        self.lon = lon
+        self.cancelled = cancelled
+        self.batches = batches
+
+    def __len__(self):
+        return len(self.batch)
+
+    @classmethod
+    def from_arrays(cls, batch, lat, lon, cancelled, batches: list, sequence=None):
+        """Упорядочивает точки по (мультизаказ, номер точки); без номера — по исходному порядку."""
+        np = load_numpy()
+        batch = np.asarray(batch)
+        order = np.lexsort((sequence, batch)) if sequence is not None else np.argsort(batch, kind="stable")
+        return cls(batch[order], np.asarray(lat, dtype=float)[order], np.asarray(lon, dtype=float)[order],
+                   np.asarray(cancelled, dtype=bool)[order], batches)
+
+    @classmethod
+    def from_records(cls, records, skipped: list = None):
+        """Таблица из записей выгрузки; строки без мультизаказа или с негодными координатами — в skipped."""
+        from array import array
+
+        np = load_numpy()
+        codes = {}
+        batch, lat, lon, cancelled, sequence = array("i"), array("d"), array("d"), array("b"), array("d")
+        columns = None
+        for line, record in enumerate(records, 1):
+            if columns is None:
+                columns = (
+                    find_column(record, BATCH_COLUMNS),
+                    find_column(record, LAT_COLUMNS),
+                    find_column(record, LON_COLUMNS),
+                    find_column(record, STATUS_COLUMNS, required=False),
+                    find_column(record, SEQUENCE_COLUMNS, required=False),
+                )
+            batch_key, lat_key, lon_key, status_key, sequence_key = columns
+            name = str(record.get(batch_key) or "").strip()
+            if not name:
+                continue
+            try:
+                point = (float(str(record.get(lat_key)).replace(",", ".")),
+                         float(str(record.get(lon_key)).replace(",", ".")))
+                position = float(record.get(sequence_key)) if sequence_key is not None else float(line)
+            except (TypeError, ValueError) as e:
+                if skipped is not None:
+                    skipped.append((line, str(e)))
+                continue
+            code = codes.get(name)
+            if code is None:
+                code = codes[name] = len(codes)
+            status = str(record.get(status_key) or "").strip().casefold() if status_key is not None else ""
+            batch.append(code)
+            lat.append(point[0])
+            lon.append(point[1])
+            cancelled.append(status in CANCELLED_STATUSES)
+            sequence.append(position)
+        return cls.from_arrays(
+            np.frombuffer(batch, dtype=f"i{batch.itemsize}"), np.frombuffer(lat, dtype="f8"),
+            np.frombuffer(lon, dtype="f8"), np.frombuffer(cancelled, dtype="i1").astype(bool),
+            list(codes), np.frombuffer(sequence, dtype="f8"),
+        )
+
+
+def _route_km(np, batch, lat, lon, batch_count: int):
+    """Сумма плеч между соседними точками одного мультизаказа, по мультизаказам."""
+    same = batch[1:] == batch[:-1]
+    legs = haversine_km(np, lat[:-1][same], lon[:-1][same], lat[1:][same], lon[1:][same])
+    return np.bincount(batch[1:][same], weights=legs, minlength=batch_count), int(same.sum())
+
+
+def route_summary(table: RouteTable, road_factor: float = ROAD_FACTOR, speed_kmh: float = AVERAGE_SPEED_KMH) -> dict:
+    """Оценки по мультизаказам: точки, отменённые точки, км и минуты всего маршрута и без отменённых."""
+    np = load_numpy()
+    count = len(table.batches)
+    full_km, legs = _route_km(np, table.batch, table.lat, table.lon, count)
+    kept = ~table.cancelled
+    completed_km, _ = _route_km(np, table.batch[kept], table.lat[kept], table.lon[kept], count)
+    full_km *= road_factor
+    completed_km *= road_factor
+    return {
+        "batches": table.batches,
+        "legs": legs,
+        "points": np.bincount(table.batch, minlength=count),
+        "cancelled": np.bincount(table.batch[table.cancelled], minlength=count),
+        "full_km": full_km,
+        "completed_km": completed_km,
+        "full_min": full_km / speed_kmh * 60,
+        "completed_min": completed_km / speed_kmh * 60,
+    }
+
+
+def summary_rows(summary: dict):
+    """Строки отчёта: мультизаказ, точки, отменено, км и время — всего и без отменённых."""
+    for code, name in enumerate(summary["batches"]):
+        yield {
+            "batch": name,
+            "points": int(summary["points"][code]),
+            "cancelled": int(summary["cancelled"][code]),
+            "full_km": f"{summary['full_km'][code]:.2f}",
+            "full_time": format_duration(int(summary["full_min"][code] * 60)),
+            "completed_km": f"{summary['completed_km'][code]:.2f}",
+            "completed_time": format_duration(int(summary["completed_min"][code] * 60)),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Оценка маршрутов мультизаказов: всего и без отменённых точек")
+    parser.add_argument("input", help="точки маршрутов CSV/JSONL или '-' для stdin")
+    parser.add_argument("-o", "--output", default="-", help="CSV с оценками или '-' для stdout")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="формат входа (по умолчанию по расширению)")
+    parser.add_argument("--road-factor", type=float, default=ROAD_FACTOR, help="во сколько раз дорога длиннее прямой")
+    parser.add_argument("--speed", type=float, default=AVERAGE_SPEED_KMH, help="средняя скорость, км/ч")
+    parser.add_argument("--only-cancelled", action="store_true", help="только мультизаказы с отменёнными точками")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or detect_format(args.input)
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8-sig", newline="")
+    skipped = []
+    try:
+        table = RouteTable.from_records(read_export(source, fmt, skipped), skipped)
+    except ExportError as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    started = time.perf_counter()
+    summary = route_summary(table, args.road_factor, args.speed)
+    elapsed = time.perf_counter() - started
+
+    rows = summary_rows(summary)
+    if args.only_cancelled:
+        rows = (row for row in rows if row["cancelled"])
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        writer = None
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(target, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+    finally:
+        if target is not sys.stdout:
+            target.close()
+
+    print(f"Мультизаказов: {len(summary['batches'])}, плеч: {summary['legs']}, расчёт {elapsed * 1000:.1f} мс",
+          file=sys.stderr)
+    for line, error in skipped[:10]:
+        print(f"  запись {line} пропущена: {error}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
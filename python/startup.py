@@ -0,0 +1,54 @@
+# startup.py
+"""Замер холодного старта: от запуска work.py до первого показа окна.
+
+Модуль импортируется первой строкой work.py, поэтому отсчёт начинается до
+загрузки PyQt. Отчёт пишется, если задана переменная YH_STARTUP_REPORT
+(путь к файлу JSON Lines, куда дописывается по строке на каждый запуск).
+"""
+import json
+import os
+import sys
+import time
+
+_started = time.perf_counter()
+
+
+class StartupTimer:
+    def __init__(self, started: float):
+        self.started = started
+        self.marks = []
+
+    def mark(self, name: str):
+        """Отмечает завершение этапа запуска."""
+        self.marks.append((name, (time.perf_counter() - self.started) * 1000))
+
+    def total_ms(self) -> float:
+        return self.marks[-1][1] if self.marks else 0.0
+
+    def report(self, budget_ms: float) -> dict:
+        total = self.total_ms()
+        return {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "frozen": bool(getattr(sys, "frozen", False)),
+            "marks": {name: round(ms, 1) for name, ms in self.marks},
+            "total_ms": round(total, 1),
+            "budget_ms": budget_ms,
+            "over_budget": total > budget_ms,
+        }
+
+    def write_report(self, budget_ms: float, path: str = None):
+        """Дописывает отчёт в файл и печатает сводку, если есть консоль."""
+        report = self.report(budget_ms)
+        path = path or os.environ.get("YH_STARTUP_REPORT")
+        if path:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(report, ensure_ascii=False) + "\n")
+        # В оконной сборке PyInstaller stderr нет
+        if sys.stderr is not None and (path or report["over_budget"]):
+            stages = ", ".join(f"{name} {ms:.0f} мс" for name, ms in self.marks)
+            status = "ПРЕВЫШЕН" if report["over_budget"] else "в норме"
+            print(f"Запуск: {stages}; бюджет {budget_ms:.0f} мс {status}", file=sys.stderr)
+        return report
+
+
+timer = StartupTimer(_started)
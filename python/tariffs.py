@@ -0,0 +1,454 @@
+# tariffs.py
+"""Пересчёт стоимости по тарифу: проверка расшифровки перед отправкой.
+
+Тарифы лежат в папке tariff_tables, по файлу на тариф (*.tariff, UTF-8). Формат
+тот же, что у шаблонов: заголовок, строка «---», затем таблица:
+
+    name: Курьер
+    tolerance: 1
+    ---
+    Подача                 | fixed  | 99
+    Время в пути           | minute | 9
+    Километры в пути       | km     | 16
+    Ожидание у отправителя | minute | 7   | 10
+    Повышенный спрос       | surge  | Подача, Время в пути, Километры в пути
+
+Единицы: fixed — фиксированная сумма; minute, km, piece — цена за минуту,
+километр или штуку (количество берётся из комментария строки: «за 1 ч 5 мин»,
+«за 14.99 км», «за 2 шт»). Четвёртая колонка — бесплатное количество.
+surge — надбавка (k − 1) × сумма перечисленных строк, где k берётся из
+комментария «x1.4». tolerance — допустимое расхождение в рублях (по
+умолчанию 1 ₽: админка округляет суммы).
+
+Тарифы перечитываются по времени модификации, как шаблоны. Без тарифов
+проверка не выполняется. Если тариф не указан, а тарифов несколько, лучший
+тариф не подбирается: строки сверяются со всеми, и если тарифы не сходятся
+в оценке, результат помечается как неоднозначный (AmbiguousReport).
+Пакетной проверке при нескольких тарифах тариф нужно указать явно.
+
+Пакетная проверка выгрузки (нужен numpy):
+    python tariffs.py tickets.jsonl [--tariff Курьер] [-o mismatches.csv]
+"""
+import argparse
+import csv
+import math
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+from money import format_rubles, to_kopecks
+from utils import resource_path
+
+# Папка с таблицами тарифов; не «tariffs», чтобы не совпадать с именем модуля
+TARIFFS_FOLDER = "tariff_tables"
+TARIFF_SUFFIX = ".tariff"
+HEADER_SEPARATOR = "---"
+DEFAULT_TOLERANCE_KOPECKS = 100
+
+UNIT_FIXED = "fixed"
+UNIT_MINUTE = "minute"
+UNIT_KM = "km"
+UNIT_PIECE = "piece"
+UNIT_SURGE = "surge"
+UNITS = (UNIT_FIXED, UNIT_MINUTE, UNIT_KM, UNIT_PIECE, UNIT_SURGE)
+
+# Количество из комментария: единица и число. QUANTITY_COEF — коэффициент «x1.4».
+QUANTITY_COEF = "coef"
+QUANTITY_UNITS = (None, UNIT_MINUTE, UNIT_KM, UNIT_PIECE, QUANTITY_COEF)
+
+STATUS_OK = "ok"
+STATUS_MISMATCH = "mismatch"
+STATUS_UNCHECKED = "unchecked"
+
+_COEF_RE = re.compile(r"^[xх×*]\s*(\d+(?:[.,]\d+)?)$", re.IGNORECASE)
+_HOURS_RE = re.compile(r"(\d+)\s*ч")
+_MINUTES_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*мин")
+_SECONDS_RE = re.compile(r"(\d+)\s*сек")
+_KM_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*км")
+_PIECES_RE = re.compile(r"(\d+)\s*шт")
+
+
+class TariffError(Exception):
+    pass
+
+
+TariffRule = namedtuple("TariffRule", "label unit price free base")
+ComponentCheck = namedtuple("ComponentCheck", "label pasted expected status")
+
+
+@lru_cache(maxsize=4096)
+def parse_quantity(comment: str) -> tuple:
+    """Комментарий строки стоимости → (единица, число) или (None, None).
+
+    «за 1 ч 5 мин» → ("minute", 65.0), «за 30 сек.» → ("minute", 0.5),
+    «за 14.99 км» → ("km", 14.99), «за 2 шт» → ("piece", 2.0), «x1.4» → ("coef", 1.4).
+    Комментарии повторяются из тикета в тикет, поэтому результаты кэшируются.
+    """
+    comment = comment.strip()
+    if not comment:
+        return None, None
+    m = _COEF_RE.match(comment)
+    if m:
+        return QUANTITY_COEF, float(m.group(1).replace(",", "."))
+    m = _KM_RE.search(comment)
+    if m:
+        return UNIT_KM, float(m.group(1).replace(",", "."))
+    m = _PIECES_RE.search(comment)
+    if m:
+        return UNIT_PIECE, float(m.group(1))
+    hours = _HOURS_RE.search(comment)
+    minutes = _MINUTES_RE.search(comment)
+    seconds = _SECONDS_RE.search(comment)
+    if hours or minutes or seconds:
+        total = int(hours.group(1)) * 60 if hours else 0
+        total += float(minutes.group(1).replace(",", ".")) if minutes else 0
+        total += int(seconds.group(1)) / 60 if seconds else 0
+        return UNIT_MINUTE, float(total)
+    return None, None
+
+
+def _round_kopecks(value: float) -> int:
+    """Округление до копейки вверх от половины, как в to_kopecks."""
+    return math.floor(value + 0.5 + 1e-9)
+
+
+class Tariff:
+    """Таблица тарифа: правила по названиям строк (без учёта регистра)."""
+
+    def __init__(self, name: str, rules: list, tolerance: int, path: str = None, mtime: float = None):
+        self.name = name
+        self.rules = {rule.label.casefold(): rule for rule in rules}
+        self.tolerance = tolerance
+        self.path = path
+        self.mtime = mtime
+
+    def rule_for(self, label: str):
+        return self.rules.get(label.strip().casefold())
+
+    def expected(self, rule: TariffRule, comment: str, base_kopecks: int = 0):
+        """Сумма строки по тарифу в копейках; None — если количества в комментарии нет."""
+        unit, value = parse_quantity(comment)
+        if rule.unit == UNIT_FIXED:
+            return rule.price
+        if rule.unit == UNIT_SURGE:
+            return _round_kopecks((value - 1) * base_kopecks) if unit == QUANTITY_COEF else None
+        if unit != rule.unit:
+            return None
+        return _round_kopecks(max(value - rule.free, 0) * rule.price)
+
+    def check(self, records: dict) -> "TariffReport":
+        """Сверяет строки {название: PriceLine} с тарифом."""
+        checks = []
+        for label, line in records.items():
+            rule = self.rule_for(label)
+            if rule is None:
+                checks.append(ComponentCheck(label, line.kopecks, None, STATUS_UNCHECKED))
+                continue
+            base = 0
+            if rule.unit == UNIT_SURGE:
+                base = sum(other.kopecks for other_label, other in records.items()
+                           if other_label.strip().casefold() in rule.base)
+            expected = self.expected(rule, line.comment, base)
+            if expected is None:
+                status = STATUS_UNCHECKED
+            elif abs(expected - line.kopecks) > self.tolerance:
+                status = STATUS_MISMATCH
+            else:
+                status = STATUS_OK
+            checks.append(ComponentCheck(label, line.kopecks, expected, status))
+        return TariffReport(self.name, checks)
+
+
+class TariffReport:
+    ambiguous = False
+
+    def __init__(self, tariff_name: str, checks: list):
+        self.tariff_name = tariff_name
+        self.checks = checks
+
+    @property
+    def mismatches(self) -> list:
+        return [check for check in self.checks if check.status == STATUS_MISMATCH]
+
+    @property
+    def checked_count(self) -> int:
+        return sum(1 for check in self.checks if check.status != STATUS_UNCHECKED)
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+    def describe(self) -> str:
+        """Расхождения для оператора, по строке на компонент."""
+        lines = [f"Не сходится с тарифом «{self.tariff_name}»:"]
+        for check in self.mismatches:
+            lines.append(f"{check.label}: в расшифровке {format_rubles(check.pasted)}, "
+                         f"по тарифу {format_rubles(check.expected)}")
+        return "\n".join(lines)
+
+
+class AmbiguousReport:
+    """Сверка без указанного тарифа, когда тарифов несколько.
+
+    ok — только если расшифровка сходится со всеми тарифами, которые
+    что-то проверили: тогда неважно, какой из них у заказа. Иначе
+    неизвестно, какое расхождение настоящее, и describe перечисляет
+    оценку каждого тарифа.
+    """
+
+    ambiguous = True
+
+    def __init__(self, reports: list):
+        self.reports = reports
+
+    @property
+    def ok(self) -> bool:
+        return all(report.ok for report in self.reports)
+
+    def describe(self) -> str:
+        lines = ["Тариф не указан, а тарифы расходятся в оценке расшифровки:"]
+        for report in self.reports:
+            verdict = "сходится" if report.ok else f"расхождений: {len(report.mismatches)}"
+            lines.append(f"«{report.tariff_name}» — {verdict}")
+        return "\n".join(lines)
+
+
+def parse_tariff_file(path: str) -> Tariff:
+    mtime = os.stat(path).st_mtime
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    name = os.path.basename(path)
+
+    header, separator, body = content.partition("\n" + HEADER_SEPARATOR + "\n")
+    if not separator:
+        raise TariffError(f"В файле {name} нет строки «{HEADER_SEPARATOR}»")
+    meta = {}
+    for line in header.splitlines():
+        key, _, value = line.partition(":")
+        if value:
+            meta[key.strip().lower()] = value.strip()
+    if "name" not in meta:
+        raise TariffError(f"В заголовке {name} нужно name")
+    try:
+        tolerance = to_kopecks(meta["tolerance"]) if "tolerance" in meta else DEFAULT_TOLERANCE_KOPECKS
+    except ValueError:
+        raise TariffError(f"Некорректный tolerance в {name}: {meta['tolerance']}") from None
+
+    rules = []
+    for number, line in enumerate(body.splitlines(), 1):
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        cells = [cell.strip() for cell in line.split("|")]
+        if len(cells) < 3 or cells[1] not in UNITS:
+            raise TariffError(f"{name}, строка {number} после «---»: нужно «название | единица | цена»")
+        label, unit = cells[0], cells[1]
+        try:
+            if unit == UNIT_SURGE:
+                base = frozenset(part.strip().casefold() for part in cells[2].split(",") if part.strip())
+                rules.append(TariffRule(label, unit, 0, 0.0, base))
+            else:
+                free = float(cells[3].replace(",", ".")) if len(cells) > 3 and cells[3] else 0.0
+                rules.append(TariffRule(label, unit, to_kopecks(cells[2].replace(",", ".")), free, frozenset()))
+        except ValueError:
+            raise TariffError(f"{name}, строка {number} после «---»: некорректное число") from None
+    return Tariff(meta["name"], rules, tolerance, path, mtime)
+
+
+def default_tariffs_dir() -> str:
+    """Папка тарифов: YH_TARIFFS_DIR, затем TARIFFS_FOLDER рядом с EXE, затем встроенная."""
+    env_dir = os.environ.get("YH_TARIFFS_DIR")
+    if env_dir:
+        return env_dir
+    if getattr(sys, "frozen", False):
+        beside_exe = os.path.join(os.path.dirname(sys.executable), TARIFFS_FOLDER)
+        if os.path.isdir(beside_exe):
+            return beside_exe
+    bundled = resource_path(TARIFFS_FOLDER)
+    if os.path.isdir(bundled):
+        return bundled
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), TARIFFS_FOLDER)
+
+
+class TariffBook:
+    """Тарифы папки с перезагрузкой по времени модификации файлов."""
+
+    def __init__(self, directory: str, check_interval: float = 1.0):
+        self.directory = directory
+        self.check_interval = check_interval
+        self._tariffs = {}  # путь -> Tariff
+        self._by_name = {}
+        self._last_check = None
+
+    def refresh(self, force: bool = False):
+        now = time.monotonic()
+        if not force and self._last_check is not None and now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        if not os.path.isdir(self.directory):
+            self._tariffs, self._by_name = {}, {}
+            return
+
+        tariffs = {}
+        for entry in sorted(os.scandir(self.directory), key=lambda e: e.name):
+            if not entry.is_file() or not entry.name.endswith(TARIFF_SUFFIX):
+                continue
+            cached = self._tariffs.get(entry.path)
+            if cached is not None and cached.mtime == entry.stat().st_mtime:
+                tariffs[entry.path] = cached
+            else:
+                tariffs[entry.path] = parse_tariff_file(entry.path)
+
+        by_name = {}
+        for tariff in tariffs.values():
+            if tariff.name in by_name:
+                raise TariffError(f"Тариф «{tariff.name}» объявлен дважды")
+            by_name[tariff.name] = tariff
+        self._tariffs = tariffs
+        self._by_name = by_name
+
+    def names(self) -> list:
+        self.refresh()
+        return list(self._by_name)
+
+    def tariffs(self) -> list:
+        self.refresh()
+        return list(self._by_name.values())
+
+    def get(self, name: str) -> Tariff:
+        self.refresh()
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise KeyError(f"Неизвестный тариф: {name}") from None
+
+
+_book = None
+
+
+def get_tariff_book() -> TariffBook:
+    global _book
+    if _book is None:
+        _book = TariffBook(default_tariffs_dir())
+    return _book
+
+
+def verify_records(records: dict, tariff_name: str = None, book: TariffBook = None):
+    """Отчёт сверки строк с тарифом; None, если тарифов нет или ни одна строка не проверена.
+
+    Без tariff_name при нескольких тарифах отчёт — AmbiguousReport по всем
+    тарифам, которые проверили хотя бы одну строку.
+    """
+    book = book or get_tariff_book()
+    tariffs = [book.get(tariff_name)] if tariff_name else book.tariffs()
+    reports = [report for report in (tariff.check(records) for tariff in tariffs) if report.checked_count]
+    if not reports:
+        return None
+    if len(tariffs) == 1:
+        return reports[0]
+    return AmbiguousReport(reports)
+
+
+def verify_table(table, tariff: Tariff) -> dict:
+    """Векторная сверка таблицы analytics.PriceTable с одним тарифом.
+
+    Возвращает колонки по строкам: expected (копейки, NaN — не проверено)
+    и mismatch (bool).
+    """
+    from analytics import load_numpy
+    np = load_numpy()
+    expected = _expected_column(np, table, tariff)
+    checked = ~np.isnan(expected)
+    mismatch = checked & (np.abs(np.where(checked, expected, 0) - table.kopecks) > tariff.tolerance)
+    return {"expected": expected, "mismatch": mismatch}
+
+
+def _expected_column(np, table, tariff: Tariff):
+    """Суммы по тарифу для всех строк таблицы; NaN там, где проверить нельзя."""
+    rules = [tariff.rule_for(label) for label in table.labels]
+    expected = np.full(len(table), np.nan)
+    quantity = table.quantity
+    quantity_unit = table.quantity_unit
+    for code, rule in enumerate(rules):
+        if rule is None:
+            continue
+        rows = np.flatnonzero(table.label == code)
+        if rule.unit == UNIT_FIXED:
+            expected[rows] = rule.price
+        elif rule.unit == UNIT_SURGE:
+            base_codes = [other for other, label in enumerate(table.labels) if label.strip().casefold() in rule.base]
+            base_rows = np.isin(table.label, base_codes)
+            base = np.bincount(table.ticket[base_rows], weights=table.kopecks[base_rows],
+                               minlength=table.ticket_count)
+            rows = rows[quantity_unit[rows] == QUANTITY_UNITS.index(QUANTITY_COEF)]
+            expected[rows] = np.floor((quantity[rows] - 1) * base[table.ticket[rows]] + 0.5 + 1e-9)
+        else:
+            rows = rows[quantity_unit[rows] == QUANTITY_UNITS.index(rule.unit)]
+            expected[rows] = np.floor(np.maximum(quantity[rows] - rule.free, 0) * rule.price + 0.5 + 1e-9)
+    return expected
+
+
+def main(argv=None):
+    from analytics import PriceTable, load_numpy, price_texts
+    from batch_cli import detect_format
+
+    parser = argparse.ArgumentParser(description="Сверка расшифровок стоимости с тарифами")
+    parser.add_argument("input", help="файл JSONL/CSV с тикетами, текстовая выгрузка или '-' для stdin")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="формат входа (по умолчанию по расширению)")
+    parser.add_argument("--split-orders", action="store_true", help="вход — текст с несколькими заказами")
+    parser.add_argument("--tariff", help="название тарифа (обязательно, если тарифов несколько)")
+    parser.add_argument("-o", "--output", help="CSV со строками, которые не сходятся с тарифом")
+    args = parser.parse_args(argv)
+
+    book = get_tariff_book()
+    tariffs = [book.get(args.tariff)] if args.tariff else book.tariffs()
+    if not tariffs:
+        print(f"Нет тарифов в папке {book.directory}", file=sys.stderr)
+        return 1
+    if len(tariffs) > 1:
+        names = ", ".join(f"«{tariff.name}»" for tariff in tariffs)
+        print(f"Тарифов несколько ({names}): укажите --tariff", file=sys.stderr)
+        return 1
+    tariff = tariffs[0]
+
+    started = time.perf_counter()
+    fmt = args.format or detect_format(args.input)
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    try:
+        table = PriceTable.from_texts(price_texts(source, fmt, args.split_orders))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    loaded = time.perf_counter()
+    result = verify_table(table, tariff)
+    elapsed = time.perf_counter() - loaded
+
+    np = load_numpy()
+    mismatch = result["mismatch"]
+    checked = ~np.isnan(result["expected"])
+    bad_tickets = np.unique(table.ticket[mismatch])
+    print(f"Тикетов: {table.ticket_count}, строк: {len(table)}, проверено строк: {int(checked.sum())}")
+    print(f"Тикетов с расхождениями: {len(bad_tickets)}, строк с расхождениями: {int(mismatch.sum())}")
+    per_label = np.bincount(table.label[mismatch], minlength=len(table.labels))
+    for code in np.argsort(-per_label, kind="stable"):
+        if per_label[code]:
+            print(f"  {table.labels[code]}: {per_label[code]}")
+    print(f"Разбор {loaded - started:.2f} с, сверка {elapsed * 1000:.0f} мс", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["ticket", "label", "pasted", "expected", "tariff"])
+            for row in np.flatnonzero(mismatch):
+                writer.writerow([
+                    int(table.ticket[row]) + 1, table.labels[table.label[row]],
+                    format_rubles(int(table.kopecks[row])), format_rubles(int(result["expected"][row])),
+                    tariff.name,
+                ])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+# template_registry.py
+"""Реестр шаблонов ответов, загружаемых из папки templates.
+
+Каждый шаблон — текстовый файл в UTF-8 с заголовком и текстом, разделёнными
+строкой «---»:
+
+    name: Шаблон 1 (РВ)
+    kind: regular
+    ---
+    Всё проверила ... заказа {order_number} ...
+
+При загрузке текст один раз разбивается на литералы и подстановки, а набор
+подстановок сверяется с полями, которые движок передаёт шаблону этого типа.
+Файлы перечитываются, только если изменилось их время модификации, поэтому
+шаблоны можно править без пересборки EXE.
+"""
+import os
+import string
+import sys
+import time
+
+from utils import resource_path
+
+KIND_REGULAR = "regular"
+KIND_BATCH_CANCEL = "batch_cancel"
+KIND_SPLIT_PAYMENT = "split_payment"
+
+# Поля, которые движок передаёт шаблону каждого типа
+KIND_FIELDS = {
+    KIND_REGULAR: {"order_number", "body", "total"},
+    KIND_BATCH_CANCEL: {"distance", "time", "done_count", "done_word", "total_count", "cancel_text"},
+    KIND_SPLIT_PAYMENT: {"amount1", "amount2", "datetime1", "datetime2", "parts_word", "amounts", "datetimes"},
+}
+
+TEMPLATE_SUFFIX = ".txt"
+HEADER_SEPARATOR = "---"
+
+_formatter = string.Formatter()
+
+
+class TemplateError(ValueError):
+    """Файл шаблона не удалось разобрать."""
+
+
+class CompiledTemplate:
+    """Шаблон, заранее разбитый на литералы и подстановки."""
+
+    __slots__ = ("name", "kind", "path", "mtime", "segments", "fields")
+
+    def __init__(self, name: str, kind: str, text: str, path: str = "", mtime: float = 0.0):
+        if kind not in KIND_FIELDS:
+            raise TemplateError(f"Неизвестный тип шаблона «{name}»: {kind}")
+        self.name = name
+        self.kind = kind
+        self.path = path
+        self.mtime = mtime
+        self.segments = compile_segments(text)
+        self.fields = frozenset(field for _, field, _, _ in self.segments if field is not None)
+        unknown = self.fields - KIND_FIELDS[kind]
+        if unknown:
+            raise TemplateError(f"Шаблон «{name}» использует неизвестные поля: {', '.join(sorted(unknown))}")
+
+    def render(self, values: dict) -> str:
+        parts = []
+        for literal, field, spec, conversion in self.segments:
+            parts.append(literal)
+            if field is None:
+                continue
+            value = values[field]
+            if conversion:
+                value = _formatter.convert_field(value, conversion)
+            parts.append(format(value, spec) if spec else str(value))
+        return "".join(parts)
+
+
+def compile_segments(text: str) -> tuple:
+    """Разбивает текст на (литерал, поле, формат, преобразование) — как str.format."""
+    segments = []
+    for literal, field, spec, conversion in _formatter.parse(text):
+        if field is not None and not field.isidentifier():
+            raise TemplateError(f"Недопустимая подстановка {{{field}}}")
+        segments.append((literal, field, spec or "", conversion))
+    return tuple(segments)
+
+
+def parse_template_file(path: str) -> CompiledTemplate:
+    mtime = os.stat(path).st_mtime
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+
+    header, separator, body = content.partition("\n" + HEADER_SEPARATOR + "\n")
+    if not separator:
+        raise TemplateError(f"В файле {os.path.basename(path)} нет строки «{HEADER_SEPARATOR}»")
+    meta = {}
+    for line in header.splitlines():
+        key, _, value = line.partition(":")
+        if value:
+            meta[key.strip().lower()] = value.strip()
+    if "name" not in meta or "kind" not in meta:
+        raise TemplateError(f"В заголовке {os.path.basename(path)} нужны name и kind")
+
+    # Редакторы обычно добавляют перевод строки в конце файла
+    if body.endswith("\n"):
+        body = body[:-1]
+    return CompiledTemplate(meta["name"], meta["kind"], body, path, mtime)
+
+
+def default_templates_dir() -> str:
+    """Папка шаблонов: YH_TEMPLATES_DIR, затем templates рядом с EXE, затем встроенная."""
+    env_dir = os.environ.get("YH_TEMPLATES_DIR")
+    if env_dir:
+        return env_dir
+    if getattr(sys, "frozen", False):
+        beside_exe = os.path.join(os.path.dirname(sys.executable), "templates")
+        if os.path.isdir(beside_exe):
+            return beside_exe
+    bundled = resource_path("templates")
+    if os.path.isdir(bundled):
+        return bundled
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+
+class TemplateRegistry:
+    """Набор шаблонов папки с перезагрузкой по времени модификации файлов."""
+
+    def __init__(self, directory: str, check_interval: float = 1.0):
+        self.directory = directory
+        self.check_interval = check_interval
+        self._templates = {}  # путь -> CompiledTemplate
+        self._by_name = {}
+        self._last_check = None
+
+    def refresh(self, force: bool = False):
+        """Перечитывает изменённые файлы; не чаще раза в check_interval секунд."""
+        now = time.monotonic()
+        if not force and self._last_check is not None and now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        templates = {}
+        for entry in sorted(os.scandir(self.directory), key=lambda e: e.name):
+            if not entry.is_file() or not entry.name.endswith(TEMPLATE_SUFFIX):
+                continue
+            cached = self._templates.get(entry.path)
+            if cached is not None and cached.mtime == entry.stat().st_mtime:
+                templates[entry.path] = cached
+            else:
+                templates[entry.path] = parse_template_file(entry.path)
+
+        by_name = {}
+        for template in templates.values():
+            if template.name in by_name:
+                raise TemplateError(f"Шаблон «{template.name}» объявлен дважды")
+            by_name[template.name] = template
+        self._templates = templates
+        self._by_name = by_name
+
+    def names(self) -> list:
+        self.refresh()
+        return list(self._by_name)
+
+    def get(self, name: str) -> CompiledTemplate:
+        self.refresh()
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise KeyError(f"Неизвестный шаблон: {name}") from None
+
+    def __contains__(self, name: str) -> bool:
+        self.refresh()
+        return name in self._by_name
+
+
+_registry = None
+
+
+def get_registry() -> TemplateRegistry:
+    """Общий реестр для папки шаблонов по умолчанию."""
+    global _registry
+    if _registry is None:
+        _registry = TemplateRegistry(default_templates_dir())
+    return _registry
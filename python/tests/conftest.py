@@ -0,0 +1,6 @@
+# conftest.py
+"""Тесты запускаются из папки python:  python -m pytest tests"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
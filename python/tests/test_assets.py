@@ -0,0 +1,80 @@
+# test_assets.py
+import struct
+
+import pytest
+
+import assets
+from assets import AssetError, AssetPack, build_pack
+
+
+@pytest.fixture
+def pack_path(tmp_path):
+    gifs = tmp_path / "gifs"
+    gifs.mkdir()
+    (gifs / "ага.gif").write_bytes(b"GIF89a" + bytes(range(200)))
+    (gifs / "надя.png").write_bytes(b"\x89PNG" + b"\0" * 50)
+    path = tmp_path / "assets.pack"
+    build_pack([str(gifs)], str(path), root=str(tmp_path))
+    return path
+
+
+def _open(path):
+    pack = AssetPack(str(path))
+    try:
+        return pack.names()
+    finally:
+        pack.close()
+
+
+def test_pack_roundtrip(pack_path):
+    pack = AssetPack(str(pack_path))
+    assert sorted(pack.names()) == ["gifs/ага.gif", "gifs/надя.png"]
+    assert bytes(pack.read("gifs/ага.gif")) == b"GIF89a" + bytes(range(200))
+    assert pack.verify() == []
+    pack.close()
+
+
+def _index_end(data: bytes) -> int:
+    return assets._HEADER.size + assets._HEADER.unpack_from(data, 0)[4]
+
+
+@pytest.mark.parametrize("corrupt", [
+    # файл обрезан посреди индекса
+    lambda data: data[:assets._HEADER.size + 10],
+    # размер индекса больше файла
+    lambda data: data[:12] + struct.pack("<I", len(data)) + data[16:],
+    # записей больше, чем помещается в индекс
+    lambda data: data[:8] + struct.pack("<I", 1000) + data[12:],
+    # длина имени выходит за индекс
+    lambda data: data[:assets._HEADER.size + 20] + struct.pack("<H", 0xFFFF) + data[assets._HEADER.size + 22:],
+    # имя записи — не UTF-8
+    lambda data: data[:assets._HEADER.size + 22] + b"\xff\xfe" + data[assets._HEADER.size + 24:],
+    # данные записи за концом файла
+    lambda data: data[:_index_end(data) + 1],
+    # смещение записи внутри индекса
+    lambda data: data[:assets._HEADER.size] + struct.pack("<Q", 0) + data[assets._HEADER.size + 8:],
+])
+def test_corrupt_pack_raises_asset_error(pack_path, corrupt):
+    pack_path.write_bytes(corrupt(pack_path.read_bytes()))
+    with pytest.raises(AssetError):
+        _open(pack_path)
+
+
+def test_not_a_pack(tmp_path):
+    for content in (b"", b"YH", b"NOPE" + b"\0" * 32):
+        path = tmp_path / "bad.pack"
+        path.write_bytes(content)
+        with pytest.raises(AssetError):
+            _open(path)
+
+
+def test_image_reader_reads_pack_without_copy(pack_path, monkeypatch):
+    QtGui = pytest.importorskip("PyQt5.QtGui")
+    monkeypatch.setenv("YH_ASSET_PACK", str(pack_path))
+    monkeypatch.setattr(assets, "_pack", None)
+    reader = assets.image_reader("gifs/ага.gif")
+    assert isinstance(reader, QtGui.QImageReader)
+    pack, view = reader.source
+    assert isinstance(view, memoryview)
+    assert bytes(reader.device().data()) == b"GIF89a" + bytes(range(200))
+    monkeypatch.setattr(assets, "_pack", None)
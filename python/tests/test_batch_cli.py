@@ -0,0 +1,54 @@
+# test_batch_cli.py
+import io
+import json
+
+from batch_cli import main, process_record, read_export, read_jsonl, run_mapped
+from ingest import BadRecord, FORMAT_JSONL
+
+LINES = [
+    '{"id": "ok", "template": "нет такого"}',
+    '{"id": "broken", ',
+    '',
+    '[1, 2, 3]',
+    '{"id": "last"}',
+]
+
+
+def test_read_jsonl_marks_bad_lines_with_file_line_numbers():
+    records = list(read_jsonl(io.StringIO("\n".join(LINES) + "\n")))
+    assert records[0]["id"] == "ok"
+    assert isinstance(records[1], BadRecord) and records[1].line == 2
+    assert isinstance(records[2], BadRecord) and records[2].line == 4
+    assert records[3]["id"] == "last"
+
+
+def test_process_record_turns_bad_records_into_error_rows():
+    row = process_record(BadRecord(7, "некорректный JSON"))
+    assert row["id"] == "#7" and row["response"] == ""
+    assert row["error"].startswith("строка 7:")
+    assert process_record(["не", "объект"])["error"]
+
+
+def test_mapped_run_continues_after_bad_lines(tmp_path):
+    path = tmp_path / "tickets.jsonl"
+    path.write_text("\n".join(LINES) + "\n", encoding="utf-8")
+    rows = list(run_mapped(str(path), FORMAT_JSONL))
+    assert [row["id"] for row in rows] == ["ok", "#2", "#4", "last"]
+    assert "строка 2" in rows[1]["error"] and "строка 4" in rows[2]["error"]
+
+
+def test_main_writes_error_row_per_bad_line(tmp_path):
+    source = tmp_path / "tickets.jsonl"
+    source.write_text("\n".join(LINES) + "\n", encoding="utf-8")
+    target = tmp_path / "answers.jsonl"
+    assert main([str(source), "-o", str(target)]) == 0
+    rows = [json.loads(line) for line in target.read_text(encoding="utf-8").splitlines()]
+    assert len(rows) == 4
+    assert [bool(row["error"]) for row in rows] == [True, True, True, True]
+
+
+def test_read_export_diverts_bad_lines_to_skipped():
+    skipped = []
+    records = list(read_export(io.StringIO("\n".join(LINES)), "jsonl", skipped))
+    assert [r["id"] for r in records] == ["ok", "last"]
+    assert [line for line, _ in skipped] == [2, 4]
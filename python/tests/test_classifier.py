@@ -0,0 +1,42 @@
+# test_classifier.py
+import pytest
+
+from classifier import classify
+from template_registry import KIND_BATCH_CANCEL, KIND_REGULAR, KIND_SPLIT_PAYMENT
+
+# Шум без маркеров, длиннее любого «окна» в начале вставки
+NOISE = "Комментарий оператора без сумм и дат\n" * 500
+
+PRICE = "Подача\n99 ₽\nВремя в пути\n117 ₽ (за 13 мин.)\n"
+ROUTE = "Расчётное расстояние\n12.5 км.\nРасчётное время\n35 мин\n"
+PAYMENTS = "26.09.2025, 21:19:41\n500 ₽\n27.09.2025, 09:05:00\n250 ₽\n"
+
+
+def test_short_pastes():
+    assert classify(PRICE).kind == KIND_REGULAR
+    assert classify(ROUTE).kind == KIND_BATCH_CANCEL
+    result = classify(PAYMENTS)
+    assert result.kind == KIND_SPLIT_PAYMENT
+    assert result.fields == {"payment1": "26.09.2025, 21:19:41\n500 ₽", "payment2": "27.09.2025, 09:05:00\n250 ₽"}
+    assert classify("просто текст").kind is None
+
+
+@pytest.mark.parametrize("tail, kind", [
+    (PRICE, KIND_REGULAR),
+    (ROUTE, KIND_BATCH_CANCEL),
+    (PAYMENTS, KIND_SPLIT_PAYMENT),
+])
+def test_markers_after_long_noise(tail, kind):
+    assert len(NOISE) > 4096
+    assert classify(NOISE + tail).kind == kind
+
+
+def test_route_header_at_the_end_wins_over_prices():
+    text = "Заказ № 123456\n" + PRICE + NOISE + "Итог: Расчетное расстояние: 8 км\n"
+    assert classify(text).kind == KIND_BATCH_CANCEL
+
+
+def test_order_number_is_taken_from_first_header():
+    result = classify("Заказ № 111\n" + PRICE + NOISE + "Заказ № 222\n")
+    assert result.kind == KIND_REGULAR
+    assert result.fields["order_number"] == "111"
@@ -0,0 +1,55 @@
+# test_engine.py
+import pytest
+
+from engine import generate, templates_of_kind
+from lexer import iter_price_pairs, route_values
+from template_registry import KIND_BATCH_CANCEL, KIND_SPLIT_PAYMENT
+
+SPLIT = templates_of_kind(KIND_SPLIT_PAYMENT)[0]
+BATCH = templates_of_kind(KIND_BATCH_CANCEL)[0]
+
+
+def test_price_pairs_on_separate_and_single_lines():
+    text = "Подача\n99 ₽\nВремя в пути 117 ₽ (за 13 мин.)\nОжидание\n10.5 ₽ (за 3 мин)\n"
+    assert list(iter_price_pairs(text)) == [
+        ("Подача", "99 ₽", ""),
+        ("Время в пути", "117 ₽", "за 13 мин."),
+        ("Ожидание", "10.5 ₽", "за 3 мин"),
+    ]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Расчётное расстояние\n12.5 км.\nРасчётное время\n35 мин", ("12.5 км", "35 мин")),
+    ("Расчетное расстояние: 800 м\nРасчетное время - 1 ч 5 мин", ("800 м", "1 ч 5 мин")),
+    ("Подача\n99 ₽", (None, None)),
+])
+def test_route_values(text, expected):
+    assert route_values(text) == expected
+
+
+def test_split_payment_two_parts():
+    response = generate(SPLIT, {"payment1": "26.09.2025, 21:19:41\n500 ₽",
+                                "payment2": "27.09.2025, 09:05:00\n250.50 ₽"})
+    assert "500 ₽ и 250.50 ₽" in response
+    assert "26 сентября в 21:19 и 27 сентября в 09:05" in response
+
+
+def test_split_payment_three_parts_and_loose_date():
+    response = generate(SPLIT, {"payment1": "26.09.2025, 21:19:41\n500 ₽",
+                                "payment2": "  27.09.2025, 09:05:00  \n\n250 ₽",
+                                "payment3": "1.10.2025, 10:00:00\n100 ₽"})
+    assert "тремя суммами: 500 ₽, 250 ₽ и 100 ₽" in response
+    assert "1 октября в 10:00" in response
+
+
+@pytest.mark.parametrize("payment2", ["", "27.09.2025, 09:05:00", "31.02.2025, 09:05:00\n100 ₽"])
+def test_split_payment_rejects_bad_blocks(payment2):
+    with pytest.raises(ValueError):
+        generate(SPLIT, {"payment1": "26.09.2025, 21:19:41\n500 ₽", "payment2": payment2})
+
+
+def test_batch_cancel_uses_route_values():
+    response = generate(BATCH, {"calc_text": "Расчётное расстояние\n12.5 км.\nРасчётное время\n35 мин",
+                                "done": "2", "total": "3"})
+    assert "— 12.5 км;\n— 35 мин." in response
+    assert "2 вручения из 3" in response
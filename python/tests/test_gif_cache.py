@@ -0,0 +1,44 @@
+# test_gif_cache.py
+import pytest
+
+QtCore = pytest.importorskip("PyQt5.QtCore")
+
+from gif_cache import AnimationCache  # noqa: E402
+
+# GIF 1×1 из двух кадров (красный и синий) с задержкой 50 мс
+_FRAME = b"\x21\xf9\x04\x00\x05\x00\x00\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02%s\x00"
+GIF = (b"GIF89a\x01\x00\x01\x00\x80\x00\x00\xff\x00\x00\x00\x00\xff"
+       + _FRAME % b"\x44\x01" + _FRAME % b"\x4c\x01" + b"\x3b")
+NAME = "gifs/test.gif"
+
+
+@pytest.fixture
+def gif_dir(tmp_path, monkeypatch):
+    (tmp_path / "gifs").mkdir()
+    (tmp_path / "gifs" / "test.gif").write_bytes(GIF)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("YH_ASSET_PACK", raising=False)
+    return tmp_path
+
+
+def test_cached_never_decodes(gif_dir):
+    cache = AnimationCache([NAME])
+    assert cache.cached(NAME, QtCore.QSize(10, 10)) is None
+    assert cache._bytes == 0
+
+
+def test_decoded_and_scaled_frames_share_the_budget(gif_dir):
+    size = QtCore.QSize(100, 100)
+    one_size = 2 * 100 * 100 * 4
+    cache = AnimationCache([NAME], max_bytes=one_size + 64)
+    frames = cache.scaled(NAME, size)
+    assert len(frames) == 2
+    assert cache.cached(NAME, size) is frames
+    # Исходные кадры тоже в кэше и посчитаны
+    assert cache._bytes == one_size + 8
+
+    # Новый размер не помещается вместе со старым: уходят и старый размер,
+    # и исходные кадры, остаётся последний набор
+    cache.scaled(NAME, QtCore.QSize(100, 101))
+    assert cache.cached(NAME, size) is None
+    assert cache._bytes == 2 * 100 * 101 * 4
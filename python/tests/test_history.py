@@ -0,0 +1,83 @@
+# test_history.py
+import json
+import sqlite3
+
+import pytest
+
+from engine import templates_of_kind
+from history import HistoryStore, _MIGRATIONS, input_fields, input_hash
+from template_registry import KIND_REGULAR
+
+TEMPLATE = templates_of_kind(KIND_REGULAR)[0]
+FIELDS = {"order_number": "123456", "price_text": "Подача\n99 ₽\nОжидание\n14 ₽ (за 2 мин.)\n"}
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "history.sqlite3")
+
+
+def _open(path, **kwargs):
+    store = HistoryStore(path, **kwargs)
+    assert store.wait_ready(10)
+    return store
+
+
+def test_save_lookup_and_search(store_path):
+    store = _open(store_path)
+    assert store.lookup(TEMPLATE, FIELDS) is None
+    store.save(TEMPLATE, FIELDS, "ответ про подачу")
+    # Тот же вход с другими пробелами и пустыми строками — из LRU, без базы
+    spaced = dict(FIELDS, price_text="  Подача\n\n99 ₽\nОжидание\n14 ₽ (за 2 мин.)  ")
+    assert store.lookup(TEMPLATE, spaced) == "ответ про подачу"
+    store.flush()
+    assert [entry.order_number for entry in store.search("ожид")] == ["123456"]
+    template, fields, response = store.latest_for_order(" 123456 ")
+    assert (template, response) == (TEMPLATE, "ответ про подачу")
+    assert fields == input_fields(TEMPLATE, FIELDS)
+    store.close()
+
+
+def test_reopened_store_warms_lru(store_path):
+    store = _open(store_path)
+    store.save(TEMPLATE, FIELDS, "старый ответ")
+    store.close()
+    store = _open(store_path)
+    assert store.lookup(TEMPLATE, FIELDS) == "старый ответ"
+    store.close()
+
+
+def test_version_1_database_is_migrated(store_path):
+    normalized = input_fields(TEMPLATE, FIELDS)
+    connection = sqlite3.connect(store_path)
+    connection.executescript(_MIGRATIONS[1])
+    connection.execute(
+        "INSERT INTO responses (created, template, order_number, input_hash, fields, response) "
+        "VALUES (1.0, ?, ?, ?, ?, ?)",
+        (TEMPLATE, "777", input_hash(TEMPLATE, normalized), json.dumps(normalized, ensure_ascii=False),
+         "ответ из первой версии"))
+    connection.execute("PRAGMA user_version=1")
+    connection.commit()
+    connection.close()
+
+    store = _open(store_path)
+    assert store.ready
+    # Названия полей заполнены миграцией и ищутся
+    assert [entry.order_number for entry in store.search("подача")] == ["777"]
+    assert store.latest_for_order("777")[2] == "ответ из первой версии"
+    assert store.lookup(TEMPLATE, FIELDS) == "ответ из первой версии"
+    store.close()
+    connection = sqlite3.connect(store_path)
+    assert connection.execute("PRAGMA user_version").fetchone()[0] == max(_MIGRATIONS)
+    connection.close()
+
+
+def test_unavailable_database_leaves_lookup_working(tmp_path):
+    # Путь к базе — существующая папка: SQLite не откроет её как файл
+    store = HistoryStore(str(tmp_path))
+    assert not store.wait_ready(10)
+    assert not store.preparing
+    assert store.search("подача") == [] and store.latest_for_order("1") is None
+    store.save(TEMPLATE, FIELDS, "ответ")
+    assert store.lookup(TEMPLATE, FIELDS) == "ответ"
+    store.close()
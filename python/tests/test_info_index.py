@@ -0,0 +1,31 @@
+# test_info_index.py
+from info_index import InfoIndex
+
+
+def _index():
+    index = InfoIndex()
+    index.add("Доставка", "Доставка курьером по городу")
+    index.add("Оплата", "Оплата картой, отмена заказа")
+    index.add("Доставка и отмена", "Отмена доставки после забора")
+    return index
+
+
+def test_prefix_match_ranks_title_first():
+    assert _index().search("дост") == [0, 2]
+
+
+def test_infix_fallback_when_no_word_starts_with_term():
+    index = _index()
+    assert index.search("ставк") == [0, 2]
+    # «отмена» у раздела 2 и в заголовке, и в тексте
+    assert index.search("мена") == [2, 1]
+
+
+def test_substring_fallback_across_word_boundary():
+    assert _index().search("ка кур") == [0]
+
+
+def test_all_terms_required():
+    index = _index()
+    assert index.search("отмена доставки") == [2]
+    assert index.search("оплата курьером") == []
@@ -0,0 +1,50 @@
+# test_money.py
+import pytest
+
+from engine import generate, templates_of_kind
+from money import PriceLine, format_rubles, format_total, to_kopecks, total_kopecks
+from template_registry import KIND_REGULAR
+
+
+@pytest.mark.parametrize("amount, kopecks", [
+    ("148 ₽", 14800),
+    ("12.5 ₽", 1250),
+    ("12.50₽", 1250),
+    ("0.01 ₽", 1),
+    ("99.994 ₽", 9999),
+    ("99.995 ₽", 10000),
+    ("99.999₽", 10000),
+    (".5 ₽", 50),
+])
+def test_to_kopecks_rounds_half_up(amount, kopecks):
+    assert to_kopecks(amount) == kopecks
+
+
+@pytest.mark.parametrize("kopecks, text", [(12349, "123 ₽"), (12350, "124 ₽"), (0, "0 ₽"), (49, "0 ₽"), (50, "1 ₽")])
+def test_format_total_rounds_half_up(kopecks, text):
+    assert format_total(kopecks) == text
+
+
+@pytest.mark.parametrize("kopecks, text", [(14800, "148 ₽"), (14850, "148.50 ₽"), (5, "0.05 ₽"), (-150, "-1.50 ₽")])
+def test_format_rubles(kopecks, text):
+    assert format_rubles(kopecks) == text
+
+
+def test_total_is_exact_sum_of_kopecks():
+    lines = [PriceLine("Подача", "0.10 ₽"), PriceLine("Время", "0.20 ₽"), PriceLine("Км", "0.20 ₽")]
+    assert total_kopecks(lines) == 50
+    assert format_total(total_kopecks(lines)) == "1 ₽"
+
+
+def test_sub_kopeck_amounts_are_rounded_once():
+    # Каждая строка по 0.495 ₽ округлялась бы до 50 коп., а сумма 0.99 ₽ — до 1 ₽
+    lines = [PriceLine("Подача", "0.495 ₽")]
+    assert format_total(total_kopecks(lines)) == "0 ₽"
+    lines.append(PriceLine("Время", "0.495 ₽"))
+    assert format_total(total_kopecks(lines)) == "1 ₽"
+
+
+def test_rendered_total_matches_lines():
+    template = templates_of_kind(KIND_REGULAR)[0]
+    price = "Подача\n99 ₽\nВремя в пути\n117.50 ₽ (за 13 мин.)\nКилометры в пути\n80.49 ₽ (за 5 км)\n"
+    assert "Итого: 297 ₽." in generate(template, {"order_number": "1", "price_text": price})
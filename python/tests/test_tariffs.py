@@ -0,0 +1,86 @@
+# test_tariffs.py
+import pytest
+
+from tariffs import AmbiguousReport, STATUS_MISMATCH, STATUS_OK, STATUS_UNCHECKED, TariffBook, verify_records
+from utils import parse_price_records
+
+COURIER = """name: Курьер
+tolerance: 1
+---
+Подача           | fixed  | 99
+Время в пути     | minute | 9
+Километры в пути | km     | 16
+Повышенный спрос | surge  | Подача, Время в пути, Километры в пути
+"""
+CARGO = COURIER.replace("Курьер", "Грузовой").replace("| 99", "| 199")
+
+PRICE = """Подача
+99 ₽
+Время в пути
+117 ₽ (за 13 мин.)
+Километры в пути
+80 ₽ (за 5 км)
+Повышенный спрос
+118.40 ₽ (x1.4)
+"""
+
+
+def _book(tmp_path, *tariffs):
+    for number, content in enumerate(tariffs):
+        (tmp_path / f"t{number}.tariff").write_text(content, encoding="utf-8")
+    return TariffBook(str(tmp_path), check_interval=0)
+
+
+def test_matching_paste_is_ok(tmp_path):
+    report = verify_records(parse_price_records(PRICE), book=_book(tmp_path, COURIER))
+    assert report.ok and not report.ambiguous
+    assert [check.status for check in report.checks] == [STATUS_OK] * 4
+
+
+def test_mismatch_names_component_and_amounts(tmp_path):
+    # Без надбавки: она считается от сумм расшифровки и разошлась бы вместе со строкой
+    text = PRICE.replace("117 ₽", "130 ₽").split("Повышенный спрос")[0]
+    report = verify_records(parse_price_records(text), book=_book(tmp_path, COURIER))
+    assert not report.ok
+    assert [check.label for check in report.mismatches] == ["Время в пути"]
+    check = report.mismatches[0]
+    assert (check.pasted, check.expected, check.status) == (13000, 11700, STATUS_MISMATCH)
+    assert "в расшифровке 130 ₽, по тарифу 117 ₽" in report.describe()
+
+
+def test_tolerance_absorbs_admin_rounding(tmp_path):
+    report = verify_records(parse_price_records(PRICE.replace("117 ₽", "118 ₽")), book=_book(tmp_path, COURIER))
+    assert report.ok
+
+
+def test_lines_without_quantity_are_unchecked(tmp_path):
+    text = PRICE.replace("117 ₽ (за 13 мин.)", "117 ₽")
+    report = verify_records(parse_price_records(text), book=_book(tmp_path, COURIER))
+    assert report.checks[1].status == STATUS_UNCHECKED
+    assert report.ok
+
+
+def test_several_tariffs_without_name_are_ambiguous(tmp_path):
+    book = _book(tmp_path, COURIER, CARGO)
+    report = verify_records(parse_price_records(PRICE), book=book)
+    assert isinstance(report, AmbiguousReport)
+    assert not report.ok
+    assert "«Грузовой» — расхождений" in report.describe()
+
+
+def test_several_tariffs_agreeing_are_ok(tmp_path):
+    # Подачи в расшифровке нет, остальные строки одинаковы у обоих тарифов
+    text = PRICE.split("Время в пути", 1)[1]
+    text = "Время в пути" + text.split("Повышенный спрос")[0]
+    report = verify_records(parse_price_records(text), book=_book(tmp_path, COURIER, CARGO))
+    assert report.ambiguous and report.ok
+
+
+def test_named_tariff_is_checked_alone(tmp_path):
+    book = _book(tmp_path, COURIER, CARGO)
+    report = verify_records(parse_price_records(PRICE), "Грузовой", book)
+    assert not report.ambiguous
+    # Надбавка считается от сумм расшифровки, поэтому расходится только подача
+    assert [check.label for check in report.mismatches] == ["Подача"]
+    with pytest.raises(KeyError):
+        verify_records(parse_price_records(PRICE), "Нет такого", book)
@@ -0,0 +1,51 @@
+# test_template_registry.py
+import os
+
+import pytest
+
+from template_registry import KIND_REGULAR, TemplateError, TemplateRegistry, get_registry
+
+REGULAR = "name: Тест\nkind: regular\n---\nЗаказ {order_number}: {body}\nИтого: {total}.\n"
+
+
+def _write(path, content, mtime=None):
+    path.write_text(content, encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_bundled_templates_load():
+    registry = get_registry()
+    assert len(registry.names()) >= 4
+    kinds = {registry.get(name).kind for name in registry.names()}
+    assert KIND_REGULAR in kinds
+
+
+def test_render_and_hot_reload(tmp_path):
+    path = tmp_path / "t.txt"
+    _write(path, REGULAR, 1_000_000)
+    registry = TemplateRegistry(str(tmp_path), check_interval=0)
+    values = {"order_number": "1", "body": "— Подача: 99 ₽", "total": "99 ₽"}
+    assert registry.get("Тест").render(values) == "Заказ 1: — Подача: 99 ₽\nИтого: 99 ₽."
+
+    _write(path, REGULAR.replace("Итого", "Всего"), 1_000_001)
+    assert registry.get("Тест").render(values).endswith("Всего: 99 ₽.")
+
+
+@pytest.mark.parametrize("content", [
+    "name: Тест\nkind: regular\nЗаказ {order_number}",           # нет «---»
+    "kind: regular\n---\nЗаказ {order_number}",                  # нет name
+    "name: Тест\nkind: regular\n---\nЗаказ {order_number.id}",   # не имя поля
+    "name: Тест\nkind: regular\n---\nЗаказ {distance}",          # поле чужого типа
+])
+def test_invalid_templates_raise(tmp_path, content):
+    _write(tmp_path / "t.txt", content)
+    with pytest.raises(TemplateError):
+        TemplateRegistry(str(tmp_path)).names()
+
+
+def test_duplicate_names_raise(tmp_path):
+    _write(tmp_path / "a.txt", REGULAR)
+    _write(tmp_path / "b.txt", REGULAR)
+    with pytest.raises(TemplateError):
+        TemplateRegistry(str(tmp_path)).names()
@@ -0,0 +1,379 @@
+# theme.py
+"""Темы оформления: цвета главного окна идут через палитру приложения.
+
+Стиль главного окна (window_stylesheet) один на обе темы: цвета в нём —
+ссылки palette(роль), а сами цвета темы лежат в палитре приложения
+(PALETTE_ROLES: какой цвет таблицы в какой роли). Стиль ставится только на
+главное окно, один раз, поэтому окна без родителя (история, мультизаказ)
+его не получают. Переключение темы — QApplication.setPalette; Qt подставляет
+palette(роль) при полировке виджета, поэтому виджеты окна после смены
+палитры переполировываются (без разбора стиля заново).
+
+У вкладки справки своих цветов больше, чем ролей в палитре, поэтому её стиль
+(info_stylesheet) ставится на саму вкладку и при смене темы меняется только
+на ней.
+"""
+import time
+from functools import lru_cache
+from string import Template
+
+from PyQt5 import QtGui, QtWidgets
+
+LIGHT = "light"
+DARK = "dark"
+
+# Пустая строка — свойство в этой теме не задаётся
+THEMES = {
+    LIGHT: {
+        "bg": "#f5f5f5",
+        "text": "",
+        "label_text": "#333",
+        "input_bg": "white",
+        "border": "#ddd",
+        "border_hover": "#aaa",
+        "popup_border": "#ddd",
+        "item_text": "",
+        "item_hover": "#E1E1E1",
+        "help_btn": "#2196F3",
+        "help_btn_text": "",
+        "help_btn_hover": "#1976D2",
+        "help_btn_pressed": "#0D47A1",
+        "action_btn": "#4CAF50",
+        "action_btn_text": "",
+        "btn_hover": "#45a049",
+        "btn_pressed": "#3B7DDD",
+        # вкладка справки
+        "info_bg": "#f8f9fa",
+        "info_btn": "#4e73df",
+        "info_btn_hover": "#3a60d0",
+        "info_border": "#d1d3e2",
+        "info_box_border": "#dddfeb",
+        "info_box_bg": "white",
+        "info_title": "#2e59d9",
+        "info_title_bg": "#f8f9fc",
+        "info_label": "#5a5c69",
+        "info_scroll_handle": "#d1d3e2",
+    },
+    DARK: {
+        "bg": "#2b2b2b",
+        "text": "#f0f0f0",
+        "label_text": "#f0f0f0",
+        "input_bg": "#3c3f41",
+        "border": "#555",
+        "border_hover": "#888",
+        "popup_border": "#444",
+        "item_text": "#f0f0f0",
+        "item_hover": "#505357",
+        "help_btn": "#1F628E",
+        "help_btn_text": "white",
+        "help_btn_hover": "#2C74A2",
+        "help_btn_pressed": "#174C6D",
+        "action_btn": "#4E586E",
+        "action_btn_text": "white",
+        "btn_hover": "#5E6A80",
+        "btn_pressed": "#3D4659",
+        # вкладка справки
+        "info_bg": "#2b2b2b",
+        "info_btn": "#1E88E5",
+        "info_btn_hover": "#1565C0",
+        "info_border": "#5a5a5a",
+        "info_box_border": "#5a5a5a",
+        "info_box_bg": "#3c3f41",
+        "info_title": "#A6B2EC",
+        "info_title_bg": "#2b2b2b",
+        "info_label": "#dddddd",
+        "info_scroll_handle": "#888",
+    },
+}
+
+ACCENT = "#5D9CEC"
+
+# Цвет окна из таблицы -> (роль палитры приложения, имя роли в стиле);
+# кнопки «?» и действий окрашиваются через роли ссылок и объёма
+PALETTE_ROLES = {
+    "bg": (QtGui.QPalette.Window, "window"),
+    "label_text": (QtGui.QPalette.WindowText, "window-text"),
+    "input_bg": (QtGui.QPalette.Base, "base"),
+    "text": (QtGui.QPalette.Text, "text"),
+    "item_hover": (QtGui.QPalette.AlternateBase, "alternate-base"),
+    "border": (QtGui.QPalette.Mid, "mid"),
+    "border_hover": (QtGui.QPalette.Dark, "dark"),
+    "popup_border": (QtGui.QPalette.Midlight, "midlight"),
+    "action_btn": (QtGui.QPalette.Button, "button"),
+    "action_btn_text": (QtGui.QPalette.ButtonText, "button-text"),
+    "btn_hover": (QtGui.QPalette.Light, "light"),
+    "btn_pressed": (QtGui.QPalette.Shadow, "shadow"),
+    "help_btn": (QtGui.QPalette.Link, "link"),
+    "help_btn_hover": (QtGui.QPalette.LinkVisited, "link-visited"),
+    "help_btn_pressed": (QtGui.QPalette.BrightText, "bright-text"),
+}
+
+_WINDOW_QSS = Template("""
+    QWidget {
+        font-family: 'Segoe UI', Arial, sans-serif;
+        font-size: 14px;
+        background-color: $bg;
+        $text_decl
+    }
+
+    QComboBox {
+        padding: 6px;
+        border: 1px solid $border;
+        border-radius: 4px;
+        background-color: $input_bg;
+        $text_decl
+        selection-background-color: $accent;
+        selection-color: white;
+    }
+    QComboBox:hover {
+        border: 1px solid $border_hover;
+    }
+    QComboBox:on {
+        border: 1px solid $accent;
+    }
+    QComboBox::drop-down {
+        subcontrol-origin: padding;
+        subcontrol-position: top right;
+        width: 30px;
+        border-left: 1px solid $border;
+        border-top-right-radius: 4px;
+        border-bottom-right-radius: 4px;
+    }
+    QComboBox::down-arrow {
+        image: url(:/icons/down_arrow.svg);
+        width: 12px;
+        height: 12px;
+    }
+    QComboBox QAbstractItemView {
+        border: 1px solid $popup_border;
+        background: $input_bg;
+        selection-background-color: $accent;
+        selection-color: white;
+        outline: 0;
+        padding: 4px;
+        margin: 0;
+        min-width: 150px;
+    }
+    QComboBox QAbstractItemView::item {
+        padding: 4px 8px;
+        margin: 0;
+        $item_text_decl
+    }
+    QComboBox QAbstractItemView::item:hover {
+        background-color: $item_hover;
+    }
+    QComboBox QAbstractItemView::item:selected {
+        background-color: $accent;
+        color: white;
+    }
+
+    QPushButton[text="?"],
+    QPushButton[text="←"] {
+        min-width: 30px;
+        max-width: 30px;
+        min-height: 30px;
+        max-height: 30px;
+        background-color: $help_btn;
+        $help_btn_text_decl
+    }
+    QPushButton[text="?"]:hover,
+    QPushButton[text="←"]:hover {
+        background-color: $help_btn_hover;
+    }
+    QPushButton[text="?"]:pressed,
+    QPushButton[text="←"]:pressed {
+        background-color: $help_btn_pressed;
+    }
+
+    QPushButton[text="🔄 Сформировать ответ"],
+    QPushButton[text="📋 Скопировать результат"] {
+        background-color: $action_btn;
+        $action_btn_text_decl
+        width: 100%;
+        padding: 8px;
+    }
+
+    QPushButton:hover {
+        background-color: $btn_hover;
+    }
+    QPushButton:pressed {
+        background-color: $btn_pressed;
+    }
+    QPushButton[text="?"]:hover,
+    QPushButton[text="←"]:hover {
+        background-color: #4A89DC;
+    }
+
+    QComboBox, QLineEdit, QPlainTextEdit {
+        padding: 6px;
+        border: 1px solid $border;
+        border-radius: 4px;
+        background-color: $input_bg;
+        $text_decl
+    }
+    QPlainTextEdit {
+        min-height: 100px;
+    }
+    QLabel {
+        font-weight: bold;
+        margin-top: 10px;
+        color: $label_text;
+    }
+""")
+
+_INFO_QSS = Template("""
+    QWidget {
+        font-family: 'Segoe UI', Arial, sans-serif;
+        background-color: $info_bg;
+        $text_decl
+    }
+
+    QPushButton {
+        background-color: $info_btn;
+        color: white;
+        border: none;
+        padding: 10px;
+        border-radius: 6px;
+        font-size: 14px;
+        font-weight: bold;
+    }
+    QPushButton:hover {
+        background-color: $info_btn_hover;
+    }
+
+    QLineEdit {
+        padding: 10px;
+        border: 2px solid $info_border;
+        border-radius: 6px;
+        font-size: 14px;
+        background-color: $info_box_bg;
+        $text_decl
+    }
+
+    QGroupBox {
+        border: 2px solid $info_box_border;
+        border-radius: 8px;
+        margin-top: 12px;
+        padding-top: 30px;
+        background-color: $info_box_bg;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 15px;
+        padding: 5px 10px;
+        color: $info_title;
+        font-weight: bold;
+        font-size: 16px;
+        background-color: $info_title_bg;
+        border-radius: 4px;
+        border: 1px solid $info_border;
+    }
+
+    QLabel {
+        padding: 12px;
+        font-size: 14px;
+        color: $info_label;
+        line-height: 1.6;
+    }
+
+    QScrollBar:vertical {
+        width: 12px;
+        background: $info_bg;
+    }
+    QScrollBar::handle:vertical {
+        background: $info_scroll_handle;
+        min-height: 30px;
+        border-radius: 6px;
+    }
+""")
+
+INFO_TAB_OBJECT_NAME = "infoTab"
+
+
+def _decl(prop: str, value: str) -> str:
+    return f"{prop}: {value};" if value else ""
+
+
+def _tokens(theme: str) -> dict:
+    tokens = dict(THEMES[theme])
+    tokens["accent"] = ACCENT
+    tokens["text_decl"] = _decl("color", tokens["text"])
+    return tokens
+
+
+def _window_tokens() -> dict:
+    """Подстановки стиля окна: вместо цвета — ссылка на его роль в палитре."""
+    tokens = {name: f"palette({role})" for name, (_, role) in PALETTE_ROLES.items()}
+    tokens["accent"] = ACCENT
+    tokens["text_decl"] = _decl("color", tokens["text"])
+    # item_text и help_btn_text во всех темах совпадают с text и action_btn_text
+    tokens["item_text_decl"] = tokens["text_decl"]
+    tokens["help_btn_text_decl"] = _decl("color", tokens["action_btn_text"])
+    tokens["action_btn_text_decl"] = tokens["help_btn_text_decl"]
+    return tokens
+
+
+@lru_cache(maxsize=None)
+def info_stylesheet(theme: str) -> str:
+    """Стиль вкладки справки; ставится на саму вкладку."""
+    return _INFO_QSS.substitute(_tokens(theme))
+
+
+@lru_cache(maxsize=None)
+def window_stylesheet() -> str:
+    """Стиль главного окна, общий для обеих тем: цвета берутся из палитры."""
+    return _WINDOW_QSS.substitute(_window_tokens())
+
+
+@lru_cache(maxsize=None)
+def palette(theme: str) -> QtGui.QPalette:
+    """Палитра приложения для темы; пустой цвет в таблице — цвет стиля Qt."""
+    tokens = THEMES[theme]
+    pal = QtGui.QPalette(QtWidgets.QApplication.style().standardPalette())
+    for name, (role, _) in PALETTE_ROLES.items():
+        if tokens[name]:
+            pal.setColor(role, QtGui.QColor(tokens[name]))
+    pal.setColor(QtGui.QPalette.ToolTipBase, QtGui.QColor(tokens["input_bg"]))
+    pal.setColor(QtGui.QPalette.ToolTipText, pal.color(QtGui.QPalette.Text))
+    pal.setColor(QtGui.QPalette.Highlight, QtGui.QColor(ACCENT))
+    pal.setColor(QtGui.QPalette.HighlightedText, QtGui.QColor("white"))
+    return pal
+
+
+class ThemeManager:
+    """Применяет тему к окну и замеряет время переключения."""
+
+    def __init__(self, window: QtWidgets.QWidget):
+        self.window = window
+        self.current = None
+        self.last_switch_ms = 0.0
+
+    def apply(self, theme: str) -> float:
+        if theme == self.current:
+            return 0.0
+        started = time.perf_counter()
+        QtWidgets.QApplication.instance().setPalette(palette(theme))
+        info_tab = self.window.findChild(QtWidgets.QWidget, INFO_TAB_OBJECT_NAME)
+        if self.current is None:
+            # Стиль окна один на обе темы и ставится только при первой теме
+            self.window.setStyleSheet(window_stylesheet())
+        else:
+            self._repolish(skip=info_tab)
+        if info_tab is not None:
+            info_tab.setStyleSheet(info_stylesheet(theme))
+        self.current = theme
+        self.last_switch_ms = (time.perf_counter() - started) * 1000
+        return self.last_switch_ms
+
+    def _repolish(self, skip=None):
+        """Заново подставляет palette(роль) в стиле окна после смены палитры.
+
+        Вкладка справки пропускается: её переполирует собственный setStyleSheet.
+        """
+        for widget in [self.window] + self.window.findChildren(QtWidgets.QWidget):
+            if skip is not None and (widget is skip or skip.isAncestorOf(widget)):
+                continue
+            style = widget.style()
+            style.unpolish(widget)
+            style.polish(widget)
+            widget.update()
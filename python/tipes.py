@@ -1,146 +1,32 @@
 from PyQt5 import QtWidgets, QtCore, QtGui
 
+from info_index import InfoIndex
+from theme import info_stylesheet, INFO_TAB_OBJECT_NAME, LIGHT, DARK
+
+SEARCH_DELAY_MS = 200
+
 
 class InfoTab(QtWidgets.QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
+        # Разделы индексируются один раз при добавлении, поиск идёт по индексу
+        self.search_index = InfoIndex()
+        self.sections = []
+        self._matched = []  # совпадал ли раздел с последним запросом (None — ещё не фильтровался)
+        self._pending_query = ""
+        self.search_timer = QtCore.QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(lambda: self.filter_content(self._pending_query))
         self.setup_styles()
 
     def setup_styles(self):
         """Применение стилей в зависимости от активной темы"""
-        if hasattr(self.parent, 'dark_mode') and self.parent.dark_mode:
-            # 🌙 ТЁМНАЯ ТЕМА
-            self.setStyleSheet("""
-                QWidget {
-                    font-family: 'Segoe UI', Arial, sans-serif;
-                    background-color: #2b2b2b;
-                    color: #f0f0f0;
-                }
-
-                QPushButton {
-                    background-color: #1E88E5;
-                    color: white;
-                    border: none;
-                    padding: 10px;
-                    border-radius: 6px;
-                    font-size: 14px;
-                    font-weight: bold;
-                }
-                QPushButton:hover {
-                    background-color: #1565C0;
-                }
-
-                QLineEdit {
-                    padding: 10px;
-                    border: 2px solid #5a5a5a;
-                    border-radius: 6px;
-                    font-size: 14px;
-                    background-color: #3c3f41;
-                    color: #f0f0f0;
-                }
-
-                QGroupBox {
-                    border: 2px solid #5a5a5a;
-                    border-radius: 8px;
-                    margin-top: 12px;
-                    padding-top: 30px;
-                    background-color: #3c3f41;
-                }
-                QGroupBox::title {
-                    subcontrol-origin: margin;
-                    left: 15px;
-                    padding: 5px 10px;
-                    color: #A6B2EC;
-                    font-weight: bold;
-                    font-size: 16px;
-                    background-color: #2b2b2b;
-                    border-radius: 4px;
-                    border: 1px solid #5a5a5a;
-                }
-
-                QLabel {
-                    padding: 12px;
-                    font-size: 14px;
-                    color: #dddddd;
-                    line-height: 1.6;
-                }
-
-                QScrollBar:vertical {
-                    width: 12px;
-                    background: #2b2b2b;
-                }
-                QScrollBar::handle:vertical {
-                    background: #888;
-                    min-height: 30px;
-                    border-radius: 6px;
-                }
-            """)
-        else:
-            # ☀️ СВЕТЛАЯ ТЕМА (оставим твой оригинальный стиль)
-            self.setStyleSheet("""
-                QWidget {
-                    font-family: 'Segoe UI', Arial, sans-serif;
-                    background-color: #f8f9fa;
-                }
-
-                QPushButton {
-                    background-color: #4e73df;
-                    color: white;
-                    border: none;
-                    padding: 10px;
-                    border-radius: 6px;
-                    font-size: 14px;
-                    font-weight: bold;
-                }
-                QPushButton:hover {
-                    background-color: #3a60d0;
-                }
-
-                QLineEdit {
-                    padding: 10px;
-                    border: 2px solid #d1d3e2;
-                    border-radius: 6px;
-                    font-size: 14px;
-                    background-color: white;
-                }
-
-                QGroupBox {
-                    border: 2px solid #dddfeb;
-                    border-radius: 8px;
-                    margin-top: 12px;
-                    padding-top: 30px;
-                    background-color: white;
-                }
-                QGroupBox::title {
-                    subcontrol-origin: margin;
-                    left: 15px;
-                    padding: 5px 10px;
-                    color: #2e59d9;
-                    font-weight: bold;
-                    font-size: 16px;
-                    background-color: #f8f9fc;
-                    border-radius: 4px;
-                    border: 1px solid #d1d3e2;
-                }
-
-                QLabel {
-                    padding: 12px;
-                    font-size: 14px;
-                    color: #5a5c69;
-                    line-height: 1.6;
-                }
-
-                QScrollBar:vertical {
-                    width: 12px;
-                    background: #f8f9fa;
-                }
-                QScrollBar::handle:vertical {
-                    background: #d1d3e2;
-                    min-height: 30px;
-                    border-radius: 6px;
-                }
-            """)
+        # Внутри главного окна при смене темы стиль вкладки меняет ThemeManager
+        self.setObjectName(INFO_TAB_OBJECT_NAME)
+        dark = hasattr(self.parent, 'dark_mode') and self.parent.dark_mode
+        self.setStyleSheet(info_stylesheet(DARK if dark else LIGHT))
 
     def add_info_section(self, title, content):
         """Добавление секции с красивым заголовком"""
@@ -155,20 +41,44 @@ class InfoTab(QtWidgets.QWidget):
         group_box.setLayout(layout)
 
         self.content_layout.addWidget(group_box)
+        self.search_index.add(title, content)
+        self.sections.append(group_box)
+        self._matched.append(None)
+
+    def schedule_filter(self, text):
+        """Поиск по мере набора: фильтр применяется после паузы в наборе"""
+        self._pending_query = text
+        self.search_timer.start()
 
     def filter_content(self, text):
         """Умный поиск по всем разделам"""
-        search_text = text.lower().strip()
-
-        for i in range(self.content_layout.count()):
-            widget = self.content_layout.itemAt(i).widget()
-            if isinstance(widget, QtWidgets.QGroupBox):
-                content = widget.layout().itemAt(0).widget().text().lower()
-                title = widget.title().lower()
-
-                # Ищем в заголовке и содержимом
-                match = search_text in title or search_text in content
-                widget.setVisible(match)
-
+        self.search_timer.stop()
+        ranked = self.search_index.search(text)
+        matched = set(ranked)
+
+        self.setUpdatesEnabled(False)
+        try:
+            for doc_id, group_box in enumerate(self.sections):
+                match = doc_id in matched
+                # Трогаем только разделы, у которых результат поменялся
+                if self._matched[doc_id] == match:
+                    continue
+                self._matched[doc_id] = match
+                group_box.setVisible(match)
                 # Автораскрытие найденных секций
-                widget.setChecked(match)
\ No newline at end of file
+                group_box.setChecked(match)
+            self._reorder(ranked)
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def _reorder(self, ranked):
+        """Ставит найденные разделы в порядке релевантности, остальные — за ними"""
+        if not self.sections:
+            return
+        order = ranked + [doc_id for doc_id, match in enumerate(self._matched) if not match]
+        base = min(self.content_layout.indexOf(group_box) for group_box in self.sections)
+        for offset, doc_id in enumerate(order):
+            group_box = self.sections[doc_id]
+            if self.content_layout.indexOf(group_box) != base + offset:
+                self.content_layout.removeWidget(group_box)
+                self.content_layout.insertWidget(base + offset, group_box)
\ No newline at end of file
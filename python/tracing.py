@@ -0,0 +1,135 @@
+# tracing.py
+"""Лёгкие замеры этапов генерации ответа.
+
+    with span("parse"):
+        ...
+
+Пока замеры выключены, span отдаёт один общий пустой контекст, и цена
+вызова — проверка флага. Включаются они на ходу (enable) или переменной
+окружения YH_TRACE=1. Каждый замер дописывается строкой JSON в файл
+(YH_TRACE_FILE или yandex_helper_trace.jsonl во временной папке); файл
+больше MAX_FILE_BYTES переименовывается в *.1 и начинается заново.
+Последние WINDOW замеров каждого этапа хранятся в памяти для stats().
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+
+MAX_FILE_BYTES = 5 * 1024 * 1024
+WINDOW = 500
+FLUSH_EVERY = 64
+
+_enabled = False
+_path = None
+_lock = threading.Lock()
+_buffer = []
+_recent = defaultdict(lambda: deque(maxlen=WINDOW))
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, (time.perf_counter() - self.started) * 1000)
+        return False
+
+
+def span(name: str):
+    """Контекст замера этапа name; при выключенных замерах ничего не делает."""
+    if not _enabled:
+        return _NOOP
+    return _Span(name)
+
+
+def default_path() -> str:
+    return os.environ.get("YH_TRACE_FILE") or os.path.join(tempfile.gettempdir(), "yandex_helper_trace.jsonl")
+
+
+def enable(path: str = None):
+    global _enabled, _path
+    _path = path or default_path()
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    flush()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _record(name: str, ms: float):
+    line = json.dumps({"t": round(time.time(), 3), "span": name, "ms": round(ms, 3)})
+    with _lock:
+        _recent[name].append(ms)
+        _buffer.append(line)
+        if len(_buffer) < FLUSH_EVERY:
+            return
+        lines = _buffer[:]
+        _buffer.clear()
+    _write(lines)
+
+
+def flush():
+    with _lock:
+        lines = _buffer[:]
+        _buffer.clear()
+    if lines:
+        _write(lines)
+
+
+def _write(lines: list):
+    path = _path or default_path()
+    try:
+        if os.path.exists(path) and os.path.getsize(path) > MAX_FILE_BYTES:
+            os.replace(path, path + ".1")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+    except OSError:
+        # Замеры не должны ломать работу окна
+        pass
+
+
+def _percentile(sorted_values: list, p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))]
+
+
+def stats() -> dict:
+    """{этап: (число замеров, p50 мс, p95 мс)} по последним WINDOW замерам."""
+    with _lock:
+        snapshot = {name: sorted(values) for name, values in _recent.items() if values}
+    return {name: (len(values), _percentile(values, 50), _percentile(values, 95))
+            for name, values in snapshot.items()}
+
+
+if os.environ.get("YH_TRACE") == "1":
+    enable()
+
+atexit.register(flush)
@@ -2,7 +2,10 @@
 import os
 import re
 import sys
-from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+
+from lexer import iter_price_pairs
+from money import PriceLine
 
 def resource_path(relative_path):
     """Возвращает корректный путь к файлу даже после сборки в EXE."""
@@ -10,38 +13,37 @@ def resource_path(relative_path):
         return os.path.join(sys._MEIPASS, relative_path)
     return os.path.join(os.path.abspath("."), relative_path)
 
+_UNIT_DOT_RE = re.compile(r'\b(ч|мин|км|кг|м|млн|млрд|трлн)\.')
+
 def normalize_comment(comment: str) -> str:
-    return re.sub(r'\b(ч|мин|км|кг|м|млн|млрд|трлн)\.', r'\1', comment).strip()
+    if "." not in comment:
+        return comment.strip()
+    return _normalize_units(comment)
+
+@lru_cache(maxsize=4096)
+def _normalize_units(comment: str) -> str:
+    # Комментарии вида «за 5 мин.» повторяются от заказа к заказу
+    return _UNIT_DOT_RE.sub(r'\1', comment).strip()
 
 def parse_price_lines(text: str) -> dict:
-    lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
     result = {}
-    i = 0
-    while i < len(lines):
-        key = lines[i]
-        if i + 1 < len(lines):
-            val_line = lines[i + 1]
-            m = re.match(r"(\d+\.?\d*\s*₽)(?:\s*\((.+)\))?", val_line)
-            if m:
-                val = m.group(1).strip()
-                comment = m.group(2).strip() if m.group(2) else ""
-                result[key] = (val, normalize_comment(comment))
-                i += 2
-                continue
-        m = re.match(r"(.+?)\s+(\d+\.?\d*\s*₽)(?:\s*\((.+)\))?", key)
-        if m:
-            field = m.group(1).strip()
-            val = m.group(2).strip()
-            comment = m.group(3).strip() if m.lastindex >= 3 and m.group(3) else ""
-            result[field] = (val, normalize_comment(comment))
-        i += 1
+    for field, val, comment in iter_price_pairs(text):
+        result[field] = (val, normalize_comment(comment))
     return result
 
-def format_line(name: str, val: str, comment: str) -> str:
-    return f"— {name}: {val} ({comment})" if comment else f"— {name}: {val}"
+def parse_price_records(text: str) -> dict:
+    """Как parse_price_lines, но значения — PriceLine с суммой в копейках."""
+    return price_records(iter_price_pairs(text))
 
-def sum_ruble_digits(result_text: str) -> str:
-    matches = re.findall(r"\u2014 .*?: (\d[\d\s\.]*)\s*₽", result_text)
-    total = sum(float(d.replace(" ", "").replace(",", ".")) for d in matches)
-    rounded = Decimal(total).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
-    return f"{rounded} ₽"
\ No newline at end of file
+def price_records(pairs) -> dict:
+    """Словарь PriceLine из троек (название, сумма, комментарий); повтор названия заменяет строку."""
+    # PriceLine строится только для строк, которые остались в словаре
+    result = {}
+    for field, val, comment in pairs:
+        result[field] = (val, comment)
+    for field, (val, comment) in result.items():
+        result[field] = PriceLine(field, val, normalize_comment(comment))
+    return result
+
+def format_line(name: str, val: str, comment: str) -> str:
+    return f"— {name}: {val} ({comment})" if comment else f"— {name}: {val}"
\ No newline at end of file
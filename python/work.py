@@ -1,15 +1,36 @@
 # work.py
+from startup import timer
 import sys
 import os
-from PyQt5 import QtWidgets
+import multiprocessing
+
+if __name__ == '__main__':
+    # Пул процессов для нескольких заказов и сервиса запускает копии EXE
+    multiprocessing.freeze_support()
+    # Режим HTTP-сервиса: окно и PyQt не нужны
+    if "--serve" in sys.argv[1:]:
+        from http_service import main as serve
+        sys.exit(serve(sys.argv[1:]))
+
+from PyQt5 import QtWidgets, QtCore
+from constants import STARTUP_BUDGET_MS
 from main_window import MainWindow
 
 if getattr(sys, 'frozen', False):
     os.chdir(sys._MEIPASS)
 
 if __name__ == '__main__':
+    timer.mark("imports")
     app = QtWidgets.QApplication(sys.argv)
     app.setStyle("Fusion")
     window = MainWindow()
+    timer.mark("window")
     window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+
+    def on_first_paint():
+        timer.mark("shown")
+        timer.write_report(STARTUP_BUDGET_MS)
+
+    # Срабатывает после первой итерации цикла событий, когда окно уже отрисовано
+    QtCore.QTimer.singleShot(0, on_first_paint)
+    sys.exit(app.exec_())